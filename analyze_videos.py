@@ -0,0 +1,204 @@
+"""
+Analisis offline rekaman latihan: deteksi pose + classify_pose untuk setiap frame,
+dijalankan paralel di process pool (satu instance Pose per proses worker).
+
+    python analyze_videos.py uploads/ --output analysis/ --workers 8
+    python analyze_videos.py squad.mp4 langus.mp4 --pose squad
+
+Setiap video dipecah menjadi potongan rentang frame (--chunk-frames) yang
+dikerjakan worker mana pun yang sedang kosong, lalu hasilnya disatukan kembali
+per video ke <output>/<nama video>.npz (format kolom, satu array per kolom):
+
+    frame      (N,)        indeks frame
+    timestamp  (N,)        posisi di video, milidetik
+    detected   (N,)        pose terdeteksi
+    landmarks  (N, 33, 4)  x, y, z, visibility (NaN jika tidak terdeteksi)
+    correct    (N,)        1 benar, 0 salah, -1 tidak terdeteksi / tanpa aturan
+    case       (N,)        indeks kasus aturan yang cocok (-1: tidak ada yang cocok)
+    messages   (K + 1,)    feedback per kasus; elemen terakhir untuk case -1
+    pose       ()          nama gerakan yang dipakai untuk klasifikasi
+
+Tanpa --pose, nama gerakan diambil dari nama file jika cocok dengan aturan
+(mis. squad.mp4 -> "squad", langus.mp4 -> "langus").
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+from pose_math import landmarks_to_array
+from pose_rules import COMPILED_RULES
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+NUM_LANDMARKS = 33
+
+# Instance Pose milik proses worker, dibuat sekali oleh _init_worker
+_pose = None
+
+
+def _init_worker(model_complexity):
+    global _pose
+    import mediapipe as mp
+    _pose = mp.solutions.pose.Pose(model_complexity=model_complexity,
+                                   min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+
+def find_videos(paths):
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.append(os.path.join(path, name))
+        else:
+            videos.append(path)
+    return videos
+
+
+def pose_for_video(path, selected_pose=None):
+    if selected_pose:
+        return selected_pose
+    name = os.path.splitext(os.path.basename(path))[0]
+    return name if name in COMPILED_RULES else None
+
+
+def split_chunks(path, chunk_frames):
+    """
+    Rentang frame [start, end) untuk satu video. end None: baca sampai habis
+    (jumlah frame dari metadata kontainer tidak selalu tepat).
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        print(f"Error membuka video {path}")
+        return []
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    if total <= 0:
+        return [(path, 0, None)]
+    starts = list(range(0, total, chunk_frames))
+    return [(path, start, start + chunk_frames if i < len(starts) - 1 else None)
+            for i, start in enumerate(starts)]
+
+
+def analyze_chunk(task):
+    """
+    Dijalankan di worker: deteksi pose untuk satu rentang frame
+    """
+    path, start, end, selected_pose = task
+    # State tracking potongan sebelumnya (bisa dari video lain) tidak boleh terbawa
+    reset = getattr(_pose, 'reset', None)
+    if reset is not None:
+        reset()
+
+    cap = cv2.VideoCapture(path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    frames, timestamps, landmarks = [], [], []
+    index = start
+    while end is None or index < end:
+        timestamp = cap.get(cv2.CAP_PROP_POS_MSEC)
+        ret, frame = cap.read()
+        if not ret:
+            break
+        results = _pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if results.pose_landmarks:
+            landmarks.append(landmarks_to_array(results.pose_landmarks.landmark))
+        else:
+            landmarks.append(np.full((NUM_LANDMARKS, 4), np.nan, dtype=np.float32))
+        frames.append(index)
+        timestamps.append(timestamp)
+        index += 1
+    cap.release()
+
+    landmarks = np.array(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 4)
+    detected = ~np.isnan(landmarks[:, 0, 0])
+    correct = np.full(len(frames), -1, dtype=np.int8)
+    case = np.full(len(frames), -1, dtype=np.int16)
+    rule = COMPILED_RULES.get(selected_pose)
+    if rule is not None and detected.any():
+        # Klasifikasi semua frame terdeteksi sekaligus (vektor)
+        batch_correct, batch_case = rule.evaluate_batch(landmarks[detected])
+        correct[detected] = batch_correct
+        case[detected] = batch_case
+
+    return path, start, {
+        'frame': np.array(frames, dtype=np.int32),
+        'timestamp': np.array(timestamps, dtype=np.float64),
+        'detected': detected,
+        'landmarks': landmarks,
+        'correct': correct,
+        'case': case,
+    }
+
+
+def rule_messages(selected_pose):
+    rule = COMPILED_RULES.get(selected_pose)
+    if rule is None:
+        return np.array([""])
+    outcomes = rule.outcomes + [rule.fallback]
+    return np.array([" - ".join(filter(None, (feedback.get("message"), feedback.get("detail"))))
+                     for _, feedback in outcomes])
+
+
+def write_result(path, chunks, selected_pose, output_dir):
+    columns = {name: np.concatenate([chunk[name] for _, chunk in sorted(chunks, key=lambda item: item[0])])
+               for name in chunks[0][1]}
+    name = os.path.splitext(os.path.basename(path))[0]
+    output_path = os.path.join(output_dir, f"{name}.npz")
+    np.savez_compressed(output_path, messages=rule_messages(selected_pose),
+                        pose=np.array(selected_pose or ""), **columns)
+
+    total = len(columns['frame'])
+    detected = int(columns['detected'].sum())
+    graded = columns['correct'] >= 0
+    if not selected_pose:
+        accuracy = "tanpa aturan"
+    elif graded.any():
+        accuracy = f"{columns['correct'][graded].mean() * 100:.1f}% benar"
+    else:
+        accuracy = "tidak ada frame yang dinilai"
+    print(f"{path}: {total} frame, {detected} terdeteksi, {accuracy} -> {output_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='file video atau direktori berisi video')
+    parser.add_argument('--output', default='analysis')
+    parser.add_argument('--pose', help='nama gerakan untuk semua video (default: dari nama file)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-frames', type=int, default=300)
+    parser.add_argument('--model-complexity', type=int, default=1, choices=(0, 1, 2))
+    args = parser.parse_args()
+
+    if args.pose and args.pose not in COMPILED_RULES:
+        parser.error(f"Gerakan {args.pose} tidak dikenali")
+    os.makedirs(args.output, exist_ok=True)
+
+    videos = find_videos(args.inputs)
+    poses = {path: pose_for_video(path, args.pose) for path in videos}
+    tasks = []
+    pending = {}
+    for path in videos:
+        chunks = split_chunks(path, args.chunk_frames)
+        pending[path] = len(chunks)
+        tasks.extend((chunk_path, start, end, poses[path]) for chunk_path, start, end in chunks)
+    print(f"{len(videos)} video, {len(tasks)} potongan, {args.workers} worker")
+
+    start_time = time.time()
+    results = {path: [] for path in videos}
+    # spawn: MediaPipe tidak aman di-fork setelah thread internalnya berjalan
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.workers, initializer=_init_worker, initargs=(args.model_complexity,)) as pool:
+        for path, start, chunk in pool.imap_unordered(analyze_chunk, tasks):
+            results[path].append((start, chunk))
+            pending[path] -= 1
+            if pending[path] == 0:
+                write_result(path, results.pop(path), poses[path], args.output)
+
+    print(f"Selesai dalam {time.time() - start_time:.1f} detik")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from flask import Flask, render_template, Response, request
+from flask import Flask, render_template, Response, request, jsonify
 import cv2
 import mediapipe as mp
 import pymysql
@@ -6,22 +6,45 @@ import numpy as np
 import math
 import time
 from ultralytics import YOLO
+from batch_infer import MicroBatcher
+from capture_hub import CaptureHub, CAPTURE_LATEST
+from db_pool import ConnectionPool
+from db_writer import BatchWriter
+import metrics as pipeline_metrics
+from overlay import OverlayRenderer
+from pose_history import (
+    DEFAULT_PAGE_SIZE, MAX_STREAM_ROWS, fetch_history_page, parse_history_args, stream_history_json
+)
+from pose_pool import EstimatorPool
+from pose_rules import LENIENT_SQUAT_RULES, classify_pose
+from roi_pose import RoiPoseEstimator
+from stream_encoder import StreamEncoder, parse_stream_args
+from yolo_gate import GatedPoseEstimator
 
 app = Flask(__name__)
 
 # Inisialisasi MediaPipe pose
 mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(
+# Satu instance Pose per stream, dibatasi dan didaur ulang oleh pool.
+# Inferensi dijalankan di crop sekitar orang (ROI), bukan di seluruh frame,
+# dan YOLO hanya dijalankan tiap 5 frame (atau saat MediaPipe kehilangan pose).
+pose_pool = EstimatorPool(lambda: GatedPoseEstimator(run_yolo, RoiPoseEstimator(mp_pose.Pose(
     min_detection_confidence=0.7, 
     min_tracking_confidence=0.7
-)
+)), interval=5))
 mp_drawing = mp.solutions.drawing_utils
 
+# Satu pembaca kamera bersama untuk semua penonton /video_feed
+capture_hub = CaptureHub(estimator_pool=pose_pool)
+
+# Header diblend di ROI saja dan ukuran label di-cache, dipakai bersama semua thread render
+overlay_renderer = OverlayRenderer()
+
 # Inisialisasi model YOLO dengan raw string
 yolo_model = YOLO(r'D:\project3\runs\detect\train\weights\best.pt')
 
 # Konfigurasi Database
-def get_db_connection():
+def connect_mysql():
     return pymysql.connect(
         host='localhost',
         user='root',
@@ -30,493 +53,213 @@ def get_db_connection():
         cursorclass=pymysql.cursors.DictCursor
     )
 
+# Pool koneksi: handshake MySQL hanya dibayar saat membuat koneksi baru.
+# Factory bisa diganti, mis. db_sqlite.connect_sqlite untuk menjalankan tanpa server MySQL.
+db_pool = ConnectionPool(connect_mysql, min_size=1, max_size=8)
+
+def get_db_connection():
+    # close() pada koneksi ini mengembalikannya ke pool
+    return db_pool.get()
+
+# Penulis database di background: insert dikumpulkan lalu dikirim per batch
+db_writer = BatchWriter(
+    get_db_connection,
+    "INSERT INTO detected_poses (pose_name, is_correct, feedback) VALUES (%s, %s, %s)",
+    # Spill dan dead-letter per app: query dan jumlah kolom tiap app berbeda
+    spill_path='detected_poses_spill_app2.jsonl',
+    dead_letter_path='detected_poses_dead_app2.jsonl'
+)
+
 def save_pose_to_db(pose_name, is_correct, feedback):
-    try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = "INSERT INTO detected_poses (pose_name, is_correct, feedback) VALUES (%s, %s, %s)"
-            cursor.execute(query, (pose_name, is_correct, feedback))
-            connection.commit()
-        connection.close()
-    except Exception as e:
-        print(f"Error menyimpan ke database: {e}")
+    # Tidak pernah menunggu database, baris masuk antrean db_writer
+    db_writer.submit((pose_name, is_correct, feedback))
 
-def fetch_pose_history():
+def fetch_pose_history(cursor=None, limit=DEFAULT_PAGE_SIZE, **filters):
+    """
+    Satu halaman riwayat (keyset pagination) -> (poses, next_cursor)
+    """
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = "SELECT * FROM detected_poses ORDER BY id DESC LIMIT 50"
-            cursor.execute(query)
-            poses = cursor.fetchall()
-        connection.close()
-        return poses
+        return fetch_history_page(get_db_connection, "*", cursor, limit, **filters)
     except Exception as e:
         print(f"Error mengambil data dari database: {e}")
-        return []
-
-# Fungsi untuk menghitung sudut antara tiga titik
-def calculate_angle(a, b, c):
-    a = np.array([a.x, a.y])
-    b = np.array([b.x, b.y])
-    c = np.array([c.x, c.y])
-    
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-    
-    return angle
+        return [], None
 
 # Fungsi untuk mendeteksi visibilitas landmark
 def is_visible(landmark):
     return landmark.visibility > 0.65
 
-# Fungsi untuk mengklasifikasikan gerakan berdasarkan pose tertentu
-def classify_pose(landmarks, selected_pose):
-    feedback = {}
-    is_correct = False
-    
-    # Otot Tangan
-    if selected_pose == "Arm Press":
-        # Periksa sudut lengan
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        right_elbow = landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-        right_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value]
-        
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        left_elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        left_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-        
-        # Hitung sudut siku
-        right_elbow_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
-        left_elbow_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-        
-        # Aturan untuk Arm Press: siku harus ditekuk dengan sudut sekitar 90 derajat
-        if 80 <= right_elbow_angle <= 100 and 80 <= left_elbow_angle <= 100:
-            is_correct = True
-            feedback["message"] = "Posisi Arm Press sudah benar!"
-        else:
-            feedback["message"] = "Posisi Arm Press salah!"
-            if right_elbow_angle < 80 or left_elbow_angle < 80:
-                feedback["detail"] = "Tekuk siku lebih dalam (sudut terlalu lebar)"
-            elif right_elbow_angle > 100 or left_elbow_angle > 100:
-                feedback["detail"] = "Buka siku lebih lebar (sudut terlalu sempit)"
-    
-    elif selected_pose == "Push up":
-        # Landmark untuk push up
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        right_elbow = landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-        right_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-        right_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        
-        # Hitung sudut siku dan tubuh
-        elbow_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
-        body_angle = calculate_angle(right_shoulder, right_hip, right_knee)
-        
-        # Aturan push up: siku ~90 derajat dan tubuh lurus
-        if 70 <= elbow_angle <= 110:
-            if 160 <= body_angle <= 190:
-                is_correct = True
-                feedback["message"] = "Posisi Push Up sudah benar!"
-            else:
-                feedback["message"] = "Posisi tubuh Push Up salah!"
-                feedback["detail"] = "Jaga tubuh tetap lurus, jangan menekuk pinggul"
-        else:
-            feedback["message"] = "Posisi siku Push Up salah!"
-            if elbow_angle < 70:
-                feedback["detail"] = "Terlalu rendah, naikan posisi tubuh"
-            else:
-                feedback["detail"] = "Terlalu tinggi, turunkan posisi tubuh"
-    
-    elif selected_pose == "plank":
-        # Landmark untuk plank
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-        right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        
-        # Hitung sudut tubuh (harus lurus)
-        left_body_angle = calculate_angle(left_shoulder, left_hip, left_ankle)
-        right_body_angle = calculate_angle(right_shoulder, right_hip, right_ankle)
-        
-        # Posisi plank: tubuh harus lurus (sudut ~180 derajat)
-        if 160 <= left_body_angle <= 200 and 160 <= right_body_angle <= 200:
-            is_correct = True
-            feedback["message"] = "Posisi Plank sudah benar!"
-        else:
-            feedback["message"] = "Posisi Plank salah!"
-            if left_body_angle < 160 or right_body_angle < 160:
-                feedback["detail"] = "Pinggul terlalu rendah, angkat pinggul"
-            else:
-                feedback["detail"] = "Pinggul terlalu tinggi, turunkan pinggul"
-    
-    elif selected_pose == "langus":
-        # Landmark untuk lunges
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        
-        # Hitung sudut lutut untuk kedua kaki
-        right_knee_angle = calculate_angle(right_hip, right_knee, right_ankle)
-        left_knee_angle = calculate_angle(left_hip, left_knee, left_ankle)
-        
-        # Menghitung jarak antar kaki
-        ankle_x_distance = abs(right_ankle.x - left_ankle.x)
-        
-        # Identifikasi kaki depan dan belakang
-        if right_knee.y > left_knee.y:
-            front_knee = right_knee
-            front_hip = right_hip
-            front_ankle = right_ankle
-            front_knee_angle = right_knee_angle
-            
-            back_knee = left_knee
-            back_hip = left_hip
-            back_ankle = left_ankle
-            back_knee_angle = left_knee_angle
-        else:
-            front_knee = left_knee
-            front_hip = left_hip
-            front_ankle = left_ankle
-            front_knee_angle = left_knee_angle
-            
-            back_knee = right_knee
-            back_hip = right_hip
-            back_ankle = right_ankle
-            back_knee_angle = right_knee_angle
-        
-        # SOLUSI UNTUK MASALAH DETEKSI
-        
-        # 1. Definisikan fase gerakan lunges dengan jelas
-        
-        # Posisi berdiri tegak (start/end)
-        standing_position = right_knee_angle > 160 and left_knee_angle > 160
-        
-        # Posisi bawah yang benar (sudut < 110, sudah cukup turun)
-        bottom_position = front_knee_angle < 110 and ankle_x_distance > 0.25
-        
-        # Posisi kurang dalam yang tidak bergerak (posisi statis yang salah)
-        insufficient_static = (
-            front_knee_angle >= 140 and 
-            front_knee_angle <= 140 and 
-            ankle_x_distance > 0.2
-        )
-        
-        # TAMBAHAN: State untuk mendeteksi gerakan
-        # Untuk menyimpan frame sebelumnya, gunakan variabel global atau state
-        # Di sini kita akan menggunakan pendekatan sederhana berdasarkan posisi saat ini
-        
-        # Keamanan: Posisi lutut tidak melewati ujung kaki
-        knee_forward_threshold = 0.2
-        knee_position_safe = front_knee.x <= front_ankle.x + knee_forward_threshold
-        
-        # EVALUASI POSISI LUNGES DENGAN MEMPERTIMBANGKAN GERAKAN
-        
-        # Posisi berdiri tegak selalu dianggap benar (posisi awal/akhir)
-        if standing_position:
-            is_correct = True
-            feedback["message"] = "Posisi Lunges sudah benar!"
-            feedback["detail"] = "Posisi awal/akhir lunges"
-        
-        # Posisi bawah yang sudah cukup dalam dianggap benar
-        elif bottom_position:
-            if not knee_position_safe:
-                is_correct = False
-                feedback["message"] = "Posisi Lunges salah!"
-                feedback["detail"] = "Lutut depan terlalu maju melewati ujung kaki"
-            else:
-                is_correct = True
-                feedback["message"] = "Posisi Lunges sudah benar!"
-                feedback["detail"] = "Posisi bawah lunges yang baik"
-        
-        # Posisi kurang dalam yang tidak bergerak dianggap salah
-        elif insufficient_static:
-            is_correct = False
-            feedback["message"] = "Posisi Lunges salah!"
-            feedback["detail"] = "Kurang ke bawah, turunkan tubuh dan tekuk lutut lebih dalam"
-        
-        # Ada langkah kaki tetapi belum jelas posisinya
-        elif ankle_x_distance > 0.2:
-            # PENTING: Jika ada langkah kaki tetapi sudut lutut belum ideal,
-            # kita asumsikan sedang dalam proses turun/naik, sehingga dianggap benar
-            is_correct = True
-            feedback["message"] = "Posisi Lunges sudah benar!"
-            
-            if front_knee_angle > 140:
-                feedback["detail"] = "Mulai turun, teruskan gerakan"
-            else:
-                feedback["detail"] = "Lanjutkan gerakan"
-        
-        # Belum melakukan gerakan lunges
-        else:
-            is_correct = False
-            feedback["message"] = "Posisi Lunges salah!"
-            feedback["detail"] = "Belum melakukan gerakan lunges dengan benar"
-    
-    elif selected_pose == "squad":
-        # Landmark untuk squat
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        
-        # Hitung sudut lutut
-        right_knee_angle = calculate_angle(right_hip, right_knee, right_ankle)
-        left_knee_angle = calculate_angle(left_hip, left_knee, left_ankle)
-        avg_knee_angle = (right_knee_angle + left_knee_angle) / 2
-        
-        # Indikator posisi lutut yang tidak aman
-        knee_forward_threshold = 0.3
-        right_knee_forward = right_knee.x > right_ankle.x + knee_forward_threshold
-        left_knee_forward = left_knee.x > left_ankle.x + knee_forward_threshold
-        knee_position_unsafe = right_knee_forward and left_knee_forward
-        
-        # Deteksi posisi berdiri tegak (hampir lurus, sudut > 170)
-        standing_position = avg_knee_angle > 170
-        
-        # Deteksi posisi persiapan squat (posisi sebelum turun, sudut 130-170)
-        preparation_position = 130 <= avg_knee_angle <= 170
-        
-        # Deteksi squat aktif (sudut 80-130)
-        active_squat = 80 <= avg_knee_angle < 130
-        
-        # Deteksi squat terlalu dalam (sudut < 60)
-        too_deep_squat = avg_knee_angle < 60
-        
-        # Deteksi squat dangkal yang benar-benar kurang dalam (60-80)
-        insufficient_squat = 40 <= avg_knee_angle < 60
-        
-        # LOGIKA EVALUASI YANG SANGAT AKURAT
-        
-        # Posisi lutut tidak aman selalu salah
-        if knee_position_unsafe:
-            is_correct = False
-            feedback["message"] = "Posisi Squat perlu perbaikan"
-            feedback["detail"] = "Lutut terlalu jauh ke depan, geser berat badan ke tumit"
-        
-        # Squat terlalu dalam dianggap salah
-        elif too_deep_squat:
-            is_correct = False
-            feedback["message"] = "Posisi Squat perlu perbaikan"
-            feedback["detail"] = "Terlalu dalam, naikan sedikit posisi"
-        
-        # Squat yang benar-benar kurang dalam dianggap salah
-        elif insufficient_squat:
-            is_correct = False
-            feedback["message"] = "Posisi Squat perlu perbaikan"
-            feedback["detail"] = "Kurang dalam, turunkan tubuh lebih rendah"
-        
-        # SEMUA POSISI LAINNYA DIANGGAP BENAR
-        # Termasuk: posisi berdiri, posisi persiapan, dan squat aktif
-        else:
-            is_correct = True
-            feedback["message"] = "Posisi Squat sudah benar!"
-            
-            # Tambahkan detail fase squat
-            if standing_position:
-                feedback["detail"] = "Posisi berdiri tegak"
-            elif preparation_position:
-                feedback["detail"] = "Posisi persiapan squat"
-            elif active_squat:
-                feedback["detail"] = "Posisi squat aktif"
-    
-    # Tambahkan pose lainnya di sini sesuai kebutuhan...
-    else:
-        feedback["message"] = f"Gerakan {selected_pose} tidak dikenali"
-        
-    return is_correct, feedback
+def parse_yolo_result(result, confidence_threshold):
+    # Hasil YOLO satu frame -> (bounding box, confidence, nama class) atau None
+    boxes = result.boxes
+    if boxes is not None:
+        for box in boxes:
+            if box.conf[0].item() > confidence_threshold:
+                # Ambil koordinat bounding box (x1, y1, x2, y2)
+                x1, y1, x2, y2 = box.xyxy[0].tolist()
+                pose_bbox = [int(coord) for coord in [x1, y1, x2, y2]]
+                yolo_confidence = box.conf[0].item()
+
+                # Ambil nama class
+                class_id = int(box.cls[0].item())
+                detected_class_name = yolo_model.names[class_id]
+                return pose_bbox, yolo_confidence, detected_class_name
+    return None
 
-def generate_frames(selected_pose=None):
-    cap = cv2.VideoCapture(0)  # Gunakan kamera webcam (0) atau file video
+def run_yolo_batch(frames):
     confidence_threshold = 0.5  # Ambang batas kepercayaan untuk deteksi YOLO
-    last_save_time = 0
+
+    # Satu panggilan YOLO untuk frame dari beberapa stream sekaligus, satu hasil per frame
+    yolo_results = yolo_model(frames, conf=confidence_threshold)
+    return [parse_yolo_result(result, confidence_threshold) for result in yolo_results]
+
+# Frame dari semua stream dikumpulkan paling lama 5 ms (maks. 8 frame) lalu diproses satu batch
+yolo_batcher = MicroBatcher(run_yolo_batch, max_batch=8, max_wait=0.005, name='yolo-batcher')
+
+def run_yolo(frame):
+    # Dipanggil dari thread inferensi tiap stream, menunggu hasil batch yang memuat frame ini
+    return yolo_batcher.submit(frame)
+
+def detect_pose(frame, pose):
+    # Flip untuk tampilan mirror
+    frame = cv2.flip(frame, 1)
+
+    # Langkah 1: YOLO (hanya tiap beberapa frame, di antaranya box diteruskan tracker)
+    # Langkah 2: MediaPipe di sekitar box tersebut; landmark dipetakan kembali ke frame penuh
+    # Hasil: (pose_detected, pose_bbox, yolo_confidence, detected_class_name, results)
+    return frame, pose.process(frame)
+
+def render_frame(packet, selected_pose, state):
     save_interval = 3  # Simpan ke database setiap 3 detik
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # Frame dipakai bersama, salin sebelum digambari
+    frame = packet.frame.copy()
+    pose_detected, pose_bbox, yolo_confidence, detected_class_name, results = packet.results
+
+    # Variabel untuk feedback MediaPipe
+    mediapipe_feedback_text = "Posisi Tidak Terdeteksi"
+    mediapipe_feedback_detail = ""
+    mediapipe_feedback_color = (0, 0, 255)  # Merah untuk default
+
+    # Jika pose terdeteksi oleh YOLO, tampilkan hasil MediaPipe
+    if pose_detected:
+        if results.pose_landmarks:
+            landmarks = results.pose_landmarks.landmark
+        
+            # Klasifikasi gerakan berdasarkan gerakan yang dipilih
+            if selected_pose:
+                is_correct, feedback = classify_pose(landmarks, selected_pose, LENIENT_SQUAT_RULES)
+            
+                if is_correct:
+                    mediapipe_feedback_text = feedback.get("message", "BENAR!")
+                    mediapipe_feedback_color = (0, 255, 0)  # Hijau
+                else:
+                    mediapipe_feedback_text = feedback.get("message", "SALAH!")
+                    mediapipe_feedback_detail = feedback.get("detail", "")
+            
+                # Simpan ke database setiap interval tertentu
+                current_time = time.time()
+                if current_time - state['last_save_time'] > save_interval:
+                    save_pose_to_db(selected_pose, is_correct, mediapipe_feedback_detail)
+                    state['last_save_time'] = current_time
 
-        # Flip untuk tampilan mirror
-        frame = cv2.flip(frame, 1)
+            # Menggambar kerangka pose MediaPipe
+            mp_drawing.draw_landmarks(
+                frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
+                mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
+                mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
+            )
 
-        # Langkah 1: Deteksi pose menggunakan YOLO
-        yolo_results = yolo_model(frame, conf=confidence_threshold)
+            # VISUALISASI DENGAN POSISI TEKS YANG TERPISAH JAUH
+            h, w, c = frame.shape
         
-        # Periksa apakah ada pose terdeteksi
-        pose_detected = False
-        pose_bbox = None
-        yolo_confidence = 0.0
-        detected_class_name = ""
+            # Membuat latar belakang semi-transparan untuk teks
+            overlay_renderer.darken_header(frame, 120, alpha=0.7)
+        
+            # 1. Menampilkan jenis pose di KIRI ATAS dengan jarak yang cukup
+            pose_text = f"Target: {selected_pose}"
+            cv2.putText(frame, pose_text, (20, 30), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        
+            # 2. Menampilkan pose terdeteksi YOLO di KANAN ATAS dengan jarak yang cukup
+            detected_text = f"YOLO: {detected_class_name} ({yolo_confidence:.2f})"
+            text_size = overlay_renderer.text_size(detected_text, 0.8, 2)
+            # Hitung posisi x agar text ada di sebelah kanan dengan jarak aman
+            detected_x = w - text_size[0] - 30
+            cv2.putText(frame, detected_text, (detected_x, 30), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        
+            # 3. Menampilkan feedback MediaPipe di bawah target pose
+            cv2.putText(frame, f"MediaPipe: {mediapipe_feedback_text}", (20, 60), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, mediapipe_feedback_color, 2)
+        
+            # 4. Menampilkan detail feedback jika ada
+            if mediapipe_feedback_detail:
+                cv2.putText(frame, mediapipe_feedback_detail, (20, 90), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, mediapipe_feedback_color, 2)
+        
+            # 5. Menggambar bounding box hijau dari YOLO dengan label
+            box_color = (0, 255, 0)  # Hijau
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), 
+                         (pose_bbox[2], pose_bbox[3]), box_color, 2)
+        
+            # Menampilkan label di atas bounding box
+            label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
+            label_size = overlay_renderer.text_size(label_text, 0.6, 2)
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
+                         (pose_bbox[0] + label_size[0], pose_bbox[1]), box_color, -1)
+            cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
-        # Ambil hasil deteksi YOLO
-        for result in yolo_results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    if box.conf[0].item() > confidence_threshold:
-                        pose_detected = True
-                        # Ambil koordinat bounding box (x1, y1, x2, y2)
-                        x1, y1, x2, y2 = box.xyxy[0].tolist()
-                        pose_bbox = [int(coord) for coord in [x1, y1, x2, y2]]
-                        yolo_confidence = box.conf[0].item()
-                        
-                        # Ambil nama class
-                        class_id = int(box.cls[0].item())
-                        detected_class_name = yolo_model.names[class_id]
-                        break
-            
-            if pose_detected:
-                break
-
-        # Variabel untuk feedback MediaPipe
-        mediapipe_feedback_text = "Posisi Tidak Terdeteksi"
-        mediapipe_feedback_detail = ""
-        mediapipe_feedback_color = (0, 0, 255)  # Merah untuk default
-
-        # Jika pose terdeteksi oleh YOLO, lanjutkan dengan MediaPipe
-        if pose_detected:
-            # Konversi frame ke RGB untuk deteksi pose MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose.process(rgb_frame)
-
-            if results.pose_landmarks:
-                landmarks = results.pose_landmarks.landmark
-                
-                # Klasifikasi gerakan berdasarkan gerakan yang dipilih
-                if selected_pose:
-                    is_correct, feedback = classify_pose(landmarks, selected_pose)
-                    
-                    if is_correct:
-                        mediapipe_feedback_text = feedback.get("message", "BENAR!")
-                        mediapipe_feedback_color = (0, 255, 0)  # Hijau
-                    else:
-                        mediapipe_feedback_text = feedback.get("message", "SALAH!")
-                        mediapipe_feedback_detail = feedback.get("detail", "")
-                    
-                    # Simpan ke database setiap interval tertentu
-                    current_time = time.time()
-                    if current_time - last_save_time > save_interval:
-                        save_pose_to_db(selected_pose, is_correct, mediapipe_feedback_detail)
-                        last_save_time = current_time
-
-                # Menggambar kerangka pose MediaPipe
-                mp_drawing.draw_landmarks(
-                    frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                    mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
-                    mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
-                )
-
-                # VISUALISASI DENGAN POSISI TEKS YANG TERPISAH JAUH
-                h, w, c = frame.shape
-                
-                # Membuat latar belakang semi-transparan untuk teks
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (0, 0), (w, 120), (0, 0, 0), -1)  # Latar belakang hitam untuk header
-                alpha = 0.7  # Transparansi
-                frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-                
-                # 1. Menampilkan jenis pose di KIRI ATAS dengan jarak yang cukup
-                pose_text = f"Target: {selected_pose}"
-                cv2.putText(frame, pose_text, (20, 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                
-                # 2. Menampilkan pose terdeteksi YOLO di KANAN ATAS dengan jarak yang cukup
-                detected_text = f"YOLO: {detected_class_name} ({yolo_confidence:.2f})"
-                text_size = cv2.getTextSize(detected_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-                # Hitung posisi x agar text ada di sebelah kanan dengan jarak aman
-                detected_x = w - text_size[0] - 30
-                cv2.putText(frame, detected_text, (detected_x, 30), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                
-                # 3. Menampilkan feedback MediaPipe di bawah target pose
-                cv2.putText(frame, f"MediaPipe: {mediapipe_feedback_text}", (20, 60), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, mediapipe_feedback_color, 2)
-                
-                # 4. Menampilkan detail feedback jika ada
-                if mediapipe_feedback_detail:
-                    cv2.putText(frame, mediapipe_feedback_detail, (20, 90), 
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, mediapipe_feedback_color, 2)
-                
-                # 5. Menggambar bounding box hijau dari YOLO dengan label
-                box_color = (0, 255, 0)  # Hijau
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), 
-                             (pose_bbox[2], pose_bbox[3]), box_color, 2)
-                
-                # Menampilkan label di atas bounding box
-                label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
-                label_size = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
-                             (pose_bbox[0] + label_size[0], pose_bbox[1]), box_color, -1)
-                cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                
-            else:
-                # MediaPipe tidak bisa mendeteksi pose meskipun YOLO menemukan pose
-                h, w, c = frame.shape
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (0, 0), (w, 90), (0, 0, 0), -1)
-                alpha = 0.7
-                frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-                
-                cv2.putText(frame, f"Target: {selected_pose}", (20, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                
-                detected_text = f"YOLO: {detected_class_name} ({yolo_confidence:.2f})"
-                text_size = cv2.getTextSize(detected_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-                detected_x = w - text_size[0] - 30
-                cv2.putText(frame, detected_text, (detected_x, 30), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                
-                cv2.putText(frame, "MediaPipe: Pose tidak terdeteksi", (20, 60), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                
-                # Tetap tampilkan bounding box YOLO
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), (pose_bbox[2], pose_bbox[3]), (255, 0, 0), 2)
-                
-                # Label untuk YOLO detection
-                label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
-                label_size = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
-                             (pose_bbox[0] + label_size[0], pose_bbox[1]), (255, 0, 0), -1)
-                cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         else:
-            # YOLO tidak mendeteksi pose
+            # MediaPipe tidak bisa mendeteksi pose meskipun YOLO menemukan pose
             h, w, c = frame.shape
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (0, 0), (w, 60), (0, 0, 0), -1)
-            alpha = 0.7
-            frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-            
+            overlay_renderer.darken_header(frame, 90, alpha=0.7)
+        
             cv2.putText(frame, f"Target: {selected_pose}", (20, 30), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-            cv2.putText(frame, "Tidak ada pose terdeteksi", (20, 50), 
+        
+            detected_text = f"YOLO: {detected_class_name} ({yolo_confidence:.2f})"
+            text_size = overlay_renderer.text_size(detected_text, 0.8, 2)
+            detected_x = w - text_size[0] - 30
+            cv2.putText(frame, detected_text, (detected_x, 30), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        
+            cv2.putText(frame, "MediaPipe: Pose tidak terdeteksi", (20, 60), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        
+            # Tetap tampilkan bounding box YOLO
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), (pose_bbox[2], pose_bbox[3]), (255, 0, 0), 2)
+        
+            # Label untuk YOLO detection
+            label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
+            label_size = overlay_renderer.text_size(label_text, 0.6, 2)
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
+                         (pose_bbox[0] + label_size[0], pose_bbox[1]), (255, 0, 0), -1)
+            cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    else:
+        # YOLO tidak mendeteksi pose
+        overlay_renderer.darken_header(frame, 60, alpha=0.7)
+    
+        cv2.putText(frame, f"Target: {selected_pose}", (20, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        cv2.putText(frame, "Tidak ada pose terdeteksi", (20, 50), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
-        # Encode frame ke format JPEG
-        _, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+    # Encode JPEG dilakukan oleh StreamEncoder milik penonton (lihat generate_frames)
+    return frame
 
-    cap.release()
+def generate_frames(selected_pose=None, capture_mode=CAPTURE_LATEST, encoder=None):
+    # Capture, inferensi, dan render/encode berjalan di thread terpisah;
+    # semua penonton sumber yang sama berbagi tahap capture + inferensi.
+    # Mode latest: kamera dikuras terus, inferensi selalu memakai frame terbaru
+    # sehingga kerangka tidak tertinggal dari gerakan asli.
+    # Penonton pose yang sama juga berbagi render + encode JPEG (per tingkat kualitas)
+    state = {'last_save_time': 0}
+    return capture_hub.stream(0, detect_pose,
+                              lambda packet: render_frame(packet, selected_pose, state),
+                              capture_mode, encoder or StreamEncoder(),
+                              share_key=selected_pose)
 
 @app.route('/')
 def index():
@@ -542,13 +285,52 @@ def pose_page(pose):
 
 @app.route('/video_feed/<string:pose>')
 def video_feed(pose):
-    return Response(generate_frames(selected_pose=pose), 
+    # Pengaturan stream per penonton: ?quality=10-95&scale=0.1-1&fps=&adaptive=0|1&subsampling=444|422|420
+    try:
+        encoder = StreamEncoder(**parse_stream_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(generate_frames(selected_pose=pose, encoder=encoder),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/api/pipeline_stats')
+def api_pipeline_stats():
+    """
+    Kedalaman antrean tiap tahap pipeline (capture, inferensi, render/encode, database)
+    """
+    stats = capture_hub.stats()
+    stats['db_pool'] = db_pool.stats()
+    stats['db_writer'] = db_writer.stats()
+    stats['yolo_batcher'] = yolo_batcher.stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Histogram waktu per tahap dan counter frame dalam format teks Prometheus
+    """
+    return Response(pipeline_metrics.REGISTRY.render(), content_type=pipeline_metrics.CONTENT_TYPE)
+
 @app.route('/history')
 def history():
-    poses = fetch_pose_history()
-    return render_template('history.html', poses=poses)
+    # Halaman berikutnya: /history?cursor=<next_cursor>, filter: pose, date_from, date_to, is_correct
+    try:
+        query = parse_history_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    poses, next_cursor = fetch_pose_history(**query)
+    return render_template('history.html', poses=poses, next_cursor=next_cursor, filters=request.args)
+
+@app.route('/api/history')
+def api_history():
+    """
+    Riwayat dalam JSON yang dikirim bertahap per potongan kecil (limit sampai 10000 baris)
+    """
+    try:
+        query = parse_history_args(request.args, max_limit=MAX_STREAM_ROWS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(stream_history_json(get_db_connection, "*", **query), mimetype='application/json')
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
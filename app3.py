@@ -4,29 +4,50 @@ import deteksi_pose as mp
 import pymysql
 import numpy as np
 import math
+import os
 import time
+from datetime import datetime, timedelta
 import mediapipe as mp
+from capture_hub import CaptureHub, CAPTURE_SEQUENTIAL
+from db_pool import ConnectionPool
+from db_writer import BatchWriter
+from landmark_recorder import LandmarkRecorder
+import metrics as pipeline_metrics
+from pose_history import (
+    DEFAULT_PAGE_SIZE, MAX_STREAM_ROWS, fetch_history_page, parse_history_args, stream_history_json
+)
+from pose_math import landmarks_to_array
+from pose_pool import EstimatorPool
+from pose_rollup import dashboard_rollups, fetch_rollup, update_rollups
+from pose_rules import classify_pose_case
+from roi_pose import RoiPoseEstimator
+from rolling_metrics import RollingMetrics
+from session_registry import SessionRegistry, new_session_id, valid_session_id
+from stream_encoder import StreamEncoder, parse_stream_args
 
 app = Flask(__name__)
 
 # Inisialisasi MediaPipe pose
 mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)
+# Satu instance Pose per stream, dibatasi dan didaur ulang oleh pool.
+# Inferensi dijalankan di crop sekitar orang (ROI), bukan di seluruh frame.
+pose_pool = EstimatorPool(lambda: RoiPoseEstimator(mp_pose.Pose(min_detection_confidence=0.7, min_tracking_confidence=0.7)))
 mp_drawing = mp.solutions.drawing_utils
 
-# Global variables untuk tracking akurasi
-accuracy_metrics = {
-    'total_frames': 0,
-    'detected_frames': 0,
-    'correct_poses': 0,
-    'incorrect_poses': 0,
-    'confidence_scores': [],
-    'visibility_scores': [],
-    'session_start_time': time.time()
-}
+# Satu pembaca kamera bersama untuk semua penonton /video_feed
+capture_hub = CaptureHub(estimator_pool=pose_pool)
+
+# Metrik akurasi: ring buffer NumPy berukuran tetap, statistik di-cache per update
+# accuracy_metrics = agregat semua sesi, sessions = metrik per sesi latihan
+accuracy_metrics = RollingMetrics(window=100)
+sessions = SessionRegistry(lambda: RollingMetrics(window=100), idle_timeout=300.0, max_sessions=500)
+
+# Rekaman landmark per frame (/video_feed/<pose>?session=...&record=1), dibaca ulang
+# dengan landmark_recorder.LandmarkRecording untuk menilai sesi lama dengan aturan baru
+RECORDINGS_DIR = 'recordings'
 
 # Konfigurasi Database
-def get_db_connection():
+def connect_mysql():
     return pymysql.connect(
         host='localhost',
         user='root',
@@ -35,49 +56,57 @@ def get_db_connection():
         cursorclass=pymysql.cursors.DictCursor
     )
 
-def save_pose_to_db(pose_name, is_correct, feedback, accuracy_data=None):
-    try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = """INSERT INTO detected_poses 
-                      (pose_name, is_correct, feedback, detection_confidence, 
-                       avg_visibility, frame_accuracy, timestamp) 
-                      VALUES (%s, %s, %s, %s, %s, %s, NOW())"""
-            
-            if accuracy_data:
-                cursor.execute(query, (
-                    pose_name, 
-                    is_correct, 
-                    feedback,
-                    accuracy_data.get('detection_confidence', 0.0),
-                    accuracy_data.get('avg_visibility', 0.0),
-                    accuracy_data.get('frame_accuracy', 0.0)
-                ))
-            else:
-                cursor.execute(query, (pose_name, is_correct, feedback, 0.0, 0.0, 0.0))
-            
-            connection.commit()
-        connection.close()
-    except Exception as e:
-        print(f"Error menyimpan ke database: {e}")
+# Pool koneksi: handshake MySQL hanya dibayar saat membuat koneksi baru.
+# Factory bisa diganti, mis. db_sqlite.connect_sqlite untuk menjalankan tanpa server MySQL.
+db_pool = ConnectionPool(connect_mysql, min_size=1, max_size=8)
 
-def fetch_pose_history():
+def get_db_connection():
+    # close() pada koneksi ini mengembalikannya ke pool
+    return db_pool.get()
+
+# Penulis database di background: insert dikumpulkan lalu dikirim per batch
+db_writer = BatchWriter(
+    get_db_connection,
+    """INSERT INTO detected_poses 
+       (pose_name, is_correct, feedback, detection_confidence, 
+        avg_visibility, frame_accuracy, timestamp) 
+       VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+    # Spill dan dead-letter per app: query dan jumlah kolom tiap app berbeda
+    spill_path='detected_poses_spill_app3.jsonl',
+    dead_letter_path='detected_poses_dead_app3.jsonl',
+    # Rollup per pose/jam/hari diperbarui di transaksi yang sama dengan insert
+    after_write=update_rollups
+)
+
+def save_pose_to_db(pose_name, is_correct, feedback, accuracy_data=None):
+    # Tidak pernah menunggu database, baris masuk antrean db_writer.
+    # Waktu diambil saat deteksi (bukan NOW() saat batch ditulis).
+    accuracy_data = accuracy_data or {}
+    db_writer.submit((
+        pose_name,
+        is_correct,
+        feedback,
+        accuracy_data.get('detection_confidence', 0.0),
+        accuracy_data.get('avg_visibility', 0.0),
+        accuracy_data.get('frame_accuracy', 0.0),
+        datetime.now()
+    ))
+
+# Kolom riwayat beserta persentase akurasi
+HISTORY_COLUMNS = """*, 
+                     ROUND(detection_confidence * 100, 2) as confidence_percent,
+                     ROUND(avg_visibility * 100, 2) as visibility_percent,
+                     ROUND(frame_accuracy * 100, 2) as accuracy_percent"""
+
+def fetch_pose_history(cursor=None, limit=DEFAULT_PAGE_SIZE, **filters):
+    """
+    Satu halaman riwayat (keyset pagination) -> (poses, next_cursor)
+    """
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = """SELECT *, 
-                      ROUND(detection_confidence * 100, 2) as confidence_percent,
-                      ROUND(avg_visibility * 100, 2) as visibility_percent,
-                      ROUND(frame_accuracy * 100, 2) as accuracy_percent
-                      FROM detected_poses 
-                      ORDER BY id DESC LIMIT 50"""
-            cursor.execute(query)
-            poses = cursor.fetchall()
-        connection.close()
-        return poses
+        return fetch_history_page(get_db_connection, HISTORY_COLUMNS, cursor, limit, **filters)
     except Exception as e:
         print(f"Error mengambil data dari database: {e}")
-        return []
+        return [], None
 
 def calculate_pose_accuracy(landmarks, results):
     """
@@ -155,317 +184,150 @@ def update_global_accuracy(is_detected, is_correct, accuracy_data):
     """
     Update global accuracy metrics
     """
-    global accuracy_metrics
-    
-    accuracy_metrics['total_frames'] += 1
-    
-    if is_detected:
-        accuracy_metrics['detected_frames'] += 1
-        
-        if is_correct:
-            accuracy_metrics['correct_poses'] += 1
-        else:
-            accuracy_metrics['incorrect_poses'] += 1
-        
-        # Store accuracy scores for analysis
-        if accuracy_data:
-            accuracy_metrics['confidence_scores'].append(accuracy_data['detection_confidence'])
-            accuracy_metrics['visibility_scores'].append(accuracy_data['avg_visibility'])
-            
-            # Keep only last 100 scores to prevent memory issues
-            if len(accuracy_metrics['confidence_scores']) > 100:
-                accuracy_metrics['confidence_scores'] = accuracy_metrics['confidence_scores'][-100:]
-            if len(accuracy_metrics['visibility_scores']) > 100:
-                accuracy_metrics['visibility_scores'] = accuracy_metrics['visibility_scores'][-100:]
+    accuracy_metrics.update(is_detected, is_correct, accuracy_data)
 
 def get_accuracy_stats():
     """
-    Menghitung statistik akurasi real-time
+    Statistik akurasi real-time (agregat yang sudah di-cache, tidak dihitung ulang)
     """
-    global accuracy_metrics
-    
-    total_frames = accuracy_metrics['total_frames']
-    detected_frames = accuracy_metrics['detected_frames']
-    correct_poses = accuracy_metrics['correct_poses']
-    
-    stats = {
-        'detection_rate': (detected_frames / total_frames * 100) if total_frames > 0 else 0,
-        'accuracy_rate': (correct_poses / detected_frames * 100) if detected_frames > 0 else 0,
-        'avg_confidence': np.mean(accuracy_metrics['confidence_scores']) * 100 if accuracy_metrics['confidence_scores'] else 0,
-        'avg_visibility': np.mean(accuracy_metrics['visibility_scores']) * 100 if accuracy_metrics['visibility_scores'] else 0,
-        'total_frames': total_frames,
-        'detected_frames': detected_frames,
-        'correct_poses': correct_poses,
-        'session_duration': time.time() - accuracy_metrics['session_start_time']
-    }
-    
-    return stats
-
-# Fungsi untuk menghitung sudut antara tiga titik
-def calculate_angle(a, b, c):
-    a = np.array([a.x, a.y])
-    b = np.array([b.x, b.y])
-    c = np.array([c.x, c.y])
-    
-    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-    
-    return angle
+    return accuracy_metrics.stats()
 
 # Fungsi untuk mendeteksi visibilitas landmark
 def is_visible(landmark):
     return landmark.visibility > 0.65
 
-# Fungsi untuk mengklasifikasikan gerakan berdasarkan pose tertentu
-def classify_pose(landmarks, selected_pose):
-    feedback = {}
-    is_correct = False
+def detect_pose(frame, pose):
+    # Flip untuk tampilan mirror
+    frame = cv2.flip(frame, 1)
     
-    # Otot Tangan
-    if selected_pose == "Arm Press":
-        # Periksa sudut lengan
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        right_elbow = landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-        right_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value]
-        
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        left_elbow = landmarks[mp_pose.PoseLandmark.LEFT_ELBOW.value]
-        left_wrist = landmarks[mp_pose.PoseLandmark.LEFT_WRIST.value]
-        
-        # Hitung sudut siku
-        right_elbow_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
-        left_elbow_angle = calculate_angle(left_shoulder, left_elbow, left_wrist)
-        
-        # Aturan untuk Arm Press: siku harus ditekuk dengan sudut sekitar 90 derajat
-        if 80 <= right_elbow_angle <= 100 and 80 <= left_elbow_angle <= 100:
-            is_correct = True
-            feedback["message"] = "Posisi Arm Press sudah benar!"
-        else:
-            feedback["message"] = "Posisi Arm Press salah!"
-            if right_elbow_angle < 80 or left_elbow_angle < 80:
-                feedback["detail"] = "Tekuk siku lebih dalam (sudut terlalu lebar)"
-            elif right_elbow_angle > 100 or left_elbow_angle > 100:
-                feedback["detail"] = "Buka siku lebih lebar (sudut terlalu sempit)"
-    
-    elif selected_pose == "Push up":
-        # Landmark untuk push up
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        right_elbow = landmarks[mp_pose.PoseLandmark.RIGHT_ELBOW.value]
-        right_wrist = landmarks[mp_pose.PoseLandmark.RIGHT_WRIST.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-        right_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        
-        # Hitung sudut siku dan tubuh
-        elbow_angle = calculate_angle(right_shoulder, right_elbow, right_wrist)
-        body_angle = calculate_angle(right_shoulder, right_hip, right_knee)
-        
-        # Aturan push up: siku ~90 derajat dan tubuh lurus
-        if 70 <= elbow_angle <= 110:
-            if 160 <= body_angle <= 190:
-                is_correct = True
-                feedback["message"] = "Posisi Push Up sudah benar!"
-            else:
-                feedback["message"] = "Posisi tubuh Push Up salah!"
-                feedback["detail"] = "Jaga tubuh tetap lurus, jangan menekuk pinggul"
-        else:
-            feedback["message"] = "Posisi siku Push Up salah!"
-            if elbow_angle < 70:
-                feedback["detail"] = "Terlalu rendah, naikan posisi tubuh"
-            else:
-                feedback["detail"] = "Terlalu tinggi, turunkan posisi tubuh"
-    
-    elif selected_pose == "squad":
-        # Landmark untuk squat
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value]
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER.value]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP.value]
-        right_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        left_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE.value]
-        right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE.value]
-        left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE.value]
-        
-        # Hitung sudut lutut
-        right_knee_angle = calculate_angle(right_hip, right_knee, right_ankle)
-        left_knee_angle = calculate_angle(left_hip, left_knee, left_ankle)
-        avg_knee_angle = (right_knee_angle + left_knee_angle) / 2
-        
-        # Hitung sudut pinggul
-        right_hip_angle = calculate_angle(right_shoulder, right_hip, right_knee)
-        left_hip_angle = calculate_angle(left_shoulder, left_hip, left_knee)
-        
-        # Hitung sudut punggung terhadap vertikal
-        back_angle = calculate_angle(
-            landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER.value],
-            landmarks[mp_pose.PoseLandmark.RIGHT_HIP.value],
-            landmarks[mp_pose.PoseLandmark.RIGHT_KNEE.value]
-        )
-        
-        # PENDEKATAN FINAL YANG SEDERHANA DAN AKURAT
-        
-        # Indikator posisi lutut yang tidak aman
-        knee_forward_threshold = 0.3
-        right_knee_forward = right_knee.x > right_ankle.x + knee_forward_threshold
-        left_knee_forward = left_knee.x > left_ankle.x + knee_forward_threshold
-        knee_position_unsafe = right_knee_forward and left_knee_forward
-        
-        # Deteksi posisi berdiri tegak (hampir lurus, sudut > 170)
-        standing_position = avg_knee_angle > 170
-        
-        # Deteksi posisi persiapan squat (posisi sebelum turun, sudut 130-170)
-        preparation_position = 130 <= avg_knee_angle <= 170
-        
-        # Deteksi squat aktif (sudut 80-130)
-        active_squat = 80 <= avg_knee_angle < 130
-        
-        # Deteksi squat terlalu dalam (sudut < 60)
-        too_deep_squat = avg_knee_angle < 60
-        
-        # Deteksi squat dangkal yang benar-benar kurang dalam (60-80)
-        insufficient_squat = 60 <= avg_knee_angle < 80
-        
-        # LOGIKA EVALUASI YANG SANGAT AKURAT
-        
-        # Posisi lutut tidak aman selalu salah
-        if knee_position_unsafe:
-            is_correct = False
-            feedback["message"] = "Posisi Squat perlu perbaikan"
-            feedback["detail"] = "Lutut terlalu jauh ke depan, geser berat badan ke tumit"
-        
-        # Squat terlalu dalam dianggap salah
-        elif too_deep_squat:
-            is_correct = False
-            feedback["message"] = "Posisi Squat perlu perbaikan"
-            feedback["detail"] = "Terlalu dalam, naikan sedikit posisi"
-        
-        # Squat yang benar-benar kurang dalam dianggap salah
-        elif insufficient_squat:
-            is_correct = False
-            feedback["message"] = "Posisi Squat perlu perbaikan"
-            feedback["detail"] = "Kurang dalam, turunkan tubuh lebih rendah"
-        
-        # SEMUA POSISI LAINNYA DIANGGAP BENAR
-        # Termasuk: posisi berdiri, posisi persiapan, dan squat aktif
-        else:
-            is_correct = True
-            feedback["message"] = "Posisi Squat sudah benar!"
-            
-            # Tambahkan detail fase squat
-            if standing_position:
-                feedback["detail"] = "Posisi berdiri tegak"
-            elif preparation_position:
-                feedback["detail"] = "Posisi persiapan squat"
-            elif active_squat:
-                feedback["detail"] = "Posisi squat aktif"
-        
-    return is_correct, feedback
+    # Deteksi pose di ROI dari sebaran landmark frame sebelumnya (konversi RGB hanya pada crop)
+    return frame, pose.detect(frame)
 
-def generate_frames(selected_pose=None):
-    cap = cv2.VideoCapture("lexxexsis.mp4")  # Gunakan webcam, ganti dengan file video jika perlu
-    last_save_time = 0
+def render_frame(packet, selected_pose, state):
     save_interval = 3  # Simpan ke database setiap 3 detik
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # Frame dipakai bersama, salin sebelum digambari
+    frame = packet.frame.copy()
+    results = packet.results
 
-        # Flip untuk tampilan mirror
-        frame = cv2.flip(frame, 1)
-        
-        # Konversi frame ke RGB untuk deteksi pose
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-
-        # Variabel untuk feedback dan bounding box
-        feedback_text = "Posisi Tidak Terdeteksi"
-        feedback_detail = ""
-        feedback_color = (0, 0, 255)  # Merah untuk default
-        is_detected = False
-        is_correct = False
-        accuracy_data = None
-
-        if results.pose_landmarks:
-            is_detected = True
-            landmarks = results.pose_landmarks.landmark
-            
-            # Hitung akurasi deteksi
-            accuracy_data = calculate_pose_accuracy(landmarks, results)
-            
-            # Klasifikasi gerakan berdasarkan gerakan yang dipilih
-            if selected_pose:
-                is_correct, feedback = classify_pose(landmarks, selected_pose)
-                
-                if is_correct:
-                    feedback_text = feedback.get("message", "BENAR!")
-                    feedback_color = (0, 255, 0)  # Hijau
-                else:
-                    feedback_text = feedback.get("message", "SALAH!")
-                    feedback_detail = feedback.get("detail", "")
-                
-                # Simpan ke database setiap interval tertentu
-                current_time = time.time()
-                if current_time - last_save_time > save_interval:
-                    save_pose_to_db(selected_pose, is_correct, feedback_detail, accuracy_data)
-                    last_save_time = current_time
-
-            # Menggambar kerangka pose
-            mp_drawing.draw_landmarks(
-                frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
-                mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
-            )
-
-            # Bounding box sekitar tubuh
-            h, w, _ = frame.shape
-            x_min = int(min([lm.x for lm in landmarks]) * w)
-            y_min = int(min([lm.y for lm in landmarks]) * h)
-            x_max = int(max([lm.x for lm in landmarks]) * w)
-            y_max = int(max([lm.y for lm in landmarks]) * h)
-
-            cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), feedback_color, 2)
-            
-            # Tambahkan feedback text di atas frame
-            cv2.putText(frame, feedback_text, (x_min, y_min - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, feedback_color, 2)
-            
-            # Tambahkan detail feedback jika ada
-            if feedback_detail:
-                cv2.putText(frame, feedback_detail, (x_min, y_min - 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, feedback_color, 2)
-
-        # Update global accuracy metrics
-        update_global_accuracy(is_detected, is_correct, accuracy_data)
-        
-        # Tambahkan informasi akurasi real-time di frame
-        stats = get_accuracy_stats()
+    # Variabel untuk feedback dan bounding box
+    feedback_text = "Posisi Tidak Terdeteksi"
+    feedback_detail = ""
+    feedback_color = (0, 0, 255)  # Merah untuk default
+    is_detected = False
+    is_correct = False
+    accuracy_data = None
+    points = None
+    correct_code = -1
+    case = -1
+
+    if results.pose_landmarks:
+        is_detected = True
+        landmarks = results.pose_landmarks.landmark
+        # Array 33 titik hanya dibutuhkan untuk rekaman; klasifikasi membaca titik aturan saja
+        if state['record']:
+            points = landmarks_to_array(landmarks)
+    
+        # Hitung akurasi deteksi
+        accuracy_data = calculate_pose_accuracy(landmarks, results)
+    
+        # Klasifikasi gerakan berdasarkan gerakan yang dipilih
+        if selected_pose:
+            is_correct, feedback, case = classify_pose_case(landmarks, selected_pose)
+            correct_code = int(is_correct)
         
-        # Tampilkan statistik akurasi di sudut kiri atas
-        accuracy_text = [
-            f"Detection: {stats['detection_rate']:.1f}%",
-            f"Accuracy: {stats['accuracy_rate']:.1f}%",
-            f"Confidence: {stats['avg_confidence']:.1f}%",
-            f"Visibility: {stats['avg_visibility']:.1f}%"
-        ]
+            if is_correct:
+                feedback_text = feedback.get("message", "BENAR!")
+                feedback_color = (0, 255, 0)  # Hijau
+            else:
+                feedback_text = feedback.get("message", "SALAH!")
+                feedback_detail = feedback.get("detail", "")
         
-        for i, text in enumerate(accuracy_text):
-            cv2.putText(frame, text, (10, 60 + i * 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            cv2.putText(frame, text, (10, 60 + i * 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
-
-        # Tambahkan informasi gerakan yang sedang dilakukan
-        if selected_pose:
-            cv2.putText(frame, f"Gerakan: {selected_pose}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+            # Simpan ke database setiap interval tertentu
+            current_time = time.time()
+            if current_time - state['last_save_time'] > save_interval:
+                save_pose_to_db(selected_pose, is_correct, feedback_detail, accuracy_data)
+                state['last_save_time'] = current_time
+
+        # Menggambar kerangka pose
+        mp_drawing.draw_landmarks(
+            frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
+            mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
+            mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
+        )
 
-        # Encode frame ke format JPEG
-        _, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
+        # Bounding box sekitar tubuh
+        h, w, _ = frame.shape
+        x_min = int(min([lm.x for lm in landmarks]) * w)
+        y_min = int(min([lm.y for lm in landmarks]) * h)
+        x_max = int(max([lm.x for lm in landmarks]) * w)
+        y_max = int(max([lm.y for lm in landmarks]) * h)
 
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+        cv2.rectangle(frame, (x_min, y_min), (x_max, y_max), feedback_color, 2)
+    
+        # Tambahkan feedback text di atas frame
+        cv2.putText(frame, feedback_text, (x_min, y_min - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.8, feedback_color, 2)
+    
+        # Tambahkan detail feedback jika ada
+        if feedback_detail:
+            cv2.putText(frame, feedback_detail, (x_min, y_min - 40), cv2.FONT_HERSHEY_SIMPLEX, 0.6, feedback_color, 2)
+
+    # Update metrik sesi ini (dibuat ulang jika sempat kedaluwarsa) dan agregat global
+    session_metrics = sessions.get(state['session_id'])
+    session_metrics.update(is_detected, is_correct, accuracy_data)
+    update_global_accuracy(is_detected, is_correct, accuracy_data)
+
+    # Rekam landmark mentah + kode feedback setiap frame (jika diminta).
+    # Direktori dibuat saat frame pertama dirender, jadi hanya Broadcast yang
+    # benar-benar berjalan yang membuat rekaman.
+    if state['record']:
+        if state.get('recorder') is None:
+            # Satu direktori per Broadcast: recordings/<session_id>-<waktu mulai>
+            directory = os.path.join(RECORDINGS_DIR, f"{state['session_id']}-{int(time.time())}")
+            state['recorder'] = LandmarkRecorder(directory, pose=selected_pose)
+        state['recorder'].append(packet.timestamp, points, correct_code, case, seq=packet.seq)
+
+    # Tambahkan informasi akurasi real-time sesi ini di frame
+    stats = session_metrics.stats()
+
+    # Tampilkan statistik akurasi di sudut kiri atas
+    accuracy_text = [
+        f"Detection: {stats['detection_rate']:.1f}%",
+        f"Accuracy: {stats['accuracy_rate']:.1f}%",
+        f"Confidence: {stats['avg_confidence']:.1f}%",
+        f"Visibility: {stats['avg_visibility']:.1f}%"
+    ]
 
-    cap.release()
+    for i, text in enumerate(accuracy_text):
+        cv2.putText(frame, text, (10, 60 + i * 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        cv2.putText(frame, text, (10, 60 + i * 25), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 1)
+
+    # Tambahkan informasi gerakan yang sedang dilakukan
+    if selected_pose:
+        cv2.putText(frame, f"Gerakan: {selected_pose}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+
+    # Encode JPEG dilakukan oleh StreamEncoder milik penonton (lihat generate_frames)
+    return frame
+
+def generate_frames(selected_pose=None, capture_mode=CAPTURE_SEQUENTIAL, session_id=None, encoder=None, record=False):
+    # Capture, inferensi, dan render/encode berjalan di thread terpisah;
+    # semua penonton sumber yang sama berbagi tahap capture + inferensi
+    # Overlay berisi statistik sesi, jadi render + encode JPEG hanya dibagi
+    # antar penonton dengan pose dan sesi yang sama
+    # Rekaman ikut Broadcast: penonton record=1 dan tanpa record memakai Broadcast
+    # terpisah, semua penonton record=1 di sesi yang sama berbagi satu rekaman
+    state = {'last_save_time': 0, 'session_id': session_id or new_session_id(), 'record': record}
+    return capture_hub.stream("lexxexsis.mp4", detect_pose,
+                              lambda packet: render_frame(packet, selected_pose, state),
+                              capture_mode, encoder or StreamEncoder(),
+                              share_key=(selected_pose, state['session_id'], record),
+                              on_close=lambda: close_recorder(state))
+
+def close_recorder(state):
+    # Tulis segmen terakhir dan lepas buffer saat Broadcast berhenti
+    recorder = state.pop('recorder', None)
+    if recorder is not None:
+        recorder.close()
 
 @app.route('/')
 def index():
@@ -487,11 +349,32 @@ def category_page(category):
 
 @app.route('/pose/<string:pose>')
 def pose_page(pose):
-    return render_template('video_feed.html', pose_name=pose)
+    # Setiap halaman latihan mendapat sesi sendiri: /video_feed/<pose>?session=<session_id>
+    return render_template('video_feed.html', pose_name=pose, session_id=new_session_id())
 
 @app.route('/video_feed/<string:pose>')
 def video_feed(pose):
-    return Response(generate_frames(selected_pose=pose), mimetype='multipart/x-mixed-replace; boundary=frame')
+    session_id = request.args.get('session')
+    if session_id is not None and not valid_session_id(session_id):
+        return jsonify({'error': 'session id tidak valid'}), 400
+    # Pengaturan stream per penonton: ?quality=10-95&scale=0.1-1&fps=&adaptive=0|1&subsampling=444|422|420
+    try:
+        encoder = StreamEncoder(**parse_stream_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    record = request.args.get('record') in ('1', 'true')
+    return Response(generate_frames(selected_pose=pose, session_id=session_id, encoder=encoder, record=record),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/api/pipeline_stats')
+def api_pipeline_stats():
+    """
+    Kedalaman antrean tiap tahap pipeline (capture, inferensi, render/encode, database)
+    """
+    stats = capture_hub.stats()
+    stats['db_pool'] = db_pool.stats()
+    stats['db_writer'] = db_writer.stats()
+    return jsonify(stats)
 
 @app.route('/api/accuracy_stats')
 def api_accuracy_stats():
@@ -506,22 +389,70 @@ def api_reset_accuracy():
     """
     API endpoint untuk reset statistik akurasi
     """
-    global accuracy_metrics
-    accuracy_metrics = {
-        'total_frames': 0,
-        'detected_frames': 0,
-        'correct_poses': 0,
-        'incorrect_poses': 0,
-        'confidence_scores': [],
-        'visibility_scores': [],
-        'session_start_time': time.time()
-    }
+    accuracy_metrics.reset()
     return jsonify({"status": "reset", "message": "Accuracy metrics reset successfully"})
 
+@app.route('/api/sessions')
+def api_sessions():
+    """
+    Daftar sesi aktif beserta ringkasan statistiknya
+    """
+    return jsonify({
+        'registry': sessions.stats(),
+        'sessions': [
+            {'session_id': session_id, 'idle_seconds': idle, **metrics.stats()}
+            for session_id, metrics, idle in sessions.items()
+        ]
+    })
+
+@app.route('/api/sessions/<string:session_id>/stats')
+def api_session_stats(session_id):
+    """
+    Statistik akurasi satu sesi latihan
+    """
+    metrics = sessions.peek(session_id)
+    if metrics is None:
+        return jsonify({'error': 'sesi tidak ditemukan'}), 404
+    return jsonify(metrics.stats())
+
+@app.route('/api/sessions/<string:session_id>/reset')
+def api_session_reset(session_id):
+    """
+    Reset statistik satu sesi tanpa mengganggu sesi lain
+    """
+    metrics = sessions.peek(session_id)
+    if metrics is None:
+        return jsonify({'error': 'sesi tidak ditemukan'}), 404
+    metrics.reset()
+    return jsonify({"status": "reset", "session_id": session_id})
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Histogram waktu per tahap dan counter frame dalam format teks Prometheus
+    """
+    return Response(pipeline_metrics.REGISTRY.render(), content_type=pipeline_metrics.CONTENT_TYPE)
+
 @app.route('/history')
 def history():
-    poses = fetch_pose_history()
-    return render_template('history.html', poses=poses)
+    # Halaman berikutnya: /history?cursor=<next_cursor>, filter: pose, date_from, date_to, is_correct
+    try:
+        query = parse_history_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    poses, next_cursor = fetch_pose_history(**query)
+    return render_template('history.html', poses=poses, next_cursor=next_cursor, filters=request.args)
+
+@app.route('/api/history')
+def api_history():
+    """
+    Riwayat dalam JSON yang dikirim bertahap per potongan kecil (limit sampai 10000 baris)
+    """
+    try:
+        query = parse_history_args(request.args, max_limit=MAX_STREAM_ROWS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(stream_history_json(get_db_connection, HISTORY_COLUMNS, **query), mimetype='application/json')
 
 @app.route('/accuracy_dashboard')
 def accuracy_dashboard():
@@ -529,8 +460,34 @@ def accuracy_dashboard():
     Dashboard untuk menampilkan detail statistik akurasi
     """
     stats = get_accuracy_stats()
-    recent_poses = fetch_pose_history()
-    return render_template('accuracy_dashboard.html', stats=stats, recent_poses=recent_poses)
+    recent_poses, _ = fetch_pose_history()
+    try:
+        # Agregat yang tetap ada setelah restart, dibaca dari tabel rollup
+        rollups = dashboard_rollups(get_db_connection)
+    except Exception as e:
+        print(f"Error mengambil rollup akurasi: {e}")
+        rollups = {'per_pose': [], 'per_day': [], 'per_hour': []}
+    return render_template('accuracy_dashboard.html', stats=stats, recent_poses=recent_poses, rollups=rollups)
+
+@app.route('/api/accuracy_rollup')
+def api_accuracy_rollup():
+    """
+    Agregat akurasi per jam atau per hari: ?granularity=hour|day&pose=<nama>&days=<n>
+    """
+    granularity = request.args.get('granularity', 'day')
+    if granularity not in ('hour', 'day'):
+        return jsonify({'error': 'granularity harus hour atau day'}), 400
+    try:
+        days = int(request.args.get('days', 7))
+    except ValueError:
+        return jsonify({'error': 'days harus berupa angka'}), 400
+    since = datetime.now() - timedelta(days=days)
+    try:
+        rows = fetch_rollup(get_db_connection, granularity, request.args.get('pose'), since)
+    except Exception as e:
+        print(f"Error mengambil rollup akurasi: {e}")
+        return jsonify({'error': 'database tidak tersedia'}), 503
+    return jsonify(rows)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,26 +1,48 @@
-from flask import Flask, render_template, Response
+from flask import Flask, render_template, Response, request, jsonify
 import cv2
 import mediapipe as mp
 import pymysql
 import numpy as np
 from ultralytics import YOLO
+from batch_infer import MicroBatcher
+from capture_hub import CaptureHub, CAPTURE_SEQUENTIAL
+from db_pool import ConnectionPool
+from db_writer import BatchWriter
+import metrics as pipeline_metrics
+from overlay import OverlayRenderer
+from pose_history import (
+    DEFAULT_PAGE_SIZE, MAX_STREAM_ROWS, fetch_history_page, parse_history_args, stream_history_json
+)
+from pose_pool import EstimatorPool
+from roi_pose import RoiPoseEstimator
+from stream_encoder import StreamEncoder, parse_stream_args
+from yolo_gate import GatedPoseEstimator
 
 app = Flask(__name__)
 
 # Inisialisasi MediaPipe pose
 mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(
+# Satu instance Pose per stream, dibatasi dan didaur ulang oleh pool.
+# Inferensi dijalankan di crop sekitar orang (ROI), bukan di seluruh frame,
+# dan YOLO hanya dijalankan tiap 5 frame (atau saat MediaPipe kehilangan pose).
+pose_pool = EstimatorPool(lambda: GatedPoseEstimator(run_yolo, RoiPoseEstimator(mp_pose.Pose(
     min_detection_confidence=0.5,
     min_tracking_confidence=0.5
-)
+)), interval=5))
 mp_drawing = mp.solutions.drawing_utils
 
+# Satu pembaca kamera bersama untuk semua penonton /video_feed
+capture_hub = CaptureHub(estimator_pool=pose_pool)
+
+# Header diblend di ROI saja dan ukuran label di-cache, dipakai bersama semua thread render
+overlay_renderer = OverlayRenderer()
+
 # Inisialisasi model YOLO dengan raw string
 yolo_model = YOLO(r'D:\project3\runs\detect\train\weights\best.pt')
 
 
 # Konfigurasi Database
-def get_db_connection():
+def connect_mysql():
     return pymysql.connect(
         host='localhost',
         user='root',
@@ -29,137 +51,145 @@ def get_db_connection():
         cursorclass=pymysql.cursors.DictCursor
     )
 
+# Pool koneksi: handshake MySQL hanya dibayar saat membuat koneksi baru.
+# Factory bisa diganti, mis. db_sqlite.connect_sqlite untuk menjalankan tanpa server MySQL.
+db_pool = ConnectionPool(connect_mysql, min_size=1, max_size=8)
+
+def get_db_connection():
+    # close() pada koneksi ini mengembalikannya ke pool
+    return db_pool.get()
+
+# Penulis database di background: insert dikumpulkan lalu dikirim per batch
+db_writer = BatchWriter(
+    get_db_connection,
+    "INSERT INTO detected_poses (pose_name, status) VALUES (%s, %s)",
+    # Spill dan dead-letter per app: query dan jumlah kolom tiap app berbeda
+    spill_path='detected_poses_spill_appyl.jsonl',
+    dead_letter_path='detected_poses_dead_appyl.jsonl'
+)
+
 def save_pose_to_db(pose_name, status):
-    try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = "INSERT INTO detected_poses (pose_name, status) VALUES (%s, %s)"
-            cursor.execute(query, (pose_name, status))
-            connection.commit()
-        connection.close()
-    except Exception as e:
-        print(f"Error menyimpan ke database: {e}")
+    # Tidak pernah menunggu database, baris masuk antrean db_writer
+    db_writer.submit((pose_name, status))
 
-def fetch_pose_history():
+def fetch_pose_history(cursor=None, limit=DEFAULT_PAGE_SIZE, **filters):
+    """
+    Satu halaman riwayat (keyset pagination) -> (poses, next_cursor)
+    """
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = "SELECT * FROM detected_poses ORDER BY id DESC"
-            cursor.execute(query)
-            poses = cursor.fetchall()
-        connection.close()
-        return poses
+        return fetch_history_page(get_db_connection, "*", cursor, limit, **filters)
     except Exception as e:
         print(f"Error mengambil data dari database: {e}")
-        return []
+        return [], None
 
-def generate_frames(selected_pose=None):
-    cap = cv2.VideoCapture("squad.mp4")  # Gunakan kamera webcam (0) atau file video
+def parse_yolo_result(result, confidence_threshold):
+    # Hasil YOLO satu frame -> (bounding box, confidence, nama class) atau None
+    boxes = result.boxes
+    if boxes is not None:
+        for box in boxes:
+            if box.conf[0].item() > confidence_threshold:
+                # Ambil koordinat bounding box (x1, y1, x2, y2)
+                x1, y1, x2, y2 = box.xyxy[0].tolist()
+                pose_bbox = [int(coord) for coord in [x1, y1, x2, y2]]
+                yolo_confidence = box.conf[0].item()
+
+                # Ambil nama class
+                class_id = int(box.cls[0].item())
+                detected_class_name = yolo_model.names[class_id]
+                return pose_bbox, yolo_confidence, detected_class_name
+    return None
+
+def run_yolo_batch(frames):
     confidence_threshold = 0.5  # Ambang batas kepercayaan untuk deteksi YOLO
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # Satu panggilan YOLO untuk frame dari beberapa stream sekaligus, satu hasil per frame
+    yolo_results = yolo_model(frames, conf=confidence_threshold)
+    return [parse_yolo_result(result, confidence_threshold) for result in yolo_results]
+
+# Frame dari semua stream dikumpulkan paling lama 5 ms (maks. 8 frame) lalu diproses satu batch
+yolo_batcher = MicroBatcher(run_yolo_batch, max_batch=8, max_wait=0.005, name='yolo-batcher')
 
-        # Langkah 1: Deteksi pose menggunakan YOLO
-        yolo_results = yolo_model(frame, conf=confidence_threshold)
+def run_yolo(frame):
+    # Dipanggil dari thread inferensi tiap stream, menunggu hasil batch yang memuat frame ini
+    return yolo_batcher.submit(frame)
+
+def detect_pose(frame, pose):
+    # Langkah 1: YOLO (hanya tiap beberapa frame, di antaranya box diteruskan tracker)
+    # Langkah 2: MediaPipe di sekitar box tersebut; landmark dipetakan kembali ke frame penuh
+    # Hasil: (pose_detected, pose_bbox, yolo_confidence, detected_class_name, results)
+    return frame, pose.process(frame)
+
+def render_frame(packet, selected_pose, state):
+    # Frame dipakai bersama, salin sebelum digambari
+    frame = packet.frame.copy()
+    pose_detected, pose_bbox, yolo_confidence, detected_class_name, results = packet.results
+
+    # Jika pose terdeteksi oleh YOLO, tampilkan hasil MediaPipe
+    if pose_detected:
+        if results.pose_landmarks:
+            # VISUALISASI DENGAN POSISI TEKS YANG TERPISAH JAUH
+            h, w, c = frame.shape
+        
+            # Membuat latar belakang semi-transparan untuk teks
+            overlay_renderer.darken_header(frame, 60, alpha=0.7)
         
-        # Periksa apakah ada pose terdeteksi
-        pose_detected = False
-        pose_bbox = None
-        yolo_confidence = 0.0
-        detected_class_name = ""
+            # 1. Menampilkan jenis pose di KIRI ATAS dengan jarak yang cukup
+            pose_text = f"Target: {selected_pose}"
+            cv2.putText(frame, pose_text, (20, 40), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        
+            # 2. Menampilkan pose terdeteksi YOLO di KANAN ATAS dengan jarak yang cukup
+            detected_text = f"{detected_class_name} ({yolo_confidence:.2f})"
+            text_size = overlay_renderer.text_size(detected_text, 0.8, 2)
+            # Hitung posisi x agar text ada di sebelah kanan dengan jarak aman
+            detected_x = w - text_size[0] - 30
+            cv2.putText(frame, detected_text, (detected_x, 40), 
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        
+            # 3. Menggambar bounding box hijau dari YOLO dengan label
+            box_color = (0, 255, 0)  # Hijau
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), 
+                         (pose_bbox[2], pose_bbox[3]), box_color, 2)
+        
+            # Menampilkan label di atas bounding box
+            label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
+            label_size = overlay_renderer.text_size(label_text, 0.6, 2)
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
+                         (pose_bbox[0] + label_size[0], pose_bbox[1]), box_color, -1)
+            cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
-        # Ambil hasil deteksi YOLO
-        for result in yolo_results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    if box.conf[0].item() > confidence_threshold:
-                        pose_detected = True
-                        # Ambil koordinat bounding box (x1, y1, x2, y2)
-                        x1, y1, x2, y2 = box.xyxy[0].tolist()
-                        pose_bbox = [int(coord) for coord in [x1, y1, x2, y2]]
-                        yolo_confidence = box.conf[0].item()
-                        
-                        # Ambil nama class
-                        class_id = int(box.cls[0].item())
-                        detected_class_name = yolo_model.names[class_id]
-                        break
-            
-            if pose_detected:
-                break
-
-        # Jika pose terdeteksi oleh YOLO, lanjutkan dengan MediaPipe
-        if pose_detected:
-            # Konversi frame ke RGB untuk deteksi pose MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = pose.process(rgb_frame)
-
-            if results.pose_landmarks:
-                # VISUALISASI DENGAN POSISI TEKS YANG TERPISAH JAUH
-                h, w, c = frame.shape
-                
-                # Membuat latar belakang semi-transparan untuk teks
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (0, 0), (w, 60), (0, 0, 0), -1)  # Latar belakang hitam untuk header
-                alpha = 0.7  # Transparansi
-                frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
-                
-                # 1. Menampilkan jenis pose di KIRI ATAS dengan jarak yang cukup
-                pose_text = f"Target: {selected_pose}"
-                cv2.putText(frame, pose_text, (20, 40), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                
-                # 2. Menampilkan pose terdeteksi YOLO di KANAN ATAS dengan jarak yang cukup
-                detected_text = f"{detected_class_name} ({yolo_confidence:.2f})"
-                text_size = cv2.getTextSize(detected_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)[0]
-                # Hitung posisi x agar text ada di sebelah kanan dengan jarak aman
-                detected_x = w - text_size[0] - 30
-                cv2.putText(frame, detected_text, (detected_x, 40), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
-                
-                # 3. Menggambar bounding box hijau dari YOLO dengan label
-                box_color = (0, 255, 0)  # Hijau
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), 
-                             (pose_bbox[2], pose_bbox[3]), box_color, 2)
-                
-                # Menampilkan label di atas bounding box
-                label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
-                label_size = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
-                             (pose_bbox[0] + label_size[0], pose_bbox[1]), box_color, -1)
-                cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                
-            else:
-                # MediaPipe tidak bisa mendeteksi pose meskipun YOLO menemukan pose
-                cv2.putText(frame, "MediaPipe pose tidak terdeteksi", (20, 40), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                # Tetap tampilkan bounding box YOLO
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), (pose_bbox[2], pose_bbox[3]), (255, 0, 0), 2)
-                
-                # Label untuk YOLO detection
-                label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
-                label_size = cv2.getTextSize(label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
-                cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
-                             (pose_bbox[0] + label_size[0], pose_bbox[1]), (255, 0, 0), -1)
-                cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         else:
-            # YOLO tidak mendeteksi pose
-            cv2.putText(frame, "Tidak ada pose terdeteksi", (20, 40), 
+            # MediaPipe tidak bisa mendeteksi pose meskipun YOLO menemukan pose
+            cv2.putText(frame, "MediaPipe pose tidak terdeteksi", (20, 40), 
                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+            # Tetap tampilkan bounding box YOLO
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1]), (pose_bbox[2], pose_bbox[3]), (255, 0, 0), 2)
+        
+            # Label untuk YOLO detection
+            label_text = f"{detected_class_name}: {yolo_confidence:.2f}"
+            label_size = overlay_renderer.text_size(label_text, 0.6, 2)
+            cv2.rectangle(frame, (pose_bbox[0], pose_bbox[1] - label_size[1] - 10), 
+                         (pose_bbox[0] + label_size[0], pose_bbox[1]), (255, 0, 0), -1)
+            cv2.putText(frame, label_text, (pose_bbox[0], pose_bbox[1] - 5), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    else:
+        # YOLO tidak mendeteksi pose
+        cv2.putText(frame, "Tidak ada pose terdeteksi", (20, 40), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
 
-        # Encode frame ke format JPEG
-        _, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+    # Encode JPEG dilakukan oleh StreamEncoder milik penonton (lihat generate_frames)
+    return frame
 
-    cap.release()
+def generate_frames(selected_pose=None, capture_mode=CAPTURE_SEQUENTIAL, encoder=None):
+    # Capture, inferensi, dan render/encode berjalan di thread terpisah;
+    # semua penonton sumber yang sama berbagi tahap capture + inferensi
+    # Penonton pose yang sama juga berbagi render + encode JPEG (per tingkat kualitas)
+    state = {}
+    return capture_hub.stream("squad.mp4", detect_pose,
+                              lambda packet: render_frame(packet, selected_pose, state),
+                              capture_mode, encoder or StreamEncoder(),
+                              share_key=selected_pose)
 
 @app.route('/')
 def index():
@@ -185,14 +215,53 @@ def pose_page(pose):
 
 @app.route('/video_feed/<string:pose>')
 def video_feed(pose):
+    # Pengaturan stream per penonton: ?quality=10-95&scale=0.1-1&fps=&adaptive=0|1&subsampling=444|422|420
+    try:
+        encoder = StreamEncoder(**parse_stream_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     # Pastikan nama pose diteruskan ke generate_frames
-    return Response(generate_frames(selected_pose=pose), 
+    return Response(generate_frames(selected_pose=pose, encoder=encoder),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/api/pipeline_stats')
+def api_pipeline_stats():
+    """
+    Kedalaman antrean tiap tahap pipeline (capture, inferensi, render/encode, database)
+    """
+    stats = capture_hub.stats()
+    stats['db_pool'] = db_pool.stats()
+    stats['db_writer'] = db_writer.stats()
+    stats['yolo_batcher'] = yolo_batcher.stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Histogram waktu per tahap dan counter frame dalam format teks Prometheus
+    """
+    return Response(pipeline_metrics.REGISTRY.render(), content_type=pipeline_metrics.CONTENT_TYPE)
+
 @app.route('/history')
 def history():
-    poses = fetch_pose_history()
-    return render_template('history.html', poses=poses)
+    # Halaman berikutnya: /history?cursor=<next_cursor>, filter: pose, date_from, date_to, is_correct
+    try:
+        query = parse_history_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    poses, next_cursor = fetch_pose_history(**query)
+    return render_template('history.html', poses=poses, next_cursor=next_cursor, filters=request.args)
+
+@app.route('/api/history')
+def api_history():
+    """
+    Riwayat dalam JSON yang dikirim bertahap per potongan kecil (limit sampai 10000 baris)
+    """
+    try:
+        query = parse_history_args(request.args, max_limit=MAX_STREAM_ROWS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(stream_history_json(get_db_connection, "*", **query), mimetype='application/json')
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,149 @@
+import threading
+import time
+from concurrent.futures import Future
+
+from pipeline import RingBuffer
+
+
+class MicroBatcher(threading.Thread):
+    """
+    Server inferensi micro-batch di dalam proses.
+
+    Setiap stream memanggil submit(item) seperti memanggil model biasa. Thread ini
+    mengumpulkan item dari semua stream selama paling lama max_wait detik (atau
+    sampai max_batch item), menjalankan satu panggilan batch_fn(items) -> hasil
+    per item, lalu mengembalikan hasilnya ke masing-masing pemanggil.
+
+    max_batch dan max_wait adalah kenop throughput vs latensi: batch lebih besar
+    lebih efisien di CPU, tetapi setiap frame bisa menunggu sampai max_wait.
+
+    Setiap stream menunggu hasilnya sebelum mengirim item berikutnya, jadi satu
+    batch paling banyak berisi satu item per stream aktif. Batch langsung
+    dikirim begitu semua stream aktif sudah masuk (dengan satu stream: tanpa
+    menunggu sama sekali). Stream dikenali dari thread pemanggil dan dianggap
+    tidak aktif setelah stream_timeout detik tanpa submit.
+    """
+
+    def __init__(self, batch_fn, max_batch=8, max_wait=0.005, queue_size=64, name='batcher',
+                 stream_timeout=1.0):
+        super().__init__(name=name, daemon=True)
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stream_timeout = stream_timeout
+        self._streams = {}  # ident thread pemanggil -> waktu submit terakhir
+        self._queue = RingBuffer(queue_size)
+        self._start_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.errors = 0
+        self.batch_sizes = {}  # ukuran batch -> jumlah batch
+        self._wait_time = 0.0  # total waktu item menunggu di antrean
+        self._infer_time = 0.0  # total waktu batch_fn
+        self._started_at = None
+
+    def submit(self, item, timeout=None):
+        """
+        Kirim satu item dan tunggu hasilnya. Exception dari batch_fn diteruskan ke pemanggil.
+        """
+        self._ensure_started()
+        future = Future()
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._streams[threading.get_ident()] = queued_at
+        if not self._queue.put((item, future, queued_at), timeout):
+            raise RuntimeError(f"Antrean {self.name} penuh atau sudah ditutup")
+        return future.result(timeout)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if not self.is_alive() and self._started_at is None:
+                self._started_at = time.time()
+                self.start()
+
+    def _active_streams(self):
+        # Jumlah stream yang submit dalam stream_timeout terakhir
+        cutoff = time.perf_counter() - self.stream_timeout
+        with self._lock:
+            for ident in [ident for ident, last in self._streams.items() if last < cutoff]:
+                del self._streams[ident]
+            return len(self._streams)
+
+    def _collect(self):
+        # Tunggu item pertama, lalu kumpulkan sisanya sampai batch penuh, semua stream
+        # aktif sudah masuk, atau max_wait habis
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        limit = min(self.max_batch, max(self._active_streams(), 1))
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < limit:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            item = self._queue.get(remaining)
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            start = time.perf_counter()
+            items = [item for item, _, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                print(f"Error inferensi batch {self.name}: {e}")
+                with self._lock:
+                    self.errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            end = time.perf_counter()
+
+            results = list(results)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+            if len(results) != len(items):
+                # batch_fn harus mengembalikan satu hasil per item; sisa pemanggil jangan dibiarkan menunggu
+                error = RuntimeError(f"{self.name}: batch_fn mengembalikan {len(results)} hasil "
+                                     f"untuk {len(items)} item")
+                print(f"Error inferensi batch {self.name}: {error}")
+                with self._lock:
+                    self.errors += 1
+                for _, future, _ in batch[len(results):]:
+                    future.set_exception(error)
+
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+                self._wait_time += sum(start - queued_at for _, _, queued_at in batch)
+                self._infer_time += end - start
+
+    def close(self):
+        self._queue.close()
+
+    def stats(self):
+        with self._lock:
+            elapsed = time.time() - self._started_at if self._started_at else 0.0
+            return {
+                'max_batch': self.max_batch,
+                'max_wait_ms': self.max_wait * 1000,
+                'active_streams': len(self._streams),
+                'queue': self._queue.stats(),
+                'batches': self.batches,
+                'items': self.items,
+                'errors': self.errors,
+                'avg_batch_size': self.items / self.batches if self.batches else 0.0,
+                'batch_sizes': dict(sorted(self.batch_sizes.items())),
+                'avg_wait_ms': self._wait_time / self.items * 1000 if self.items else 0.0,
+                'avg_batch_ms': self._infer_time / self.batches * 1000 if self.batches else 0.0,
+                'items_per_second': self.items / elapsed if elapsed else 0.0,
+            }
@@ -0,0 +1,80 @@
+"""
+Benchmark backend JPEG (jpeg_backends) pada rekaman latihan: waktu encode per frame
+dan ukuran JPEG untuk setiap backend yang terpasang dan setiap chroma subsampling.
+
+    python benchmarks/bench_jpeg.py --video squad.mp4 --frames 200 --quality 80
+
+Tanpa --video (atau jika file tidak ada) dipakai frame sintetis 720p.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jpeg_backends import SUBSAMPLING, available_backends, create_backend  # noqa: E402
+
+
+def load_frames(video, count, scale):
+    frames = []
+    if video and os.path.exists(video):
+        cap = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+    if not frames:
+        print(f"Video {video} tidak ditemukan, memakai frame sintetis 720p")
+        # Gradien halus + noise ringan, lebih mirip footage kamera daripada noise murni
+        rng = np.random.default_rng(0)
+        y, x = np.mgrid[0:720, 0:1280]
+        for i in range(count):
+            base = np.stack([(x + i * 4) % 256, (y + i * 2) % 256, (x + y) // 8 % 256], axis=-1)
+            noise = rng.integers(0, 16, base.shape)
+            frames.append((base + noise).astype(np.uint8))
+    if scale < 1.0:
+        frames = [cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) for frame in frames]
+    return frames
+
+
+def measure(backend, frames, quality, subsampling):
+    timings = []
+    sizes = []
+    for frame in frames:
+        start = time.perf_counter()
+        buffer = backend.encode(frame, quality, subsampling)
+        timings.append(time.perf_counter() - start)
+        sizes.append(len(buffer))
+    timings = np.array(timings) * 1000
+    return np.median(timings), np.percentile(timings, 95), np.mean(sizes) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', default='squad.mp4')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--scale', type=float, default=1.0)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.scale)
+    height, width = frames[0].shape[:2]
+    print(f"{len(frames)} frame {width}x{height}, quality {args.quality}")
+
+    for name in available_backends():
+        backend = create_backend(name)
+        backend.encode(frames[0], args.quality)  # pemanasan
+        for subsampling in SUBSAMPLING:
+            p50, p95, size_kb = measure(backend, frames, args.quality, subsampling)
+            print(f"{name:>10}  {subsampling}  p50 {p50:.2f} ms  p95 {p95:.2f} ms  "
+                  f"{1000 / p50:.0f} fps  {size_kb:.1f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark biaya render overlay per frame (header app2.py) sebelum dan sesudah OverlayRenderer.
+
+    python benchmarks/bench_overlay.py --frames 300
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from overlay import OverlayRenderer  # noqa: E402
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+RESOLUTIONS = {'720p': (720, 1280), '1080p': (1080, 1920)}
+FEEDBACK = [
+    ("Posisi Squat sudah benar!", "Posisi squat aktif", (0, 255, 0)),
+    ("Posisi Squat perlu perbaikan", "Terlalu dalam, naikan sedikit posisi", (0, 0, 255)),
+]
+
+
+def render_before(frame, i):
+    # Cara lama: salin frame penuh + addWeighted penuh + putText/getTextSize setiap frame
+    message, detail, color = FEEDBACK[(i // 30) % len(FEEDBACK)]
+    h, w, _ = frame.shape
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (0, 0), (w, 120), (0, 0, 0), -1)
+    frame = cv2.addWeighted(overlay, 0.7, frame, 0.3, 0)
+    cv2.putText(frame, "Target: squad", (20, 30), FONT, 0.8, (255, 255, 255), 2)
+    detected_text = "YOLO: squad (0.91)"
+    text_size = cv2.getTextSize(detected_text, FONT, 0.8, 2)[0]
+    cv2.putText(frame, detected_text, (w - text_size[0] - 30, 30), FONT, 0.8, (255, 255, 255), 2)
+    cv2.putText(frame, f"MediaPipe: {message}", (20, 60), FONT, 0.7, color, 2)
+    cv2.putText(frame, detail, (20, 90), FONT, 0.6, color, 2)
+    label_text = "squad: 0.91"
+    label_size = cv2.getTextSize(label_text, FONT, 0.6, 2)[0]
+    cv2.rectangle(frame, (300, 300 - label_size[1] - 10), (300 + label_size[0], 300), (0, 255, 0), -1)
+    cv2.putText(frame, label_text, (300, 295), FONT, 0.6, (255, 255, 255), 2)
+    return frame
+
+
+def render_after(renderer, frame, i):
+    message, detail, color = FEEDBACK[(i // 30) % len(FEEDBACK)]
+    renderer.darken_header(frame, 120)
+    renderer.put_text(frame, "Target: squad", (20, 30), 0.8, (255, 255, 255), 2)
+    renderer.put_text_right(frame, "YOLO: squad (0.91)", 30, 30, 0.8, (255, 255, 255), 2)
+    renderer.put_text(frame, f"MediaPipe: {message}", (20, 60), 0.7, color, 2)
+    renderer.put_text(frame, detail, (20, 90), 0.6, color, 2)
+    renderer.label(frame, "squad: 0.91", (300, 300), 0.6, (255, 255, 255), (0, 255, 0), 2)
+    return frame
+
+
+def measure(fn, frames):
+    timings = []
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        fn(frame, i)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return np.median(timings), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for name, (height, width) in RESOLUTIONS.items():
+        source = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        renderer = OverlayRenderer()
+        # Salinan frame dibuat di luar pengukuran (di app sudah dibuat oleh render_frame)
+        before = measure(render_before, [source.copy() for _ in range(args.frames)])
+        after = measure(lambda frame, i: render_after(renderer, frame, i),
+                        [source.copy() for _ in range(args.frames)])
+        print(f"{name:>6}  sebelum: p50 {before[0]:.3f} ms  p95 {before[1]:.3f} ms   "
+              f"sesudah: p50 {after[0]:.3f} ms  p95 {after[1]:.3f} ms   "
+              f"({before[0] / after[0]:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
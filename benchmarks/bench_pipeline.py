@@ -0,0 +1,348 @@
+"""
+Benchmark per tahap pipeline generate_frames(): latensi p50/p95/p99 dan FPS
+setiap tahap pada beberapa resolusi, disimpan sebagai JSON untuk dibandingkan
+antar commit. Berjalan headless di CPU (tanpa webcam, tanpa Flask, tanpa database).
+
+    python benchmarks/bench_pipeline.py --frames 200
+    python benchmarks/bench_pipeline.py --video squad.mp4 --resolutions 720p,1080p
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-ab17426.json
+
+Tahap (urutan sama dengan capture -> inferensi -> render/encode di aplikasi):
+
+    decode      cv2.VideoCapture.read() dari file (frame sintetis ditulis dulu ke MJPG)
+    preprocess  cv2.flip + cv2.cvtColor BGR -> RGB
+    pose        pose.process (MediaPipe), atau RoiPoseEstimator.detect dengan --roi
+    yolo        model YOLO app2.py (dilewati jika ultralytics / file model tidak ada)
+    classify    classify_pose
+    overlay     salin frame + overlay.draw_pose_feedback (render_frame app.py)
+    encode      encode JPEG (jpeg_backends, default OpenCV imencode)
+
+Frame sintetis tidak berisi orang, jadi pose tidak terdeteksi; classify dan
+overlay memakai kerangka sintetis (gerakan squat) agar tetap terukur. Pada
+video rekaman dipakai landmark hasil deteksi bila ada.
+
+Dengan --compare, p50 setiap tahap dibandingkan dengan hasil sebelumnya dan
+exit code 1 jika ada tahap yang lebih lambat dari --threshold persen.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jpeg_backends import create_backend  # noqa: E402
+from overlay import draw_pose_feedback  # noqa: E402
+from pose_rules import classify_pose  # noqa: E402
+from roi_pose import RoiPoseEstimator  # noqa: E402
+
+# Model YOLO yang sama dengan app2.py / appyl.py
+YOLO_MODEL = r'D:\project3\runs\detect\train\weights\best.pt'
+RESOLUTIONS = {'480p': (480, 640), '720p': (720, 1280), '1080p': (1080, 1920)}
+STAGES = ('decode', 'preprocess', 'pose', 'yolo', 'classify', 'overlay', 'encode')
+PERCENTILES = (50, 95, 99)
+
+# Kerangka berdiri (x, y ternormalisasi) untuk 33 landmark MediaPipe
+SKELETON = np.array([
+    (0.50, 0.15),  # 0 hidung
+    (0.49, 0.14), (0.48, 0.14), (0.47, 0.14), (0.51, 0.14), (0.52, 0.14), (0.53, 0.14),  # mata
+    (0.46, 0.15), (0.54, 0.15),  # telinga
+    (0.49, 0.17), (0.51, 0.17),  # mulut
+    (0.44, 0.25), (0.56, 0.25),  # bahu
+    (0.42, 0.36), (0.58, 0.36),  # siku
+    (0.41, 0.46), (0.59, 0.46),  # pergelangan tangan
+    (0.40, 0.48), (0.60, 0.48), (0.40, 0.49), (0.60, 0.49), (0.41, 0.48), (0.59, 0.48),  # jari
+    (0.46, 0.50), (0.54, 0.50),  # pinggul
+    (0.46, 0.68), (0.54, 0.68),  # lutut
+    (0.46, 0.86), (0.54, 0.86),  # pergelangan kaki
+    (0.46, 0.88), (0.54, 0.88),  # tumit
+    (0.48, 0.89), (0.52, 0.89),  # ujung kaki
+], dtype=np.float32)
+UPPER_BODY = slice(0, 23)
+HIPS_KNEES = slice(23, 27)
+
+
+def synthetic_landmarks(i):
+    """
+    NormalizedLandmarkList sintetis: tubuh turun-naik seperti squat
+    """
+    from mediapipe.framework.formats import landmark_pb2
+
+    depth = 0.12 * (1 - np.cos(i / 30 * np.pi)) / 2
+    points = SKELETON.copy()
+    points[UPPER_BODY, 1] += depth
+    points[HIPS_KNEES, 1] += [depth, depth, depth / 2, depth / 2]
+    points[HIPS_KNEES, 0] += [0.0, 0.0, -depth / 2, depth / 2]
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(x=float(x), y=float(y), z=0.0, visibility=0.99) for x, y in points
+    ])
+
+
+def synthetic_video(path, count, size):
+    # Gradien bergerak + noise (mirip bench_jpeg), disimpan sebagai MJPG seperti keluaran webcam
+    height, width = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (width, height))
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:height, 0:width]
+    for i in range(count):
+        base = np.stack([(x + i * 4) % 256, (y + i * 2) % 256, (x + y) // 8 % 256], axis=-1)
+        writer.write((base + rng.integers(0, 16, base.shape)).astype(np.uint8))
+    writer.release()
+
+
+def scaled_video(source, path, count, size):
+    # Rekaman diubah ke resolusi uji dulu, supaya tahap decode mengukur resolusi yang sama
+    height, width = size
+    cap = cv2.VideoCapture(source)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 30, (width, height))
+    written = 0
+    while written < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        writer.write(cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA))
+        written += 1
+    cap.release()
+    writer.release()
+    return written
+
+
+def load_yolo(model_path):
+    if not model_path or not os.path.exists(model_path):
+        return None, f"model {model_path} tidak ada"
+    try:
+        from ultralytics import YOLO
+    except ImportError:
+        return None, "ultralytics tidak terpasang"
+    return YOLO(model_path), None
+
+
+def render_overlay(frame, landmarks, is_correct, feedback, selected_pose):
+    # Sama dengan render_frame app.py: salin frame bersama, lalu gambar overlay yang sama
+    frame = frame.copy()
+    if is_correct:
+        text, detail, color = feedback.get("message", "BENAR!"), "", (0, 255, 0)
+    else:
+        text, detail, color = feedback.get("message", "SALAH!"), feedback.get("detail", ""), (0, 0, 255)
+    return draw_pose_feedback(frame, landmarks, selected_pose, text, detail, color)
+
+
+def run(path, args, yolo_model, backend):
+    """
+    Jalankan semua tahap untuk setiap frame video -> dict tahap -> daftar latensi (ms)
+    """
+    import mediapipe as mp
+
+    pose = mp.solutions.pose.Pose(model_complexity=args.model_complexity,
+                                  min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    estimator = RoiPoseEstimator(pose) if args.roi else None
+    timings = {stage: [] for stage in STAGES}
+    cap = cv2.VideoCapture(path)
+    i = 0
+    try:
+        while True:
+            sample = {}
+            start = time.perf_counter()
+            ret, frame = cap.read()
+            sample['decode'] = time.perf_counter() - start
+            if not ret:
+                break
+
+            start = time.perf_counter()
+            frame = cv2.flip(frame, 1)
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            sample['preprocess'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = estimator.detect(frame) if estimator else pose.process(rgb_frame)
+            sample['pose'] = time.perf_counter() - start
+
+            if yolo_model is not None:
+                start = time.perf_counter()
+                yolo_model(frame, conf=0.5, verbose=False)
+                sample['yolo'] = time.perf_counter() - start
+
+            landmarks = results.pose_landmarks or synthetic_landmarks(i)
+            start = time.perf_counter()
+            is_correct, feedback = classify_pose(landmarks.landmark, args.pose)
+            sample['classify'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            annotated = render_overlay(frame, landmarks, is_correct, feedback, args.pose)
+            sample['overlay'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            backend.encode(annotated, args.quality)
+            sample['encode'] = time.perf_counter() - start
+
+            if i >= args.warmup:
+                for stage, seconds in sample.items():
+                    timings[stage].append(seconds * 1000)
+            i += 1
+    finally:
+        cap.release()
+        pose.close()
+    return timings
+
+
+def summarize(values):
+    if not values:
+        return None
+    values = np.array(values)
+    summary = {f"p{p}_ms": float(np.percentile(values, p)) for p in PERCENTILES}
+    summary['mean_ms'] = float(values.mean())
+    summary['fps'] = 1000 / summary['mean_ms'] if summary['mean_ms'] > 0 else 0.0
+    summary['frames'] = int(len(values))
+    return summary
+
+
+def summarize_run(timings):
+    stages = {stage: summarize(values) for stage, values in timings.items() if values}
+    # Total per frame: jumlah semua tahap pada frame yang sama (pipeline tanpa thread)
+    measured = [values for values in timings.values() if values]
+    count = min(len(values) for values in measured) if measured else 0
+    stages['total'] = summarize(np.sum([values[:count] for values in measured], axis=0).tolist()) if count else None
+    return stages
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+def environment(args):
+    import mediapipe as mp
+
+    commit, dirty = git_commit()
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'created': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'mediapipe': mp.__version__,
+        'args': vars(args),
+    }
+
+
+def print_results(source, resolution, stages):
+    print(f"{source} {resolution}")
+    for stage in STAGES + ('total',):
+        summary = stages.get(stage)
+        if summary is None:
+            continue
+        print(f"  {stage:>10}  p50 {summary['p50_ms']:7.2f} ms  p95 {summary['p95_ms']:7.2f} ms  "
+              f"p99 {summary['p99_ms']:7.2f} ms  {summary['fps']:8.1f} fps")
+
+
+def compare(previous_path, results, threshold):
+    """
+    Bandingkan p50 dengan hasil sebelumnya -> daftar tahap yang melambat
+    """
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"Dibandingkan dengan {previous_path} (commit {previous['environment'].get('commit')})")
+    regressions = []
+    for source, resolutions in results.items():
+        for resolution, stages in resolutions.items():
+            old_stages = previous['results'].get(source, {}).get(resolution, {})
+            for stage, summary in stages.items():
+                old = old_stages.get(stage)
+                if summary is None or not old:
+                    continue
+                change = (summary['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+                marker = ""
+                if change > threshold:
+                    marker = "  LEBIH LAMBAT"
+                    regressions.append((source, resolution, stage, change))
+                print(f"  {source} {resolution} {stage:>10}  {old['p50_ms']:7.2f} -> {summary['p50_ms']:7.2f} ms  "
+                      f"({change:+.1f}%){marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--video', help='video rekaman (selain frame sintetis)')
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10, help='frame awal yang tidak diukur')
+    parser.add_argument('--resolutions', default='480p,720p', help=f"dari {', '.join(RESOLUTIONS)}")
+    parser.add_argument('--pose', default='squad', help='gerakan untuk classify_pose')
+    parser.add_argument('--roi', action='store_true', help='tahap pose lewat RoiPoseEstimator seperti aplikasi')
+    parser.add_argument('--model-complexity', type=int, default=1, choices=(0, 1, 2))
+    parser.add_argument('--yolo-model', default=YOLO_MODEL, help='default: model yang dipakai app2.py / appyl.py')
+    parser.add_argument('--jpeg-backend', default='opencv')
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--output', help='file JSON hasil (default: benchmarks/results/pipeline-<commit>.json)')
+    parser.add_argument('--compare', help='file JSON hasil sebelumnya')
+    parser.add_argument('--threshold', type=float, default=10.0, help='batas perlambatan p50 (persen)')
+    args = parser.parse_args()
+
+    resolutions = [name.strip() for name in args.resolutions.split(',') if name.strip()]
+    unknown = [name for name in resolutions if name not in RESOLUTIONS]
+    if unknown:
+        parser.error(f"Resolusi tidak dikenal: {', '.join(unknown)}")
+
+    yolo_model, reason = load_yolo(args.yolo_model)
+    if yolo_model is None:
+        print(f"Tahap yolo dilewati: {reason}")
+    backend = create_backend(args.jpeg_backend)
+
+    sources = ['synthetic']
+    if args.video:
+        if os.path.exists(args.video):
+            sources.append(args.video)
+        else:
+            print(f"Video {args.video} tidak ditemukan, hanya memakai frame sintetis")
+
+    count = args.frames + args.warmup
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for source in sources:
+            name = 'synthetic' if source == 'synthetic' else os.path.basename(source)
+            results[name] = {}
+            for resolution in resolutions:
+                path = os.path.join(tmp, f"{resolution}.avi")
+                if source == 'synthetic':
+                    synthetic_video(path, count, RESOLUTIONS[resolution])
+                elif scaled_video(source, path, count, RESOLUTIONS[resolution]) <= args.warmup:
+                    print(f"{source} terlalu pendek untuk {args.warmup} frame pemanasan")
+                    continue
+                stages = summarize_run(run(path, args, yolo_model, backend))
+                results[name][resolution] = stages
+                print_results(name, resolution, stages)
+
+    report = {'environment': environment(args), 'results': results}
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results',
+                                         f"pipeline-{report['environment']['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil disimpan ke {output}")
+
+    if args.compare:
+        regressions = compare(args.compare, results, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} tahap lebih lambat dari {args.threshold:.0f}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
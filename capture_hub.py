@@ -0,0 +1,465 @@
+import threading
+import time
+
+import cv2
+
+from metrics import (
+    ACTIVE_STREAMS, CAPTURE_DROPPED, DECODE_SECONDS, FRAMES_SERVED, INFERENCE_SECONDS,
+    RENDER_DROPPED, RENDER_SECONDS, SEND_DROPPED,
+)
+from pipeline import RingBuffer, StageWorker
+from pose_pool import PoolExhausted
+
+# Mode capture:
+#   sequential - setiap frame diinferensi dan dirender; decode menunggu jika inferensi atau render
+#                tertinggal (cocok untuk file video). Penonton yang lambat tetap hanya melewatkan
+#                frame di kotak suratnya sendiri, tidak pernah menahan render bersama.
+#   latest     - device dikuras terus di thread sendiri, inferensi hanya menerima frame terbaru (cocok untuk kamera)
+CAPTURE_SEQUENTIAL = 'sequential'
+CAPTURE_LATEST = 'latest'
+
+
+class FramePacket:
+    """
+    Satu frame hasil decode beserta hasil deteksi pose yang dihitung di atasnya
+    """
+    __slots__ = ('seq', 'frame', 'results', 'timestamp')
+
+    def __init__(self, seq, frame, results, timestamp):
+        self.seq = seq
+        self.frame = frame
+        self.results = results
+        self.timestamp = timestamp
+
+
+class Subscription(RingBuffer):
+    """
+    Kotak surat untuk satu penonton stream.
+    drop_oldest=True (mode latest): jika penuh, frame lama dibuang (tidak ada
+    antrean panjang), jadi penonton yang lambat hanya melewatkan frame, bukan tertinggal.
+    drop_oldest=False (mode sequential): inferensi menunggu render, tidak ada frame yang dilewati
+    sampai tahap render. Pengiriman ke klien selalu drop-oldest (lihat Viewer).
+    """
+
+    def __init__(self, reader, depth=1, drop_oldest=True):
+        super().__init__(depth, drop_oldest=drop_oldest, on_drop=RENDER_DROPPED.inc)
+        self._reader = reader
+        self.output = None  # buffer hasil render/encode, diisi oleh CaptureHub.stream
+
+    @property
+    def dropped_frames(self):
+        return self.dropped
+
+    @property
+    def error(self):
+        # Error yang menghentikan pembaca sumber (None jika sumber habis atau ditutup normal)
+        return self._reader.error
+
+    def publish(self, packet):
+        self.put(packet)
+
+    def finish(self):
+        # Dipanggil pembaca ketika sumber video habis / ditutup
+        RingBuffer.close(self)
+
+    def close(self):
+        self.finish()
+        self._reader.unsubscribe(self)
+
+    def stats(self):
+        stats = super().stats()
+        if self.output is not None:
+            stats['encode_queue'] = self.output.stats()
+        return stats
+
+
+class SourceReader(threading.Thread):
+    """
+    Thread capture untuk satu sumber (kamera atau file video).
+
+    Tahap pipeline per sumber:
+      capture (thread ini) -> capture_queue -> inferensi (StageWorker) -> subscriber
+    Setiap frame di-decode dan diproses sekali, lalu dibagikan ke semua subscriber.
+
+    Jika membuka/membaca sumber atau inferensi gagal, error disimpan di self.error,
+    semua subscriber diselesaikan, dan pembaca dilepas dari hub sehingga
+    penonton berikutnya membuka pembaca baru.
+    """
+
+    def __init__(self, hub, source, process_fn, capture_mode=CAPTURE_SEQUENTIAL):
+        super().__init__(name=f"capture-{source}", daemon=True)
+        self.hub = hub
+        self.source = source
+        self.process_fn = process_fn
+        self.capture_mode = capture_mode
+        self.frames_read = 0
+        self.error = None
+        self.estimator = None
+        self._lease = None
+        if capture_mode == CAPTURE_LATEST:
+            # Satu slot, frame baru menimpa frame yang belum sempat diinferensi
+            self.capture_queue = RingBuffer(1, drop_oldest=True, on_drop=CAPTURE_DROPPED.inc)
+        else:
+            self.capture_queue = RingBuffer(hub.capture_depth)
+        self.inference_worker = StageWorker(f"inference-{source}", self.capture_queue, self._infer)
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._stop_event = threading.Event()
+
+    def subscribe(self):
+        with self._lock:
+            if self._stop_event.is_set():
+                return None
+            subscription = Subscription(self, self.hub.subscriber_depth,
+                                        drop_oldest=self.capture_mode == CAPTURE_LATEST)
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            is_idle = not self._subscribers
+            if is_idle:
+                # Tidak ada penonton lagi, hentikan pembacaan sumber
+                self._stop_event.set()
+        if is_idle:
+            # Pembaca tetap terdaftar di hub sampai thread-nya selesai (lihat run),
+            # supaya penonton baru menunggu kamera dan estimator dilepas dulu
+            self.capture_queue.close()
+
+    @property
+    def dropped_frames(self):
+        # Frame kamera yang dilewati karena inferensi belum selesai (mode latest)
+        return self.capture_queue.dropped
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+    def _infer(self, item):
+        seq, frame, timestamp = item
+        results = None
+        if self.process_fn is not None:
+            start = time.perf_counter()
+            frame, results = self.process_fn(frame, self.estimator)
+            INFERENCE_SECONDS.observe(time.perf_counter() - start)
+
+        packet = FramePacket(seq, frame, results, timestamp)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.publish(packet)
+
+    def run(self):
+        pool = self.hub.estimator_pool
+        cap = None
+        try:
+            cap = self.hub.open_source(self.source)
+            if self.capture_mode == CAPTURE_LATEST:
+                # Perkecil buffer driver supaya frame yang dibaca selalu yang paling baru
+                cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            if pool is not None:
+                # Estimator milik stream ini sendiri, state tracking tidak tercampur
+                self._lease = pool.acquire(self.source, self.hub.acquire_timeout)
+                self.estimator = self._lease.estimator
+            self.inference_worker.start()
+
+            while not self._stop_event.is_set() and cap.isOpened():
+                start = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                DECODE_SECONDS.observe(time.perf_counter() - start)
+
+                # Mode sequential: menunggu jika tahap inferensi tertinggal.
+                # Mode latest: tidak pernah menunggu, frame lama dibuang.
+                if not self.capture_queue.put((self.frames_read, frame, time.time())):
+                    break
+                self.frames_read += 1
+        except PoolExhausted as e:
+            print(f"Error membuka stream {self.source}: {e}")
+            self.error = e
+        except Exception as e:
+            print(f"Error membaca sumber {self.source}: {e}")
+            self.error = e
+        finally:
+            if cap is not None:
+                cap.release()
+            # Tahap inferensi menghabiskan sisa antrean lalu berhenti
+            self.capture_queue.close()
+            if self.inference_worker.is_alive():
+                self.inference_worker.join()
+            if self.error is None:
+                self.error = self.inference_worker.error
+            if self._lease is not None:
+                pool.release(self._lease)
+            self._stop_event.set()
+            self.hub._remove(self)
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for subscription in subscribers:
+                subscription.finish()
+
+    def stats(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        stats = {
+            'capture_mode': self.capture_mode,
+            'frames_read': self.frames_read,
+            'frames_inferred': self.inference_worker.processed,
+            'dropped_frames': self.dropped_frames,
+            'error': str(self.error) if self.error is not None else None,
+            'capture_queue': self.capture_queue.stats(),
+            'subscribers': [subscription.stats() for subscription in subscribers],
+        }
+        estimator_stats = getattr(self.estimator, 'stats', None)
+        if estimator_stats is not None:
+            # Mis. pemakaian ROI oleh RoiPoseEstimator
+            stats['estimator'] = estimator_stats()
+        return stats
+
+
+class Viewer:
+    """
+    Satu penonton Broadcast: encoder miliknya sendiri dan kotak surat bagian
+    multipart yang siap dikirim. Di kedua mode, jika penonton lambat bagian lama
+    dibuang, sehingga Broadcast dan penonton lain tidak ikut tertahan. Jumlah
+    yang dibuang dipakai StreamEncoder untuk menurunkan resolusi / kualitas.
+    """
+    __slots__ = ('encoder', 'output')
+
+    def __init__(self, encoder, depth):
+        self.encoder = encoder
+        self.output = RingBuffer(depth, drop_oldest=True, on_drop=SEND_DROPPED.inc)
+
+    def stats(self):
+        stats = self.output.stats()
+        stats['encoder'] = self.encoder.stats()
+        return stats
+
+
+class Broadcast(threading.Thread):
+    """
+    Tahap render + encode bersama untuk penonton dengan share_key yang sama
+    (mis. pose yang sama) pada satu sumber.
+
+    render_fn dijalankan sekali per frame dan setiap tingkat (scale, quality)
+    di-encode sekali. Penonton di tingkat yang sama menerima objek bytes yang
+    sama, jadi menambah penonton hanya menambah penulisan ke socket.
+    """
+
+    def __init__(self, hub, source, key, subscription, render_fn, shared=True, on_close=None):
+        super().__init__(name=f"render-{source}", daemon=True)
+        self.hub = hub
+        self.source = source
+        self.key = key
+        self.shared = shared
+        self.subscription = subscription
+        self.render_fn = render_fn
+        self.on_close = on_close
+        self.frames_rendered = 0
+        self._lock = threading.Lock()
+        self._viewers = []
+        self._closed = False
+
+    def add_viewer(self, encoder):
+        with self._lock:
+            if self._closed:
+                return None
+            viewer = Viewer(encoder, self.hub.encode_depth)
+            self._viewers.append(viewer)
+        return viewer
+
+    def remove_viewer(self, viewer):
+        viewer.output.close()
+        with self._lock:
+            if viewer in self._viewers:
+                self._viewers.remove(viewer)
+            is_idle = not self._viewers
+            if is_idle:
+                self._closed = True
+        if is_idle:
+            # Tidak ada penonton lagi, lepas langganan ke pembaca sumber
+            self.subscription.close()
+            self.hub._remove_broadcast(self)
+
+    def run(self):
+        try:
+            for packet in self.subscription:
+                with self._lock:
+                    viewers = list(self._viewers)
+                if not viewers:
+                    continue
+                start = time.perf_counter()
+                frame = self.render_fn(packet)
+                RENDER_SECONDS.observe(time.perf_counter() - start)
+                self.frames_rendered += 1
+                encoded = {}  # tingkat encode -> bagian multipart untuk frame ini
+                for viewer in viewers:
+                    chunk = viewer.encoder.encode(frame, viewer.output.dropped, encoded)
+                    if chunk is not None:
+                        viewer.output.put(chunk)
+        except Exception as e:
+            print(f"Error di tahap pipeline {self.name}: {e}")
+        finally:
+            with self._lock:
+                self._closed = True
+                viewers = list(self._viewers)
+            for viewer in viewers:
+                viewer.output.close()
+            self.hub._remove_broadcast(self)
+            if self.on_close is not None:
+                self.on_close()
+
+    def stats(self):
+        with self._lock:
+            viewers = list(self._viewers)
+        return {
+            'source': str(self.source),
+            'key': str(self.key) if self.shared else None,
+            'frames_rendered': self.frames_rendered,
+            'render_queue': self.subscription.stats(),
+            'viewers': [viewer.stats() for viewer in viewers],
+        }
+
+
+class CaptureHub:
+    """
+    Mengelola pembaca bersama per sumber. Banyak /video_feed yang menonton
+    sumber yang sama memakai satu loop decode + deteksi pose.
+
+    process_fn(frame, estimator) -> (frame, results) dijalankan sekali per frame
+    di thread inferensi. estimator dipinjam dari estimator_pool per sumber
+    (None jika hub dibuat tanpa pool).
+
+    Kedalaman antrean tiap tahap bisa diatur:
+      capture_depth    - frame hasil decode yang menunggu inferensi
+      subscriber_depth - hasil inferensi yang menunggu render per penonton
+      encode_depth     - frame JPEG yang menunggu dikirim per penonton
+
+    open_source(source) membuka sumber dan mengembalikan objek dengan antarmuka
+    cv2.VideoCapture (read, isOpened, set, release); default cv2.VideoCapture.
+    """
+
+    def __init__(self, estimator_pool=None, acquire_timeout=10.0,
+                 capture_depth=2, subscriber_depth=1, encode_depth=2, open_source=cv2.VideoCapture):
+        self.estimator_pool = estimator_pool
+        self.open_source = open_source
+        self.acquire_timeout = acquire_timeout
+        self.capture_depth = capture_depth
+        self.subscriber_depth = subscriber_depth
+        self.encode_depth = encode_depth
+        self._lock = threading.Lock()
+        self._readers = {}
+        self._broadcast_lock = threading.Lock()
+        self._broadcasts = {}
+
+    def subscribe(self, source, process_fn=None, capture_mode=CAPTURE_SEQUENTIAL):
+        """
+        capture_mode hanya berlaku untuk penonton pertama yang membuka sumber;
+        penonton berikutnya ikut memakai pembaca yang sudah berjalan.
+        """
+        while True:
+            with self._lock:
+                reader = self._readers.get(source)
+                if reader is None:
+                    reader = SourceReader(self, source, process_fn, capture_mode)
+                    self._readers[source] = reader
+                    subscription = reader.subscribe()
+                    reader.start()
+                    return subscription
+                subscription = reader.subscribe()
+                if subscription is not None:
+                    return subscription
+            # Pembaca lama sedang berhenti dan masih memegang kamera serta
+            # estimatornya: tunggu sampai selesai sebelum membuka sumber lagi
+            reader.join()
+
+    def stream(self, source, process_fn, render_fn, capture_mode=CAPTURE_SEQUENTIAL,
+               encoder=None, share_key=None, on_close=None):
+        """
+        Generator multipart untuk satu penonton. render_fn(packet) -> bytes
+        dijalankan di thread render/encode sendiri sehingga tumpang tindih
+        dengan capture, inferensi, dan pengiriman ke socket.
+
+        Dengan encoder (StreamEncoder), render_fn(packet) -> frame BGR dan
+        encoder yang membuat JPEG-nya. Penonton dengan share_key yang sama
+        memakai satu Broadcast: render_fn penonton pertama yang dipakai, dan
+        hasil encode dibagi per tingkat kualitas. share_key None: tidak dibagi.
+
+        on_close() dipanggil sekali setelah tahap render berhenti (penonton
+        terakhir pergi atau sumber habis). Seperti render_fn, untuk Broadcast
+        yang dipakai adalah milik penonton pertama.
+        """
+        if encoder is not None:
+            yield from self._stream_broadcast(source, process_fn, render_fn, capture_mode, encoder,
+                                              share_key, on_close)
+            return
+
+        def timed_render(packet):
+            start = time.perf_counter()
+            chunk = render_fn(packet)
+            RENDER_SECONDS.observe(time.perf_counter() - start)
+            return chunk
+
+        subscription = self.subscribe(source, process_fn, capture_mode)
+        # Penonton lambat melewatkan frame, tidak menahan render dan pembaca sumber
+        output = RingBuffer(self.encode_depth, drop_oldest=True, on_drop=SEND_DROPPED.inc)
+        subscription.output = output
+        worker = StageWorker(f"render-{source}", subscription, timed_render, output)
+        worker.start()
+        ACTIVE_STREAMS.inc()
+        try:
+            for chunk in output:
+                FRAMES_SERVED.inc()
+                yield chunk
+        finally:
+            ACTIVE_STREAMS.dec()
+            output.close()
+            subscription.close()
+            if on_close is not None:
+                worker.join()
+                on_close()
+
+    def _stream_broadcast(self, source, process_fn, render_fn, capture_mode, encoder, share_key, on_close):
+        key = share_key if share_key is not None else object()
+        with self._broadcast_lock:
+            broadcast = self._broadcasts.get((source, key))
+            viewer = broadcast.add_viewer(encoder) if broadcast is not None else None
+            if viewer is None:
+                subscription = self.subscribe(source, process_fn, capture_mode)
+                broadcast = Broadcast(self, source, key, subscription, render_fn,
+                                      shared=share_key is not None, on_close=on_close)
+                viewer = broadcast.add_viewer(encoder)
+                self._broadcasts[(source, key)] = broadcast
+                broadcast.start()
+        ACTIVE_STREAMS.inc()
+        try:
+            for chunk in viewer.output:
+                FRAMES_SERVED.inc()
+                yield chunk
+        finally:
+            ACTIVE_STREAMS.dec()
+            broadcast.remove_viewer(viewer)
+
+    def _remove_broadcast(self, broadcast):
+        with self._broadcast_lock:
+            if self._broadcasts.get((broadcast.source, broadcast.key)) is broadcast:
+                del self._broadcasts[(broadcast.source, broadcast.key)]
+
+    def _remove(self, reader):
+        with self._lock:
+            if self._readers.get(reader.source) is reader:
+                del self._readers[reader.source]
+
+    def stats(self):
+        with self._lock:
+            readers = list(self._readers.values())
+        stats = {str(reader.source): reader.stats() for reader in readers}
+        with self._broadcast_lock:
+            broadcasts = list(self._broadcasts.values())
+        stats['broadcasts'] = [broadcast.stats() for broadcast in broadcasts]
+        if self.estimator_pool is not None:
+            stats['estimator_pool'] = self.estimator_pool.stats()
+        return stats
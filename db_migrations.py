@@ -0,0 +1,134 @@
+import sys
+
+# Isi awal rollup dari riwayat yang sudah ada (format bucket sama dengan pose_rollup.ROLLUP_TABLES).
+# Hanya jika tabel rollup masih kosong, supaya tabel yang sudah diisi manual tidak terhitung dua kali.
+BACKFILL_ROLLUP = """INSERT INTO {table}
+       (pose_name, bucket, total, correct, sum_confidence, sum_visibility, sum_frame_accuracy)
+       SELECT pose_name, DATE_FORMAT(timestamp, '{bucket_format}'), COUNT(*),
+              SUM(CASE WHEN is_correct THEN 1 ELSE 0 END),
+              COALESCE(SUM(detection_confidence), 0), COALESCE(SUM(avg_visibility), 0),
+              COALESCE(SUM(frame_accuracy), 0)
+       FROM detected_poses
+       WHERE pose_name IS NOT NULL AND timestamp IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM {table})
+       GROUP BY pose_name, DATE_FORMAT(timestamp, '{bucket_format}')"""
+
+# Migrasi skema berurutan: (versi, nama, [statement SQL]).
+# Versi yang sudah dijalankan dicatat di tabel schema_migrations.
+MIGRATIONS = [
+    (1, "history_indexes", [
+        # Keyset pagination: WHERE <filter> AND id < cursor ORDER BY id DESC LIMIT n
+        "CREATE INDEX idx_detected_poses_pose_id ON detected_poses (pose_name, id)",
+        "CREATE INDEX idx_detected_poses_pose_correct_id ON detected_poses (pose_name, is_correct, id)",
+        "CREATE INDEX idx_detected_poses_correct_id ON detected_poses (is_correct, id)",
+        "CREATE INDEX idx_detected_poses_timestamp_id ON detected_poses (timestamp, id)",
+    ]),
+    (2, "accuracy_rollups", [
+        # Agregat akurasi per pose per jam / per hari, diperbarui oleh db_writer saat insert
+        """CREATE TABLE IF NOT EXISTS pose_rollup_hourly (
+            pose_name VARCHAR(100) NOT NULL,
+            bucket DATETIME NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            sum_confidence DOUBLE NOT NULL DEFAULT 0,
+            sum_visibility DOUBLE NOT NULL DEFAULT 0,
+            sum_frame_accuracy DOUBLE NOT NULL DEFAULT 0,
+            PRIMARY KEY (pose_name, bucket)
+        )""",
+        """CREATE TABLE IF NOT EXISTS pose_rollup_daily (
+            pose_name VARCHAR(100) NOT NULL,
+            bucket DATE NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            correct INTEGER NOT NULL DEFAULT 0,
+            sum_confidence DOUBLE NOT NULL DEFAULT 0,
+            sum_visibility DOUBLE NOT NULL DEFAULT 0,
+            sum_frame_accuracy DOUBLE NOT NULL DEFAULT 0,
+            PRIMARY KEY (pose_name, bucket)
+        )""",
+        "CREATE INDEX idx_pose_rollup_hourly_bucket ON pose_rollup_hourly (bucket)",
+        "CREATE INDEX idx_pose_rollup_daily_bucket ON pose_rollup_daily (bucket)",
+        # Riwayat lama masuk rollup di transaksi yang sama dengan pencatatan versi
+        BACKFILL_ROLLUP.format(table='pose_rollup_hourly', bucket_format='%Y-%m-%d %H:00:00'),
+        BACKFILL_ROLLUP.format(table='pose_rollup_daily', bucket_format='%Y-%m-%d'),
+    ]),
+    (3, "history_date_indexes", [
+        # Filter tanggal digabung filter lain: kesamaan dulu, lalu rentang timestamp.
+        # Rentang pada kolom kedua tetap butuh sort id untuk baris di dalam rentang itu,
+        # tetapi yang diurutkan hanya baris pose / status itu pada rentang tanggalnya.
+        #   pose + tanggal     -> (pose_name, timestamp, id)
+        #   benar + tanggal    -> (is_correct, timestamp, id)
+        # Hanya tanggal: (timestamp, id) dari migrasi 1, atau scan PK mundur jika rentangnya
+        # mencakup data terbaru (optimizer yang memilih).
+        # pose + benar (+ tanggal) tetap memakai (pose_name, is_correct, id).
+        "CREATE INDEX idx_detected_poses_pose_timestamp_id ON detected_poses (pose_name, timestamp, id)",
+        "CREATE INDEX idx_detected_poses_correct_timestamp_id ON detected_poses (is_correct, timestamp, id)",
+    ]),
+]
+
+MIGRATIONS_TABLE = """CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+def _already_exists(error):
+    # MySQL 1061 = Duplicate key name, 1050 = Table already exists; SQLite: "... already exists"
+    code = error.args[0] if error.args else None
+    return code in (1050, 1061) or 'already exists' in str(error)
+
+
+def applied_versions(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(MIGRATIONS_TABLE)
+        cursor.execute("SELECT version FROM schema_migrations")
+        versions = {row['version'] for row in cursor.fetchall()}
+    connection.commit()
+    return versions
+
+
+def migrate(connection, migrations=None):
+    """
+    Jalankan migrasi yang belum pernah dijalankan. Mengembalikan daftar versi yang baru diterapkan.
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
+    done = applied_versions(connection)
+    applied = []
+    for version, name, statements in migrations:
+        if version in done:
+            continue
+        with connection.cursor() as cursor:
+            for statement in statements:
+                try:
+                    cursor.execute(statement)
+                except Exception as e:
+                    # Index/tabel yang sudah dibuat manual tidak dianggap gagal
+                    if not _already_exists(e):
+                        raise
+            cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)", (version, name))
+        connection.commit()
+        applied.append(version)
+        print(f"Migrasi {version} ({name}) diterapkan")
+    return applied
+
+
+if __name__ == '__main__':
+    # python db_migrations.py            -> MySQL gym_pose_detection
+    # python db_migrations.py file.db    -> database SQLite lokal
+    if len(sys.argv) > 1:
+        from db_sqlite import connect_sqlite
+        connection = connect_sqlite(sys.argv[1])
+    else:
+        import pymysql
+        connection = pymysql.connect(
+            host='localhost',
+            user='root',
+            password='',
+            database='gym_pose_detection',
+            cursorclass=pymysql.cursors.DictCursor
+        )
+    try:
+        if not migrate(connection):
+            print("Skema sudah terbaru")
+    finally:
+        connection.close()
@@ -0,0 +1,189 @@
+import threading
+import time
+
+
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class PooledConnection:
+    """
+    Pembungkus koneksi dari pool. Semua atribut diteruskan ke koneksi asli,
+    kecuali close() yang mengembalikan koneksi ke pool (bukan menutupnya).
+    """
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+
+    def __getattr__(self, name):
+        raw = self.__dict__.get('_raw')
+        if raw is None:
+            raise AttributeError(f"Koneksi sudah dikembalikan ke pool ({name})")
+        return getattr(raw, name)
+
+    def close(self):
+        raw, self._raw = self._raw, None
+        if raw is not None:
+            self._pool._put(raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool koneksi database yang thread-safe.
+
+    connect()    : factory koneksi baru (pymysql.connect, db_sqlite.connect_sqlite, ...)
+    min_size     : jumlah koneksi yang dibuat saat pool dibuat dan tetap disimpan
+                   walau sudah lama menganggur
+    max_size     : batas koneksi hidup; get() menunggu jika semua sedang dipakai
+    idle_timeout : koneksi menganggur lebih lama dari ini ditutup (di atas min_size)
+
+    Koneksi dicek dengan ping() setiap kali diambil dari pool, koneksi yang
+    mati dibuang dan diganti yang baru. Koneksi menganggur yang kedaluwarsa
+    ditutup saat koneksi diambil maupun dikembalikan.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=8, idle_timeout=300.0, checkout_timeout=10.0):
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self._cond = threading.Condition()
+        self._idle = []  # [(koneksi, waktu_dikembalikan)], terbaru di akhir
+        self._live = 0
+        self._in_use = 0
+        self.created = 0
+        self.discarded = 0
+        self.checkouts = 0
+        self._prefill()
+
+    def _prefill(self):
+        # Buka min_size koneksi di awal supaya permintaan pertama tidak membayar handshake.
+        # Database yang belum siap tidak menggagalkan startup, get() akan mencoba lagi.
+        for _ in range(min(self.min_size, self.max_size)):
+            try:
+                raw = self.connect()
+            except Exception as e:
+                print(f"Error membuka koneksi awal database: {e}")
+                return
+            with self._cond:
+                self._live += 1
+                self.created += 1
+                self._idle.append((raw, time.monotonic()))
+
+    def get(self, timeout=None):
+        """
+        Ambil koneksi. Panggil close() (atau pakai with) untuk mengembalikannya.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    self._evict_idle()
+                    if self._idle:
+                        raw, _ = self._idle.pop()
+                        break
+                    if self._live < self.max_size:
+                        # Reservasi slot, koneksi dibuat di luar lock karena lambat
+                        self._live += 1
+                        raw = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"Semua {self.max_size} koneksi database sedang dipakai")
+                    self._cond.wait(remaining)
+                self._in_use += 1
+
+            if raw is None:
+                try:
+                    raw = self.connect()
+                except Exception:
+                    with self._cond:
+                        self._live -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self.created += 1
+            elif not self._healthy(raw):
+                # Koneksi mati (timeout server, restart, dll), buang lalu coba lagi
+                self._discard(raw)
+                continue
+
+            with self._cond:
+                self.checkouts += 1
+            return PooledConnection(self, raw)
+
+    @staticmethod
+    def _healthy(raw):
+        ping = getattr(raw, 'ping', None)
+        if ping is None:
+            return True
+        try:
+            ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _put(self, raw):
+        try:
+            # Akhiri transaksi yang belum di-commit supaya koneksi bersih untuk pemakai berikutnya
+            raw.rollback()
+        except Exception:
+            self._discard(raw)
+            return
+        with self._cond:
+            self._in_use -= 1
+            self._idle.append((raw, time.monotonic()))
+            self._evict_idle()
+            self._cond.notify()
+
+    def _discard(self, raw):
+        self._close(raw)
+        with self._cond:
+            self._live -= 1
+            self._in_use -= 1
+            self.discarded += 1
+            self._cond.notify()
+
+    def _evict_idle(self):
+        # Harus dipanggil dengan self._cond terkunci
+        now = time.monotonic()
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.idle_timeout:
+            raw, _ = self._idle.pop(0)
+            self._close(raw)
+            self._live -= 1
+
+    @staticmethod
+    def _close(raw):
+        try:
+            raw.close()
+        except Exception as e:
+            print(f"Error menutup koneksi database: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                'live': self._live,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'max_size': self.max_size,
+                'created': self.created,
+                'discarded': self.discarded,
+                'checkouts': self.checkouts,
+            }
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+        for raw, _ in idle:
+            self._close(raw)
@@ -0,0 +1,100 @@
+import re
+import sqlite3
+
+# Skema lokal pengganti database gym_pose_detection (gabungan kolom yang dipakai semua app)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detected_poses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pose_name TEXT,
+    is_correct INTEGER,
+    feedback TEXT,
+    status TEXT,
+    detection_confidence REAL DEFAULT 0,
+    avg_visibility REAL DEFAULT 0,
+    frame_accuracy REAL DEFAULT 0,
+    timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+def _translate(query):
+    # Placeholder pymysql (%s) -> sqlite (?), fungsi waktu MySQL -> sqlite
+    query = query.replace('%s', '?').replace('NOW()', 'CURRENT_TIMESTAMP')
+    # Upsert MySQL -> upsert sqlite (butuh SQLite 3.35+)
+    query = query.replace('ON DUPLICATE KEY UPDATE', 'ON CONFLICT DO UPDATE SET')
+    # DATE_FORMAT(kolom, '%Y-%m-%d') -> strftime('%Y-%m-%d', kolom), kode format yang dipakai sama
+    query = re.sub(r"DATE_FORMAT\((\w+), ('[^']*')\)", r'strftime(\2, \1)', query)
+    return re.sub(r'VALUES\((\w+)\)', r'excluded.\1', query)
+
+
+class SQLiteCursor:
+    """
+    Cursor dengan perilaku seperti pymysql DictCursor
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        self._cursor.execute(_translate(query), params or ())
+        return self._cursor.rowcount
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(_translate(query), rows)
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchall(self):
+        return [dict(row) for row in self._cursor.fetchall()]
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    def close(self):
+        self._cursor.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SQLiteConnection:
+    """
+    Adapter SQLite dengan antarmuka koneksi pymysql yang dipakai app
+    (cursor, commit, rollback, ping, close). Untuk menjalankan app dan
+    ConnectionPool tanpa server MySQL.
+    """
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def cursor(self):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        self._conn.execute("SELECT 1")
+
+    def close(self):
+        self._conn.close()
+
+
+def connect_sqlite(path='gym_pose_detection.sqlite3'):
+    return SQLiteConnection(path)
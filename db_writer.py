@@ -0,0 +1,264 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+import pymysql
+
+from db_pool import PoolTimeout
+from metrics import DB_WRITE_SECONDS
+from pipeline import RingBuffer
+
+# Error yang berarti database tidak bisa dihubungi (bukan baris yang salah):
+# batch disimpan ke spill file dan dikirim ulang nanti
+CONNECTION_ERRORS = (pymysql.OperationalError, pymysql.InterfaceError, PoolTimeout, OSError)
+
+
+class _Outage(Exception):
+    """
+    Database putus di tengah penulisan. remaining: (query, baris) yang belum tertulis.
+    """
+
+    def __init__(self, remaining):
+        super().__init__(f"{len(remaining)} baris belum tertulis")
+        self.remaining = remaining
+
+
+class BatchWriter(threading.Thread):
+    """
+    Penulis database di background.
+
+    submit() hanya memasukkan baris ke antrean (tidak pernah menunggu database),
+    thread ini mengumpulkan baris lalu menulisnya dengan satu executemany pada
+    koneksi yang dipakai terus. Batch dikirim jika sudah batch_size baris atau
+    sudah flush_interval detik sejak baris pertama masuk.
+
+    Jika database tidak bisa dihubungi (outage_errors), batch ditulis ke
+    spill_path bersama query-nya (JSON per baris, maksimal spill_max_rows baris)
+    dan dikirim ulang ketika database kembali. Setiap BatchWriter harus punya
+    spill_path sendiri.
+
+    Baris yang ditolak database karena isinya (jumlah kolom, tipe, constraint)
+    dicatat dan dipindah ke dead_letter_path, supaya satu baris buruk tidak
+    menahan baris lain.
+
+    after_write(cursor, rows) opsional dijalankan di transaksi yang sama
+    dengan insert (mis. memperbarui tabel rollup).
+    """
+
+    def __init__(self, connect, query, batch_size=50, flush_interval=1.0,
+                 queue_size=1000, spill_path=None, spill_max_rows=10000, after_write=None,
+                 dead_letter_path=None, outage_errors=CONNECTION_ERRORS):
+        super().__init__(name="db-writer", daemon=True)
+        self.connect = connect
+        self.query = query
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.spill_max_rows = spill_max_rows
+        self.after_write = after_write
+        self.dead_letter_path = dead_letter_path
+        self.outage_errors = outage_errors
+        # Antrean penuh: baris tertua dibuang, frame tidak pernah ikut menunggu
+        self.queue = RingBuffer(queue_size, drop_oldest=True)
+        self.rows_written = 0
+        self.batches_written = 0
+        self.rows_spilled = 0
+        self.spill_dropped = 0
+        self.rows_dead = 0
+        self._connection = None
+        self._start_lock = threading.Lock()
+        self._spill_rows = self._count_spill_rows()
+
+    def submit(self, row):
+        if not self.is_alive():
+            with self._start_lock:
+                if not self.is_alive() and not self.queue.closed:
+                    self.start()
+                    atexit.register(self.close)
+        self.queue.put(row)
+
+    def run(self):
+        while True:
+            first = self.queue.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                row = self.queue.get(remaining)
+                if row is None:
+                    break
+                batch.append(row)
+            self._flush(batch)
+        self._disconnect()
+
+    def _flush(self, batch):
+        entries = [(self.query, row) for row in batch]
+        if self._spill_rows and not self._replay_spill():
+            self._spill(entries)
+            return
+        try:
+            self._write_entries(entries)
+        except _Outage as e:
+            print(f"Error menyimpan ke database: {e.__cause__}")
+            self._disconnect()
+            self._spill(e.remaining)
+
+    def _write(self, query, rows):
+        start = time.perf_counter()
+        if self._connection is None:
+            self._connection = self.connect()
+        with self._connection.cursor() as cursor:
+            cursor.executemany(query, rows)
+            if self.after_write is not None and query == self.query:
+                self.after_write(cursor, rows)
+        self._connection.commit()
+        DB_WRITE_SECONDS.observe(time.perf_counter() - start)
+        self.rows_written += len(rows)
+        self.batches_written += 1
+
+    def _write_entries(self, entries):
+        """
+        Tulis daftar (query, baris), per batch query yang sama. Jika batch ditolak
+        karena isinya, baris dicoba satu per satu dan yang gagal masuk dead-letter.
+        Error koneksi -> _Outage berisi baris yang belum tertulis.
+        """
+        start = 0
+        while start < len(entries):
+            query = entries[start][0]
+            end = start + 1
+            while end < len(entries) and end - start < self.batch_size and entries[end][0] == query:
+                end += 1
+            rows = [row for _, row in entries[start:end]]
+            try:
+                self._write(query, rows)
+            except self.outage_errors as e:
+                raise _Outage(entries[start:]) from e
+            except Exception:
+                self._rollback()
+                for i, row in enumerate(rows):
+                    try:
+                        self._write(query, [row])
+                    except self.outage_errors as e:
+                        raise _Outage(entries[start + i:]) from e
+                    except Exception as e:
+                        self._rollback()
+                        self._dead_letter(query, row, e)
+            start = end
+
+    def _rollback(self):
+        if self._connection is None:
+            return
+        try:
+            self._connection.rollback()
+        except Exception:
+            self._disconnect()
+
+    def _dead_letter(self, query, row, error):
+        print(f"Error baris ditolak database ({error}): {row}")
+        self.rows_dead += 1
+        if not self.dead_letter_path:
+            return
+        try:
+            with open(self.dead_letter_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'query': query, 'row': list(row), 'error': str(error)}, default=str) + "\n")
+        except OSError as e:
+            print(f"Error menulis dead-letter file {self.dead_letter_path}: {e}")
+
+    def _disconnect(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def _count_spill_rows(self):
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return 0
+        with open(self.spill_path, encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    def _spill(self, entries):
+        if not self.spill_path:
+            self.spill_dropped += len(entries)
+            return
+        room = max(self.spill_max_rows - self._spill_rows, 0)
+        kept = entries[:room]
+        self.spill_dropped += len(entries) - len(kept)
+        if not kept:
+            return
+        try:
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for query, row in kept:
+                    f.write(self._spill_line(query, row))
+            self._spill_rows += len(kept)
+            self.rows_spilled += len(kept)
+        except OSError as e:
+            print(f"Error menulis spill file {self.spill_path}: {e}")
+            self.spill_dropped += len(kept)
+
+    @staticmethod
+    def _spill_line(query, row):
+        return json.dumps({'query': query, 'row': list(row)}, default=str) + "\n"
+
+    def _read_spill(self):
+        entries = []
+        with open(self.spill_path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if isinstance(entry, list):
+                    # Format lama: hanya baris, query milik writer ini
+                    entries.append((self.query, tuple(entry)))
+                else:
+                    entries.append((entry['query'], tuple(entry['row'])))
+        return entries
+
+    def _replay_spill(self):
+        """
+        Kirim ulang baris yang tertunda saat database mati, urut dari yang terlama.
+        False jika database masih tidak bisa dihubungi.
+        """
+        try:
+            self._write_entries(self._read_spill())
+        except _Outage as e:
+            print(f"Error mengirim ulang spill file {self.spill_path}: {e.__cause__}")
+            self._disconnect()
+            # Simpan hanya sisa yang belum terkirim supaya tidak ada duplikat
+            self._rewrite_spill(e.remaining)
+            return False
+        os.remove(self.spill_path)
+        self._spill_rows = 0
+        return True
+
+    def _rewrite_spill(self, entries):
+        with open(self.spill_path, 'w', encoding='utf-8') as f:
+            for query, row in entries:
+                f.write(self._spill_line(query, row))
+        self._spill_rows = len(entries)
+
+    def close(self, timeout=5.0):
+        """
+        Tutup antrean dan tunggu sisa baris selesai ditulis
+        """
+        self.queue.close()
+        if self.is_alive():
+            self.join(timeout)
+
+    def stats(self):
+        return {
+            'queue': self.queue.stats(),
+            'rows_written': self.rows_written,
+            'batches_written': self.batches_written,
+            'rows_spilled': self.rows_spilled,
+            'spill_pending': self._spill_rows,
+            'spill_dropped': self.spill_dropped,
+            'rows_dead': self.rows_dead,
+        }
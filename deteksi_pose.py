@@ -1,17 +1,32 @@
-from flask import Flask, render_template, Response
+from flask import Flask, render_template, Response, request, jsonify
 import cv2
 import mediapipe as mp
 import pymysql
+from capture_hub import CaptureHub, CAPTURE_SEQUENTIAL
+from db_pool import ConnectionPool
+from db_writer import BatchWriter
+import metrics as pipeline_metrics
+from pose_history import (
+    DEFAULT_PAGE_SIZE, MAX_STREAM_ROWS, fetch_history_page, parse_history_args, stream_history_json
+)
+from pose_pool import EstimatorPool
+from roi_pose import RoiPoseEstimator
+from stream_encoder import StreamEncoder, parse_stream_args
 
 app = Flask(__name__)
 
 # Inisialisasi MediaPipe pose
 mp_pose = mp.solutions.pose
-pose = mp_pose.Pose()
+# Satu instance Pose per stream, dibatasi dan didaur ulang oleh pool.
+# Inferensi dijalankan di crop sekitar orang (ROI), bukan di seluruh frame.
+pose_pool = EstimatorPool(lambda: RoiPoseEstimator(mp_pose.Pose()))
 mp_drawing = mp.solutions.drawing_utils
 
+# Satu pembaca kamera bersama untuk semua penonton /video_feed
+capture_hub = CaptureHub(estimator_pool=pose_pool)
+
 # Konfigurasi Database
-def get_db_connection():
+def connect_mysql():
     return pymysql.connect(
         host='localhost',
         user='root',
@@ -20,65 +35,72 @@ def get_db_connection():
         cursorclass=pymysql.cursors.DictCursor
     )
 
+# Pool koneksi: handshake MySQL hanya dibayar saat membuat koneksi baru.
+# Factory bisa diganti, mis. db_sqlite.connect_sqlite untuk menjalankan tanpa server MySQL.
+db_pool = ConnectionPool(connect_mysql, min_size=1, max_size=8)
+
+def get_db_connection():
+    # close() pada koneksi ini mengembalikannya ke pool
+    return db_pool.get()
+
+# Penulis database di background: insert dikumpulkan lalu dikirim per batch
+db_writer = BatchWriter(
+    get_db_connection,
+    "INSERT INTO detected_poses (pose_name) VALUES (%s)",
+    # Spill dan dead-letter per app: query dan jumlah kolom tiap app berbeda
+    spill_path='detected_poses_spill_deteksi_pose.jsonl',
+    dead_letter_path='detected_poses_dead_deteksi_pose.jsonl'
+)
+
 def save_pose_to_db(pose_name):
-    try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = "INSERT INTO detected_poses (pose_name) VALUES (%s)"
-            cursor.execute(query, (pose_name,))
-            connection.commit()
-        connection.close()
-    except Exception as e:
-        print(f"Error menyimpan ke database: {e}")
+    # Tidak pernah menunggu database, baris masuk antrean db_writer
+    db_writer.submit((pose_name,))
 
-def fetch_pose_history():
+def fetch_pose_history(cursor=None, limit=DEFAULT_PAGE_SIZE, **filters):
+    """
+    Satu halaman riwayat (keyset pagination) -> (poses, next_cursor)
+    """
     try:
-        connection = get_db_connection()
-        with connection.cursor() as cursor:
-            query = "SELECT * FROM detected_poses ORDER BY id DESC"
-            cursor.execute(query)
-            poses = cursor.fetchall()
-        connection.close()
-        return poses
+        return fetch_history_page(get_db_connection, "*", cursor, limit, **filters)
     except Exception as e:
         print(f"Error mengambil data dari database: {e}")
-        return []
-
-def generate_frames(selected_pose=None):
-    cap = cv2.VideoCapture("langus.mp4")
-
-    pose_saved = False  # Supaya tidak terus-terusan simpan ke database
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(rgb_frame)
-
-        if results.pose_landmarks:
-            if not pose_saved and selected_pose is not None:
-                save_pose_to_db(selected_pose)
-                pose_saved = True  # Sudah simpan, supaya tidak duplikat terus menerus
-
-            # Menggambar kerangka tubuh
-            mp_drawing.draw_landmarks(
-                frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
-                mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
-                mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
-            )
-        else:
-            pose_saved = False  # Reset kalau tidak terdeteksi orang
-
-        # Encode frame ke JPEG
-        _, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-
-    cap.release()
+        return [], None
+
+def detect_pose(frame, pose):
+    # Deteksi pose di ROI dari sebaran landmark frame sebelumnya (konversi RGB hanya pada crop)
+    return frame, pose.detect(frame)
+
+def render_frame(packet, selected_pose, state):
+    # Frame dipakai bersama, salin sebelum digambari
+    frame = packet.frame.copy()
+    results = packet.results
+
+    if results.pose_landmarks:
+        if not state['pose_saved'] and selected_pose is not None:
+            save_pose_to_db(selected_pose)
+            state['pose_saved'] = True  # Sudah simpan, supaya tidak duplikat terus menerus
+
+        # Menggambar kerangka tubuh
+        mp_drawing.draw_landmarks(
+            frame, results.pose_landmarks, mp_pose.POSE_CONNECTIONS,
+            mp_drawing.DrawingSpec(color=(245, 117, 66), thickness=2, circle_radius=2),
+            mp_drawing.DrawingSpec(color=(245, 66, 230), thickness=2, circle_radius=2)
+        )
+    else:
+        state['pose_saved'] = False  # Reset kalau tidak terdeteksi orang
+
+    # Encode JPEG dilakukan oleh StreamEncoder milik penonton (lihat generate_frames)
+    return frame
+
+def generate_frames(selected_pose=None, capture_mode=CAPTURE_SEQUENTIAL, encoder=None):
+    # Capture, inferensi, dan render/encode berjalan di thread terpisah;
+    # semua penonton sumber yang sama berbagi tahap capture + inferensi
+    # Penonton pose yang sama juga berbagi render + encode JPEG (per tingkat kualitas)
+    state = {'pose_saved': False}
+    return capture_hub.stream("langus.mp4", detect_pose,
+                              lambda packet: render_frame(packet, selected_pose, state),
+                              capture_mode, encoder or StreamEncoder(),
+                              share_key=selected_pose)
 
 @app.route('/')
 def index():
@@ -104,12 +126,50 @@ def pose_page(pose):
 
 @app.route('/video_feed/<string:pose>')
 def video_feed(pose):
-    return Response(generate_frames(selected_pose=pose), mimetype='multipart/x-mixed-replace; boundary=frame')
+    # Pengaturan stream per penonton: ?quality=10-95&scale=0.1-1&fps=&adaptive=0|1&subsampling=444|422|420
+    try:
+        encoder = StreamEncoder(**parse_stream_args(request.args))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(generate_frames(selected_pose=pose, encoder=encoder), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+@app.route('/api/pipeline_stats')
+def api_pipeline_stats():
+    """
+    Kedalaman antrean tiap tahap pipeline (capture, inferensi, render/encode, database)
+    """
+    stats = capture_hub.stats()
+    stats['db_pool'] = db_pool.stats()
+    stats['db_writer'] = db_writer.stats()
+    return jsonify(stats)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """
+    Histogram waktu per tahap dan counter frame dalam format teks Prometheus
+    """
+    return Response(pipeline_metrics.REGISTRY.render(), content_type=pipeline_metrics.CONTENT_TYPE)
 
 @app.route('/history')
 def history():
-    poses = fetch_pose_history()
-    return render_template('history.html', poses=poses)
+    # Halaman berikutnya: /history?cursor=<next_cursor>, filter: pose, date_from, date_to, is_correct
+    try:
+        query = parse_history_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    poses, next_cursor = fetch_pose_history(**query)
+    return render_template('history.html', poses=poses, next_cursor=next_cursor, filters=request.args)
+
+@app.route('/api/history')
+def api_history():
+    """
+    Riwayat dalam JSON yang dikirim bertahap per potongan kecil (limit sampai 10000 baris)
+    """
+    try:
+        query = parse_history_args(request.args, max_limit=MAX_STREAM_ROWS)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(stream_history_json(get_db_connection, "*", **query), mimetype='application/json')
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,151 @@
+import io
+import threading
+
+import cv2
+
+# Chroma subsampling yang didukung semua backend.
+# 420: warna setengah resolusi horizontal + vertikal (paling kecil dan cepat),
+# 422: setengah horizontal, 444: tanpa subsampling (warna paling tajam)
+SUBSAMPLING = ('444', '422', '420')
+DEFAULT_SUBSAMPLING = '420'
+
+# Urutan pilihan backend untuk 'auto': binding libjpeg-turbo lebih dulu,
+# OpenCV selalu tersedia sebagai cadangan
+AUTO_ORDER = ('turbojpeg', 'simplejpeg', 'opencv', 'pillow')
+
+
+class OpenCVBackend:
+    """
+    cv2.imencode (libjpeg/libjpeg-turbo bawaan build OpenCV)
+    """
+    name = 'opencv'
+
+    _SAMPLING = {
+        '444': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444,
+        '422': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_422,
+        '420': cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420,
+    }
+
+    def encode(self, frame, quality, subsampling=DEFAULT_SUBSAMPLING):
+        ok, buffer = cv2.imencode('.jpg', frame, [
+            cv2.IMWRITE_JPEG_QUALITY, quality,
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR, self._SAMPLING[subsampling],
+        ])
+        return buffer if ok else None
+
+
+class TurboJPEGBackend:
+    """
+    PyTurboJPEG (pip install PyTurboJPEG, butuh libturbojpeg di sistem)
+    """
+    name = 'turbojpeg'
+
+    def __init__(self):
+        import turbojpeg
+        self._turbojpeg = turbojpeg
+        self._jpeg = turbojpeg.TurboJPEG()
+        self._sampling = {
+            '444': turbojpeg.TJSAMP_444,
+            '422': turbojpeg.TJSAMP_422,
+            '420': turbojpeg.TJSAMP_420,
+        }
+
+    def encode(self, frame, quality, subsampling=DEFAULT_SUBSAMPLING):
+        return self._jpeg.encode(frame, quality=quality, pixel_format=self._turbojpeg.TJPF_BGR,
+                                 jpeg_subsample=self._sampling[subsampling])
+
+
+class SimpleJPEGBackend:
+    """
+    simplejpeg (pip install simplejpeg, libjpeg-turbo sudah dibundel di wheel)
+    """
+    name = 'simplejpeg'
+
+    def __init__(self):
+        import simplejpeg
+        self._simplejpeg = simplejpeg
+
+    def encode(self, frame, quality, subsampling=DEFAULT_SUBSAMPLING):
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = frame.copy()
+        return self._simplejpeg.encode_jpeg(frame, quality=quality, colorspace='BGR',
+                                            colorsubsampling=subsampling)
+
+
+class PillowBackend:
+    """
+    Pillow / Pillow-SIMD. Frame BGR dibaca langsung lewat raw mode 'BGR',
+    tanpa konversi warna terpisah.
+    """
+    name = 'pillow'
+
+    _SAMPLING = {'444': 0, '422': 1, '420': 2}
+
+    def __init__(self):
+        from PIL import Image
+        self._image = Image
+
+    def encode(self, frame, quality, subsampling=DEFAULT_SUBSAMPLING):
+        if not frame.flags['C_CONTIGUOUS']:
+            frame = frame.copy()
+        height, width = frame.shape[:2]
+        image = self._image.frombuffer('RGB', (width, height), frame, 'raw', 'BGR', 0, 1)
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=quality, subsampling=self._SAMPLING[subsampling])
+        return output.getbuffer()
+
+
+BACKENDS = {
+    'opencv': OpenCVBackend,
+    'turbojpeg': TurboJPEGBackend,
+    'simplejpeg': SimpleJPEGBackend,
+    'pillow': PillowBackend,
+}
+
+
+def create_backend(name='auto'):
+    """
+    Buat backend berdasarkan nama. 'auto' memilih backend pertama yang
+    tersedia menurut AUTO_ORDER; RuntimeError berisi alasan tiap backend jika
+    tidak ada yang bisa dipakai. ImportError jika library backend tidak terpasang.
+    """
+    if name == 'auto':
+        failures = []
+        for candidate in AUTO_ORDER:
+            try:
+                return BACKENDS[candidate]()
+            except Exception as e:
+                failures.append(f"{candidate}: {e}")
+        raise RuntimeError(f"Tidak ada backend JPEG yang bisa dipakai ({'; '.join(failures)})")
+    if name not in BACKENDS:
+        raise ValueError(f"Backend JPEG {name} tidak dikenal, pilih salah satu: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def available_backends():
+    """
+    Nama backend yang bisa dipakai di mesin ini
+    """
+    names = []
+    for name in BACKENDS:
+        try:
+            BACKENDS[name]()
+        except Exception:
+            continue
+        names.append(name)
+    return names
+
+
+_default_backend = None
+_default_lock = threading.Lock()
+
+
+def default_backend():
+    """
+    Backend bersama untuk semua StreamEncoder yang tidak memilih backend sendiri
+    """
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            _default_backend = create_backend('auto')
+        return _default_backend
@@ -0,0 +1,254 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from pipeline import RingBuffer
+
+NUM_LANDMARKS = 33
+
+# Kolom per segmen, masing-masing satu file .npy: <segmen>.<kolom>.npy
+# correct: 1 benar, 0 salah, -1 tidak terdeteksi / tanpa gerakan
+# case: indeks kasus aturan yang cocok (kode feedback), -1 jika tidak ada
+COLUMNS = ('seq', 'timestamp', 'landmarks', 'correct', 'case')
+COLUMN_DTYPES = {'seq': np.int64, 'timestamp': np.float64, 'correct': np.int8, 'case': np.int16}
+
+
+class LandmarkRecorder:
+    """
+    Perekam landmark per frame ke direktori append-only.
+
+    Frame dikumpulkan di buffer yang dialokasikan sekali, lalu ditulis sebagai
+    satu segmen (.npy per kolom) setiap segment_frames frame atau setiap
+    flush_interval detik, mana yang lebih dulu. File ditulis ke nama sementara
+    lalu di-rename, jadi pembaca tidak pernah melihat segmen setengah jadi dan
+    paling banyak flush_interval detik rekaman hilang jika proses mati.
+
+    append() dipanggil dari thread render: segmen yang penuh hanya ditukar dengan
+    buffer cadangan di bawah lock, lalu ditulis ke disk oleh thread penulis
+    sendiri. append() baru menunggu jika pending_segments segmen masih antre untuk ditulis.
+
+    dtype float32 menyimpan landmark persis seperti yang dinilai classifier
+    saat live, jadi replay dengan aturan yang sama memberi putusan yang sama.
+    float16 memperkecil rekaman separuhnya, tetapi pembulatannya mengubah
+    putusan frame yang dekat batas sudut: jangan dipakai untuk replay yang harus persis.
+    """
+
+    def __init__(self, directory, pose=None, dtype=np.float32, segment_frames=900, flush_interval=10.0,
+                 pending_segments=2):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.segment_frames = segment_frames
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            with open(meta_path, 'w') as f:
+                json.dump({'pose': pose, 'dtype': self.dtype.name, 'created': time.time()}, f)
+
+        self._lock = threading.Lock()
+        self._written = threading.Condition(self._lock)
+        self._buffers = self._allocate()
+        self._spare = []  # buffer yang sudah selesai ditulis, dipakai ulang
+        self._count = 0
+        self._segment = len(segment_ids(directory))  # lanjutkan penomoran jika direktori sudah berisi
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._submitted = 0  # segmen yang diserahkan ke thread penulis
+        self._finished = 0  # segmen yang sudah ditulis (atau gagal ditulis)
+        self.frames_written = 0
+        self.segments_written = 0
+        self.frames_lost = 0
+        self._pending = RingBuffer(pending_segments)
+        self._writer = threading.Thread(target=self._write_segments, name=f"recorder-{directory}", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _allocate(self):
+        buffers = {name: np.empty(self.segment_frames, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        buffers['landmarks'] = np.empty((self.segment_frames, NUM_LANDMARKS, 4), dtype=self.dtype)
+        return buffers
+
+    def append(self, timestamp, points=None, correct=-1, case=-1, seq=-1):
+        """
+        Tambah satu frame. points: array (33, 4) atau None jika pose tidak terdeteksi.
+        """
+        segment = None
+        with self._lock:
+            if self._closed:
+                return
+            i = self._count
+            self._buffers['seq'][i] = seq
+            self._buffers['timestamp'][i] = timestamp
+            if points is None:
+                self._buffers['landmarks'][i] = np.nan
+            else:
+                self._buffers['landmarks'][i] = points
+            self._buffers['correct'][i] = correct
+            self._buffers['case'][i] = case
+            self._count += 1
+            if self._count == self.segment_frames or time.monotonic() - self._last_flush > self.flush_interval:
+                segment = self._swap()
+        if segment is not None:
+            self._pending.put(segment)
+
+    def _swap(self):
+        # Harus dipanggil dengan self._lock terkunci. Lepas buffer yang sudah terisi
+        # untuk thread penulis dan lanjut merekam di buffer cadangan.
+        # -> (nomor segmen, buffer, jumlah frame), atau None jika buffer kosong
+        self._last_flush = time.monotonic()
+        if self._count == 0:
+            return None
+        segment = (self._segment, self._buffers, self._count)
+        self._buffers = self._spare.pop() if self._spare else self._allocate()
+        self._segment += 1
+        self._count = 0
+        self._submitted += 1
+        return segment
+
+    def _write_segments(self):
+        for number, buffers, count in self._pending:
+            prefix = os.path.join(self.directory, f"{number:06d}")
+            written = False
+            try:
+                for name in COLUMNS:
+                    path = f"{prefix}.{name}.npy"
+                    with open(path + '.tmp', 'wb') as f:
+                        np.save(f, buffers[name][:count])
+                    os.replace(path + '.tmp', path)
+                written = True
+            except OSError as e:
+                print(f"Error menulis rekaman landmark {prefix}: {e}")
+            finally:
+                with self._lock:
+                    if written:
+                        self.frames_written += count
+                        self.segments_written += 1
+                    else:
+                        self.frames_lost += count
+                    self._spare.append(buffers)
+                    self._finished += 1
+                    self._written.notify_all()
+
+    def _submit_and_wait(self, segment):
+        if segment is not None:
+            self._pending.put(segment)
+        with self._lock:
+            self._written.wait_for(lambda: self._finished >= self._submitted)
+
+    def flush(self):
+        """
+        Tulis frame yang masih di buffer dan tunggu sampai semua segmen tersimpan
+        """
+        with self._lock:
+            segment = self._swap()
+        self._submit_and_wait(segment)
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            segment = self._swap()
+        self._submit_and_wait(segment)
+        self._pending.close()
+        self._writer.join()
+        atexit.unregister(self.close)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'frames_written': self.frames_written,
+                'frames_buffered': self._count,
+                'frames_lost': self.frames_lost,
+                'segments_written': self.segments_written,
+                'segments_pending': self._submitted - self._finished,
+            }
+
+
+def segment_ids(directory):
+    """
+    Segmen lengkap (semua kolom sudah ada) di direktori rekaman, urut
+    """
+    names = os.listdir(directory) if os.path.isdir(directory) else []
+    complete = set(name.split('.')[0] for name in names if name.endswith('.case.npy'))
+    return sorted(segment for segment in complete
+                  if all(f"{segment}.{column}.npy" in names for column in COLUMNS))
+
+
+class LandmarkRecording:
+    """
+    Pembaca rekaman LandmarkRecorder. Setiap segmen di-memory-map (np.load
+    mmap_mode='r'), jadi membuka rekaman panjang tidak membaca seluruh isinya
+    dan akses acak ke frame mana pun tanpa salinan.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.refresh()
+
+    def refresh(self):
+        """
+        Muat ulang daftar segmen (mis. saat rekaman masih berjalan)
+        """
+        self.segments = [
+            {name: np.load(os.path.join(self.directory, f"{segment}.{name}.npy"), mmap_mode='r')
+             for name in COLUMNS}
+            for segment in segment_ids(self.directory)
+        ]
+        lengths = [len(segment['seq']) for segment in self.segments]
+        self._offsets = np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+    @property
+    def pose(self):
+        return self.meta.get('pose')
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def _locate(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(f"Frame {index} di luar rekaman ({len(self)} frame)")
+        segment = int(np.searchsorted(self._offsets, index, side='right')) - 1
+        return segment, index - int(self._offsets[segment])
+
+    def __getitem__(self, index):
+        """
+        Satu frame sebagai dict kolom -> nilai (landmarks berupa view ke memmap)
+        """
+        segment, row = self._locate(index)
+        return {name: column[row] for name, column in self.segments[segment].items()}
+
+    def iter_segments(self):
+        """
+        Dict kolom -> memmap per segmen, tanpa salinan
+        """
+        return iter(self.segments)
+
+    def column(self, name, start=0, stop=None):
+        """
+        Satu kolom untuk rentang frame [start, stop). View jika rentang berada
+        dalam satu segmen, selain itu digabung (disalin).
+        """
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            if name == 'landmarks':
+                return np.empty((0, NUM_LANDMARKS, 4), dtype=self.meta['dtype'])
+            return np.empty(0, dtype=COLUMN_DTYPES[name])
+        first, first_row = self._locate(start)
+        last, last_row = self._locate(stop - 1)
+        if first == last:
+            return self.segments[first][name][first_row:last_row + 1]
+        parts = [self.segments[first][name][first_row:]]
+        parts.extend(self.segments[segment][name] for segment in range(first + 1, last))
+        parts.append(self.segments[last][name][:last_row + 1])
+        return np.concatenate(parts)
@@ -0,0 +1,51 @@
+import json
+
+import numpy as np
+
+
+def sse_event(data, event=None, event_id=None):
+    """
+    Satu pesan Server-Sent Events (text/event-stream)
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(',', ':')))
+    return ("\n".join(lines) + "\n\n").encode('utf-8')
+
+
+def landmark_payload(packet, points, is_correct=None, feedback=None, features=None,
+                     selected_pose=None, mirrored=False, precision=4):
+    """
+    Pesan ringkas per frame untuk klien yang menggambar overlay sendiri.
+
+    landmarks: array 33 x [x, y, z, visibility] ternormalisasi (0-1 relatif ke frame),
+    dibulatkan ke `precision` desimal supaya pesan tetap kecil. None jika tidak ada pose.
+    """
+    height, width = packet.frame.shape[:2]
+    message = {
+        'seq': packet.seq,
+        'timestamp': round(packet.timestamp, 3),
+        'width': width,
+        'height': height,
+        'mirrored': mirrored,
+        'pose': selected_pose,
+        'landmarks': None,
+    }
+    if points is not None:
+        message['landmarks'] = np.round(np.asarray(points, dtype=np.float64), precision).tolist()
+    if features is not None:
+        message['angles'] = {name: round(float(value), 1) for name, value in features.items()}
+    if is_correct is not None:
+        message['correct'] = bool(is_correct)
+        message['feedback'] = feedback
+    return message
+
+
+# Header respon SSE: matikan cache dan buffering proxy supaya pesan langsung terkirim
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no',
+}
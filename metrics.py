@@ -0,0 +1,221 @@
+import bisect
+import threading
+
+# Format teks Prometheus untuk endpoint /metrics
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Batas bucket (detik) untuk waktu per frame: 0.5 ms sampai 1 detik
+FRAME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+_enabled = True
+
+
+def set_enabled(enabled):
+    """
+    Matikan / nyalakan pencatatan. Saat mati, inc/observe langsung kembali.
+    """
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+
+class _CounterValue:
+    __slots__ = ('_lock', 'value')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def inc(self, amount=1):
+        if not _enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def samples(self):
+        return [('', {}, self.value)]
+
+
+class _GaugeValue(_CounterValue):
+    __slots__ = ()
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class _HistogramValue:
+    __slots__ = ('_lock', '_bounds', '_counts', '_sum')
+
+    def __init__(self, bounds):
+        self._lock = threading.Lock()
+        self._bounds = bounds
+        self._counts = [0] * (len(bounds) + 1)  # bucket terakhir: > batas terbesar
+        self._sum = 0.0
+
+    def observe(self, value):
+        if not _enabled:
+            return
+        index = bisect.bisect_left(self._bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self._bounds + (float('inf'),), counts):
+            cumulative += count
+            samples.append(('_bucket', {'le': _format_value(float(bound))}, cumulative))
+        samples.append(('_sum', {}, total))
+        samples.append(('_count', {}, cumulative))
+        return samples
+
+
+class Metric:
+    """
+    Satu metrik bernama, opsional dengan label. labels(...) mengembalikan nilai
+    per kombinasi label; simpan hasilnya untuk jalur panas supaya tidak
+    dicari ulang setiap frame.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        if not self.labelnames:
+            self._values[()] = self._new_value()
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **named):
+        if named:
+            values = tuple(named[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"Metrik {self.name} membutuhkan label {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        value = self._values.get(key)
+        if value is None:
+            with self._lock:
+                value = self._values.setdefault(key, self._new_value())
+        return value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            labels = dict(zip(self.labelnames, key))
+            for suffix, extra, sample in value.samples():
+                lines.append(f"{self.name}{suffix}{_format_labels({**labels, **extra})} {_format_value(sample)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self._values[()].inc(amount)
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def _new_value(self):
+        return _GaugeValue()
+
+    def inc(self, amount=1):
+        self._values[()].inc(amount)
+
+    def dec(self, amount=1):
+        self._values[()].dec(amount)
+
+    def set(self, value):
+        self._values[()].set(value)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=FRAME_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self._values[()].observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metrik {metric.name} sudah terdaftar")
+            self._metrics[metric.name] = metric
+
+    def render(self):
+        """
+        Semua metrik dalam format teks Prometheus
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# Metrik pipeline generate_frames(), dicatat langsung di tahapnya
+STAGE_SECONDS = Histogram('fitness_stage_seconds', 'Waktu per frame setiap tahap pipeline (detik)', ('stage',))
+DECODE_SECONDS = STAGE_SECONDS.labels('decode')
+INFERENCE_SECONDS = STAGE_SECONDS.labels('inference')
+CLASSIFY_SECONDS = STAGE_SECONDS.labels('classify')
+RENDER_SECONDS = STAGE_SECONDS.labels('render')
+ENCODE_SECONDS = STAGE_SECONDS.labels('encode')
+DB_WRITE_SECONDS = STAGE_SECONDS.labels('db_write')  # per batch, bukan per frame
+
+FRAMES_SERVED = Counter('fitness_frames_served_total', 'Frame yang dikirim ke penonton')
+FRAMES_DROPPED = Counter('fitness_frames_dropped_total', 'Frame yang dibuang karena tahap berikutnya tertinggal',
+                         ('stage',))
+CAPTURE_DROPPED = FRAMES_DROPPED.labels('capture')  # inferensi tertinggal (mode latest)
+RENDER_DROPPED = FRAMES_DROPPED.labels('render')  # render/encode tertinggal
+SEND_DROPPED = FRAMES_DROPPED.labels('send')  # penonton lambat menerima
+
+ACTIVE_STREAMS = Gauge('fitness_active_streams', 'Penonton stream yang sedang terhubung')
@@ -0,0 +1,114 @@
+import threading
+from collections import deque
+
+
+class RingBuffer:
+    """
+    Antrean terbatas antar tahap pipeline.
+
+    drop_oldest=False: put() menunggu jika penuh (backpressure ke tahap sebelumnya).
+    drop_oldest=True: put() membuang item tertua jika penuh (tidak pernah menunggu).
+    on_drop opsional dipanggil untuk setiap item yang dibuang (mis. counter metrik).
+    """
+
+    def __init__(self, maxsize, drop_oldest=False, on_drop=None):
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.on_drop = on_drop
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, item, timeout=None):
+        """
+        Masukkan item. False jika buffer sudah ditutup atau waktu tunggu habis.
+        """
+        with self._cond:
+            if self.drop_oldest:
+                while len(self._items) >= self.maxsize:
+                    self._items.popleft()
+                    self.dropped += 1
+                    if self.on_drop is not None:
+                        self.on_drop()
+            elif not self._cond.wait_for(lambda: len(self._items) < self.maxsize or self._closed, timeout):
+                return False
+            if self._closed:
+                return False
+            self._items.append(item)
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """
+        Ambil item tertua. None jika buffer ditutup dan kosong, atau waktu tunggu habis.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+    def __iter__(self):
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
+
+    def stats(self):
+        with self._cond:
+            return {
+                'depth': len(self._items),
+                'capacity': self.maxsize,
+                'dropped': self.dropped,
+            }
+
+
+class StageWorker(threading.Thread):
+    """
+    Satu tahap pipeline: ambil item dari inbox, proses dengan fn, kirim hasil ke outbox.
+    Outbox ditutup ketika inbox habis sehingga tahap berikutnya ikut berhenti.
+    Jika fn gagal, error disimpan di self.error dan inbox ikut ditutup supaya
+    tahap sebelumnya tidak menunggu selamanya.
+    """
+
+    def __init__(self, name, inbox, fn, outbox=None):
+        super().__init__(name=name, daemon=True)
+        self.inbox = inbox
+        self.fn = fn
+        self.outbox = outbox
+        self.processed = 0
+        self.error = None
+
+    def run(self):
+        try:
+            for item in self.inbox:
+                result = self.fn(item)
+                self.processed += 1
+                if self.outbox is not None and result is not None:
+                    if not self.outbox.put(result):
+                        break
+        except Exception as e:
+            print(f"Error di tahap pipeline {self.name}: {e}")
+            self.error = e
+            self.inbox.close()
+        finally:
+            if self.outbox is not None:
+                self.outbox.close()
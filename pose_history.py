@@ -0,0 +1,158 @@
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 200
+MAX_STREAM_ROWS = 10000
+
+
+def build_history_query(columns="*", cursor=None, limit=DEFAULT_PAGE_SIZE,
+                        pose_name=None, date_from=None, date_to=None, is_correct=None):
+    """
+    Query keyset: selalu ORDER BY id DESC dengan "id < cursor" sebagai pengganti
+    OFFSET, sehingga halaman ke-1000 sama cepatnya dengan halaman pertama.
+
+    Index di db_migrations untuk setiap kombinasi filter:
+      tanpa filter            -> primary key (id)
+      pose                    -> (pose_name, id)
+      is_correct              -> (is_correct, id)
+      pose + is_correct       -> (pose_name, is_correct, id)
+      pose + tanggal          -> (pose_name, timestamp, id)
+      is_correct + tanggal    -> (is_correct, timestamp, id)
+      tanggal saja            -> (timestamp, id) atau scan primary key
+    Dengan filter tanggal, baris di dalam rentang masih diurutkan menurut id.
+    """
+    where, params = [], []
+    if pose_name is not None:
+        where.append("pose_name = %s")
+        params.append(pose_name)
+    if is_correct is not None:
+        where.append("is_correct = %s")
+        params.append(int(is_correct))
+    if date_from is not None:
+        where.append("timestamp >= %s")
+        params.append(date_from)
+    if date_to is not None:
+        where.append("timestamp < %s")
+        params.append(date_to)
+    if cursor is not None:
+        where.append("id < %s")
+        params.append(cursor)
+
+    query = f"SELECT {columns} FROM detected_poses"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY id DESC LIMIT %s"
+    params.append(limit)
+    return query, params
+
+
+def fetch_history_page(get_connection, columns="*", cursor=None, limit=DEFAULT_PAGE_SIZE, **filters):
+    """
+    Satu halaman riwayat -> (rows, next_cursor). next_cursor None jika sudah halaman terakhir.
+    """
+    # Ambil satu baris lebih untuk tahu apakah masih ada halaman berikutnya
+    query, params = build_history_query(columns, cursor, limit + 1, **filters)
+    with get_connection() as connection, connection.cursor() as db_cursor:
+        db_cursor.execute(query, params)
+        rows = db_cursor.fetchall()
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1]['id']
+    return rows, None
+
+
+def iter_history(get_connection, columns="*", cursor=None, limit=DEFAULT_PAGE_SIZE,
+                 chunk_size=STREAM_CHUNK_SIZE, **filters):
+    """
+    Baca riwayat per potongan kecil. Koneksi hanya dipinjam selama satu potongan,
+    tidak selama respon dikirim ke klien. Item terakhir adalah next_cursor.
+    """
+    remaining = limit
+    while remaining > 0:
+        rows, next_cursor = fetch_history_page(
+            get_connection, columns, cursor, min(chunk_size, remaining), **filters
+        )
+        for row in rows:
+            yield row
+        remaining -= len(rows)
+        if next_cursor is None:
+            yield None
+            return
+        cursor = next_cursor
+    yield cursor
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', 'replace')
+    return str(value)
+
+
+def stream_history_json(get_connection, columns="*", **query):
+    """
+    Respon JSON {"poses": [...], "next_cursor": id} yang dikirim bertahap.
+    Jika database gagal di tengah respon, JSON tetap ditutup dengan field "error"
+    dan next_cursor menunjuk ke baris terakhir yang sudah terkirim.
+    """
+    yield '{"poses": ['
+    first = True
+    last_cursor = query.get('cursor')
+    try:
+        for row in iter_history(get_connection, columns, **query):
+            if isinstance(row, dict):
+                yield ('' if first else ',') + json.dumps(row, default=_json_default)
+                first = False
+                last_cursor = row.get('id', last_cursor)
+            else:
+                yield '], "next_cursor": ' + json.dumps(row) + '}'
+    except Exception as e:
+        # Header 200 sudah terkirim, jadi error dilaporkan di dalam JSON
+        print(f"Error mengambil data dari database: {e}")
+        yield '], "next_cursor": ' + json.dumps(last_cursor) + ', "error": ' + json.dumps(str(e)) + '}'
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"Parameter {name} harus berformat YYYY-MM-DD")
+
+
+def parse_history_args(args, max_limit=MAX_PAGE_SIZE):
+    """
+    Baca parameter riwayat dari request.args:
+    cursor, limit, pose, date_from, date_to (inklusif), is_correct (1/0/true/false)
+    """
+    query = {}
+    if args.get('cursor'):
+        try:
+            query['cursor'] = int(args['cursor'])
+        except ValueError:
+            raise ValueError("Parameter cursor harus berupa angka")
+    if args.get('limit'):
+        try:
+            limit = int(args['limit'])
+        except ValueError:
+            raise ValueError("Parameter limit harus berupa angka")
+        query['limit'] = min(max(limit, 1), max_limit)
+    if args.get('pose'):
+        query['pose_name'] = args['pose']
+    if args.get('date_from'):
+        query['date_from'] = _parse_date(args['date_from'], 'date_from')
+    if args.get('date_to'):
+        # Tanggal akhir inklusif: sampai sebelum tengah malam hari berikutnya
+        query['date_to'] = _parse_date(args['date_to'], 'date_to') + timedelta(days=1)
+    if args.get('is_correct'):
+        value = args['is_correct'].lower()
+        if value not in ('1', '0', 'true', 'false'):
+            raise ValueError("Parameter is_correct harus 1/0/true/false")
+        query['is_correct'] = value in ('1', 'true')
+    return query
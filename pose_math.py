@@ -0,0 +1,55 @@
+import numpy as np
+
+# Indeks landmark MediaPipe Pose (sama dengan mp_pose.PoseLandmark.*.value)
+NOSE = 0
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+LEFT_ANKLE = 27
+RIGHT_ANKLE = 28
+
+NUM_LANDMARKS = 33
+
+# Kolom array landmark
+X, Y, Z, VISIBILITY = 0, 1, 2, 3
+
+
+def landmarks_to_array(landmarks, out=None):
+    """
+    Konversi landmark MediaPipe ke array (33, 4) float32: x, y, z, visibility.
+    Cukup dipanggil sekali per frame.
+    """
+    # Biaya utamanya akses atribut protobuf (132 atribut, ~23 us per frame),
+    # jadi pakai hanya jika semua titik dibutuhkan (rekaman, stream landmark).
+    # Klasifikasi satu frame cukup membaca beberapa titik yang dipakai aturan.
+    points = np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks], dtype=np.float32)
+    if out is None:
+        return points.reshape(-1, 4)
+    out[:len(points)] = points
+    return out
+
+
+def calculate_angles(points, triples):
+    """
+    Hitung banyak sudut sendi sekaligus.
+
+    points  : array (33, 4) atau (N, 33, 4) untuk banyak frame
+    triples : array indeks (k, 3) berisi (a, b, c), sudut dihitung di titik b
+    Hasil   : sudut dalam derajat [0, 180] dengan bentuk (k,) atau (N, k)
+    """
+    a = points[..., triples[:, 0], :2]
+    b = points[..., triples[:, 1], :2]
+    c = points[..., triples[:, 2], :2]
+
+    radians = (np.arctan2(c[..., 1] - b[..., 1], c[..., 0] - b[..., 0])
+               - np.arctan2(a[..., 1] - b[..., 1], a[..., 0] - b[..., 0]))
+    # Rumus sama dengan calculate_angle skalar (radian * 180 / pi) supaya hasilnya identik
+    angles = np.abs(radians * 180.0 / np.pi)
+    return np.where(angles > 180.0, 360.0 - angles, angles)
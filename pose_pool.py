@@ -0,0 +1,152 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolExhausted(RuntimeError):
+    pass
+
+
+class Lease:
+    """
+    Bukti peminjaman satu estimator. Hanya pemegang lease ini yang bisa
+    mengembalikan estimatornya ke pool.
+    """
+    __slots__ = ('stream_id', 'estimator')
+
+    def __init__(self, stream_id, estimator):
+        self.stream_id = stream_id
+        self.estimator = estimator
+
+
+class EstimatorPool:
+    """
+    Pool instance estimator pose (mp_pose.Pose) per stream.
+
+    Setiap stream mendapat instance sendiri sehingga state tracking MediaPipe
+    tidak tercampur antar klien. Jumlah instance hidup dibatasi max_instances,
+    instance yang dilepas disimpan untuk dipakai ulang dan ditutup setelah
+    menganggur lebih dari idle_timeout detik.
+    """
+
+    def __init__(self, factory, max_instances=4, idle_timeout=60.0):
+        self.factory = factory
+        self.max_instances = max_instances
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._leased = {}  # Lease -> estimator
+        self._idle = []  # [(estimator, waktu_dilepas)]
+        self._live = 0  # jumlah instance yang sudah/sedang dibuat
+
+    def acquire(self, stream_id, timeout=None):
+        """
+        Pinjam estimator -> Lease (estimator ada di lease.estimator). Setiap
+        panggilan mendapat instance sendiri; stream_id hanya label. Kembalikan
+        dengan release(lease).
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        expired = []
+        try:
+            with self._cond:
+                while True:
+                    expired.extend(self._evict_idle())
+
+                    if self._idle:
+                        estimator, _ = self._idle.pop()
+                        lease = Lease(stream_id, estimator)
+                        self._leased[lease] = estimator
+                        break
+                    if self._live < self.max_instances:
+                        # Reservasi slot, instance dibuat di luar lock karena lambat
+                        self._live += 1
+                        estimator = None
+                        break
+
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PoolExhausted(f"Semua {self.max_instances} estimator pose sedang dipakai")
+                    self._cond.wait(remaining)
+        finally:
+            self._close_all(expired)
+
+        if estimator is None:
+            try:
+                estimator = self.factory()
+            except Exception:
+                with self._cond:
+                    self._live -= 1
+                    self._cond.notify()
+                raise
+            lease = Lease(stream_id, estimator)
+            with self._cond:
+                self._leased[lease] = estimator
+        else:
+            # Instance bekas stream lain: buang state tracking lama
+            reset = getattr(estimator, 'reset', None)
+            if reset is not None:
+                reset()
+        return lease
+
+    def release(self, lease):
+        """
+        Kembalikan estimator milik lease. Lease yang sudah dilepas diabaikan,
+        jadi estimator tidak pernah masuk daftar menganggur dua kali.
+        """
+        with self._cond:
+            estimator = self._leased.pop(lease, None)
+            if estimator is not None:
+                self._idle.append((estimator, time.monotonic()))
+                self._cond.notify()
+            expired = self._evict_idle()
+        self._close_all(expired)
+
+    @contextmanager
+    def lease(self, stream_id, timeout=None):
+        lease = self.acquire(stream_id, timeout)
+        try:
+            yield lease.estimator
+        finally:
+            self.release(lease)
+
+    def _evict_idle(self):
+        # Harus dipanggil dengan self._cond terkunci. Mengeluarkan instance yang
+        # terlalu lama menganggur; pemanggil menutupnya setelah lock dilepas
+        now = time.monotonic()
+        keep, expired = [], []
+        for estimator, released_at in self._idle:
+            if now - released_at > self.idle_timeout:
+                expired.append(estimator)
+            else:
+                keep.append((estimator, released_at))
+        if expired:
+            self._idle = keep
+            self._live -= len(expired)
+            self._cond.notify_all()
+        return expired
+
+    @staticmethod
+    def _close_all(estimators):
+        # Menutup instance MediaPipe bisa lambat, jangan dipanggil dengan lock pool terkunci
+        for estimator in estimators:
+            close = getattr(estimator, 'close', None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    print(f"Error menutup estimator pose: {e}")
+
+    def stats(self):
+        with self._cond:
+            return {
+                'live': self._live,
+                'leased': len(self._leased),
+                'idle': len(self._idle),
+                'max_instances': self.max_instances,
+            }
+
+    def close(self):
+        with self._cond:
+            idle = [estimator for estimator, _ in self._idle]
+            self._live -= len(idle)
+            self._idle = []
+        self._close_all(idle)
@@ -0,0 +1,120 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# Granularitas -> (tabel, format bucket)
+ROLLUP_TABLES = {
+    'hour': ('pose_rollup_hourly', '%Y-%m-%d %H:00:00'),
+    'day': ('pose_rollup_daily', '%Y-%m-%d'),
+}
+
+ROLLUP_COLUMNS = ('total', 'correct', 'sum_confidence', 'sum_visibility', 'sum_frame_accuracy')
+
+UPSERT_QUERY = """INSERT INTO {table}
+       (pose_name, bucket, total, correct, sum_confidence, sum_visibility, sum_frame_accuracy)
+       VALUES (%s, %s, %s, %s, %s, %s, %s)
+       ON DUPLICATE KEY UPDATE
+       total = total + VALUES(total),
+       correct = correct + VALUES(correct),
+       sum_confidence = sum_confidence + VALUES(sum_confidence),
+       sum_visibility = sum_visibility + VALUES(sum_visibility),
+       sum_frame_accuracy = sum_frame_accuracy + VALUES(sum_frame_accuracy)"""
+
+
+def _timestamp(value):
+    # Baris dari spill file membawa timestamp sebagai string
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value))
+
+
+def aggregate(rows):
+    """
+    Kelompokkan baris detected_poses per (granularitas, pose, bucket).
+
+    rows: tuple (pose_name, is_correct, feedback, detection_confidence,
+                 avg_visibility, frame_accuracy, timestamp) seperti yang
+                 dikirim save_pose_to_db ke db_writer
+    """
+    totals = defaultdict(lambda: [0, 0, 0.0, 0.0, 0.0])
+    for pose_name, is_correct, _, confidence, visibility, frame_accuracy, timestamp in rows:
+        timestamp = _timestamp(timestamp)
+        for granularity, (_, bucket_format) in ROLLUP_TABLES.items():
+            total = totals[(granularity, pose_name, timestamp.strftime(bucket_format))]
+            total[0] += 1
+            total[1] += 1 if is_correct else 0
+            total[2] += float(confidence or 0.0)
+            total[3] += float(visibility or 0.0)
+            total[4] += float(frame_accuracy or 0.0)
+    return totals
+
+
+def update_rollups(cursor, rows):
+    """
+    Tambahkan satu batch baris ke tabel rollup. Dipanggil db_writer di transaksi
+    yang sama dengan INSERT detected_poses, jadi rollup selalu konsisten.
+    """
+    grouped = defaultdict(list)
+    for (granularity, pose_name, bucket), total in aggregate(rows).items():
+        grouped[granularity].append((pose_name, bucket, *total))
+    for granularity, values in grouped.items():
+        table, _ = ROLLUP_TABLES[granularity]
+        cursor.executemany(UPSERT_QUERY.format(table=table), values)
+
+
+def _with_ratios(row):
+    total = row['total'] or 0
+    row = dict(row)
+    for column in ROLLUP_COLUMNS:
+        row[column] = float(row[column] or 0) if column.startswith('sum_') else int(row[column] or 0)
+    row['correct_ratio'] = row['correct'] / total if total else 0.0
+    row['mean_confidence'] = row['sum_confidence'] / total if total else 0.0
+    row['mean_visibility'] = row['sum_visibility'] / total if total else 0.0
+    row['mean_frame_accuracy'] = row['sum_frame_accuracy'] / total if total else 0.0
+    return row
+
+
+def fetch_rollup(get_connection, granularity='day', pose_name=None, since=None):
+    """
+    Baris rollup per bucket (terbaru dulu) beserta rasio benar dan rata-rata
+    """
+    table, bucket_format = ROLLUP_TABLES[granularity]
+    where, params = [], []
+    if pose_name is not None:
+        where.append("pose_name = %s")
+        params.append(pose_name)
+    if since is not None:
+        where.append("bucket >= %s")
+        params.append(since.strftime(bucket_format))
+    query = f"SELECT pose_name, bucket, {', '.join(ROLLUP_COLUMNS)} FROM {table}"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY bucket DESC, pose_name"
+    with get_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return [_with_ratios(row) for row in cursor.fetchall()]
+
+
+def fetch_pose_summary(get_connection, since=None):
+    """
+    Ringkasan per pose dari rollup harian (beberapa baris per pose, bukan scan riwayat)
+    """
+    table, bucket_format = ROLLUP_TABLES['day']
+    query = (f"SELECT pose_name, {', '.join(f'SUM({column}) AS {column}' for column in ROLLUP_COLUMNS)} "
+             f"FROM {table}")
+    params = []
+    if since is not None:
+        query += " WHERE bucket >= %s"
+        params.append(since.strftime(bucket_format))
+    query += " GROUP BY pose_name ORDER BY pose_name"
+    with get_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return [_with_ratios(row) for row in cursor.fetchall()]
+
+
+def dashboard_rollups(get_connection, days=30, hours=24):
+    now = datetime.now()
+    return {
+        'per_pose': fetch_pose_summary(get_connection, now - timedelta(days=days)),
+        'per_day': fetch_rollup(get_connection, 'day', since=now - timedelta(days=days)),
+        'per_hour': fetch_rollup(get_connection, 'hour', since=now - timedelta(hours=hours)),
+    }
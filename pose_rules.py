@@ -0,0 +1,689 @@
+import math
+import re
+import time
+
+import numpy as np
+
+from metrics import CLASSIFY_SECONDS
+from pose_math import (
+    NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST,
+    LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE,
+    X, Y, landmarks_to_array, calculate_angles,
+)
+
+
+# Jenis fitur yang bisa dipakai aturan
+def angle(a, b, c):
+    # Sudut sendi di titik b (derajat, 0-180)
+    return ('angle', a, b, c)
+
+def delta(axis, a, b):
+    # Selisih koordinat: titik a - titik b pada sumbu X atau Y
+    return ('delta', axis, a, b)
+
+def abs_delta(axis, a, b):
+    return ('abs_delta', axis, a, b)
+
+def distance(a, b):
+    # Jarak euclidean x-y antara dua titik
+    return ('distance', a, b)
+
+def mean(first, second):
+    # Rata-rata dua fitur yang sudah didefinisikan sebelumnya
+    return ('mean', first, second)
+
+def pick(condition, if_positive, otherwise):
+    # Pilih fitur if_positive jika fitur condition > 0, selain itu otherwise
+    return ('pick', condition, if_positive, otherwise)
+
+
+# Registry aturan gerakan.
+#   features : nama fitur -> definisi fitur (dihitung sekaligus per frame)
+#   benar    : pesan default untuk kasus benar
+#   salah    : pesan default untuk kasus salah
+#   cases    : dievaluasi berurutan, kasus pertama yang "when"-nya terpenuhi dipakai.
+#              Tanpa "when" berarti selalu terpenuhi. Jika tidak ada yang cocok,
+#              hasilnya salah dengan pesan "salah" tanpa detail.
+# Kondisi ditulis sebagai perbandingan rentang, digabung dengan "and" / "or"
+# ("and" lebih kuat dari "or"), contoh: "80 <= right_elbow <= 100 or left_elbow < 80".
+EXERCISE_RULES = {
+    # Otot Tangan
+    "Arm Press": {
+        "features": {
+            "right_elbow": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "left_elbow": angle(LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+        },
+        "benar": "Posisi Arm Press sudah benar!",
+        "salah": "Posisi Arm Press salah!",
+        "cases": [
+            # Siku harus ditekuk dengan sudut sekitar 90 derajat
+            {"when": "80 <= right_elbow <= 100 and 80 <= left_elbow <= 100", "correct": True},
+            {"when": "right_elbow < 80 or left_elbow < 80",
+             "detail": "Tekuk siku lebih dalam (sudut terlalu lebar)"},
+            {"when": "right_elbow > 100 or left_elbow > 100",
+             "detail": "Buka siku lebih lebar (sudut terlalu sempit)"},
+        ],
+    },
+    "Push up": {
+        "features": {
+            "elbow": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "body": angle(RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+        },
+        "benar": "Posisi Push Up sudah benar!",
+        "salah": "Posisi siku Push Up salah!",
+        "cases": [
+            # Siku ~90 derajat dan tubuh lurus
+            {"when": "70 <= elbow <= 110 and 160 <= body <= 190", "correct": True},
+            {"when": "70 <= elbow <= 110", "message": "Posisi tubuh Push Up salah!",
+             "detail": "Jaga tubuh tetap lurus, jangan menekuk pinggul"},
+            {"when": "elbow < 70", "detail": "Terlalu rendah, naikan posisi tubuh"},
+            {"detail": "Terlalu tinggi, turunkan posisi tubuh"},
+        ],
+    },
+    "plank": {
+        "features": {
+            "left_body": angle(LEFT_SHOULDER, LEFT_HIP, LEFT_ANKLE),
+            "right_body": angle(RIGHT_SHOULDER, RIGHT_HIP, RIGHT_ANKLE),
+        },
+        "benar": "Posisi Plank sudah benar!",
+        "salah": "Posisi Plank salah!",
+        "cases": [
+            # Tubuh harus lurus (sudut ~180 derajat)
+            {"when": "160 <= left_body <= 200 and 160 <= right_body <= 200", "correct": True},
+            {"when": "left_body < 160 or right_body < 160", "detail": "Pinggul terlalu rendah, angkat pinggul"},
+            {"detail": "Pinggul terlalu tinggi, turunkan pinggul"},
+        ],
+    },
+    "warrior-pose": {
+        "features": {
+            "left_knee": angle(LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+            "right_knee": angle(RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+        },
+        "benar": "Posisi Warrior Pose sudah benar!",
+        "salah": "Posisi Warrior Pose salah!",
+        "cases": [
+            # Satu lutut tekuk, satu lutut lurus
+            {"when": "80 <= left_knee <= 110 and right_knee >= 160"
+                     " or 80 <= right_knee <= 110 and left_knee >= 160", "correct": True},
+            {"detail": "Pastikan satu kaki ditekuk (~90°) dan kaki lain lurus"},
+        ],
+    },
+    "crunch": {
+        "features": {
+            "upper_body": angle(NOSE, LEFT_SHOULDER, LEFT_HIP),
+            "knee": angle(LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+        },
+        "benar": "Posisi Crunch sudah benar!",
+        "salah": "Posisi Crunch salah!",
+        "cases": [
+            # Tubuh atas terangkat, lutut ditekuk
+            {"when": "upper_body < 160 and knee < 130", "correct": True},
+            {"when": "knee >= 130", "detail": "Tekuk lutut lebih dalam"},
+            {"when": "upper_body >= 160", "detail": "Angkat tubuh atas lebih tinggi"},
+        ],
+    },
+    "bicep curl": {
+        "features": {
+            "right_elbow": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "left_elbow": angle(LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+        },
+        "benar": "Posisi Bicep Curl sudah benar!",
+        "salah": "Posisi Bicep Curl salah!",
+        "cases": [
+            # Siku ditekuk (<90 derajat)
+            {"when": "right_elbow < 90 or left_elbow < 90", "correct": True},
+            {"detail": "Tekuk siku lebih dalam saat mengangkat beban"},
+        ],
+    },
+    "pilates": {
+        "features": {
+            "hip": angle(LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+            "knee": angle(LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+        },
+        "benar": "Posisi Pilates sudah benar!",
+        "salah": "Posisi Pilates salah!",
+        "cases": [
+            # Tubuh tegak, kaki lurus
+            {"when": "160 <= hip <= 200 and 160 <= knee <= 200", "correct": True},
+            {"when": "knee < 160", "detail": "Luruskan kaki lebih baik"},
+            {"when": "hip < 160", "detail": "Tegakkan punggung, jangan menekuk"},
+        ],
+    },
+    "align": {
+        "features": {
+            "shoulder_hip_x": abs_delta(X, LEFT_SHOULDER, LEFT_HIP),
+            "hip_ankle_x": abs_delta(X, LEFT_HIP, LEFT_ANKLE),
+        },
+        "benar": "Posisi Align sudah benar!",
+        "salah": "Posisi Align salah!",
+        "cases": [
+            # Tubuh lurus (koordinat x harus hampir sama)
+            {"when": "shoulder_hip_x < 0.1 and hip_ankle_x < 0.1", "correct": True},
+            {"detail": "Sejajarkan bahu, pinggul dan pergelangan kaki"},
+        ],
+    },
+
+    # Otot Punggung
+    "cabble frontraise": {
+        "features": {
+            "arm": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "wrist_below_shoulder": delta(Y, RIGHT_WRIST, RIGHT_SHOULDER),
+        },
+        "benar": "Posisi Cabble Frontraise sudah benar!",
+        "salah": "Posisi Cabble Frontraise salah!",
+        "cases": [
+            # Posisi wrist harus lebih tinggi dari shoulder
+            {"when": "wrist_below_shoulder < 0 and 160 <= arm <= 200", "correct": True},
+            {"when": "arm < 160 or arm > 200", "detail": "Pertahankan lengan tetap lurus"},
+            {"when": "wrist_below_shoulder >= 0", "detail": "Angkat lengan lebih tinggi dari bahu"},
+        ],
+    },
+    "cabble row": {
+        "features": {
+            "elbow": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "shoulder_hip_elbow": angle(RIGHT_SHOULDER, RIGHT_HIP, RIGHT_ELBOW),
+        },
+        "benar": "Posisi Cabble Row sudah benar!",
+        "salah": "Posisi Cabble Row salah!",
+        "cases": [
+            # Siku ditekuk, torso maju
+            {"when": "elbow < 110 and shoulder_hip_elbow < 120", "correct": True},
+            {"when": "shoulder_hip_elbow >= 120", "detail": "Condongkan tubuh sedikit ke depan"},
+            {"when": "elbow >= 110", "detail": "Tarik siku lebih ke belakang"},
+        ],
+    },
+    "deltoid press": {
+        "features": {
+            "elbow": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "wrist_below_elbow": delta(Y, RIGHT_WRIST, RIGHT_ELBOW),
+        },
+        "benar": "Posisi Deltoid Press sudah benar!",
+        "salah": "Posisi Deltoid Press salah!",
+        "cases": [
+            # Lengan lurus ke atas
+            {"when": "160 <= elbow <= 200 and wrist_below_elbow < 0", "correct": True},
+            {"when": "wrist_below_elbow >= 0", "detail": "Angkat lengan lebih tinggi"},
+            {"when": "elbow < 160", "detail": "Luruskan lengan lebih baik"},
+        ],
+    },
+    "dumble row": {
+        "features": {
+            "elbow": angle(LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+            "body": angle(LEFT_SHOULDER, LEFT_HIP, LEFT_ELBOW),
+        },
+        "benar": "Posisi Dumble Row sudah benar!",
+        "salah": "Posisi Dumble Row salah!",
+        "cases": [
+            # Siku ditekuk, tubuh maju
+            {"when": "elbow < 100 and body < 120", "correct": True},
+            {"when": "body >= 120", "detail": "Condongkan tubuh lebih maju"},
+            {"when": "elbow >= 100", "detail": "Tekuk siku lebih dalam saat menarik"},
+        ],
+    },
+    "lets pulldown": {
+        "features": {
+            "right_elbow": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "left_elbow": angle(LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+        },
+        "benar": "Posisi Lat Pulldown sudah benar!",
+        "salah": "Posisi Lat Pulldown salah!",
+        "cases": [
+            # Siku ditekuk, tangan di sekitar bahu
+            {"when": "right_elbow < 120 and left_elbow < 120", "correct": True},
+            {"detail": "Tarik bar ke bawah hingga siku menekuk lebih dalam"},
+        ],
+    },
+    "t-bar row": {
+        "features": {
+            "elbow": angle(RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+            "body": angle(RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+        },
+        "benar": "Posisi T-Bar Row sudah benar!",
+        "salah": "Posisi T-Bar Row salah!",
+        "cases": [
+            # Siku ditekuk, tubuh condong ke depan
+            {"when": "elbow < 110 and body < 150", "correct": True},
+            {"when": "body >= 150", "detail": "Condongkan tubuh lebih ke depan"},
+            {"when": "elbow >= 110", "detail": "Tarik beban lebih ke atas"},
+        ],
+    },
+
+    # Otot Kaki
+    "hai squad": {
+        "features": {
+            "knee": angle(RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+        },
+        "benar": "Posisi High Squat sudah benar!",
+        "salah": "Posisi High Squat salah!",
+        "cases": [
+            # Lutut ditekuk tapi tidak terlalu dalam (120-150 derajat)
+            {"when": "120 <= knee <= 150", "correct": True},
+            {"when": "knee < 120", "detail": "Terlalu dalam, angkat sedikit tubuh"},
+            {"detail": "Terlalu tinggi, turunkan tubuh lebih dalam"},
+        ],
+    },
+    "langus": {
+        "features": {
+            "right_knee": angle(RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+            "left_knee": angle(LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+            "ankle_x_distance": abs_delta(X, RIGHT_ANKLE, LEFT_ANKLE),
+            # Kaki depan = kaki dengan lutut lebih rendah di gambar (y lebih besar)
+            "right_knee_lower": delta(Y, RIGHT_KNEE, LEFT_KNEE),
+            "right_knee_forward": delta(X, RIGHT_KNEE, RIGHT_ANKLE),
+            "left_knee_forward": delta(X, LEFT_KNEE, LEFT_ANKLE),
+            "front_knee": pick("right_knee_lower", "right_knee", "left_knee"),
+            "front_knee_forward": pick("right_knee_lower", "right_knee_forward", "left_knee_forward"),
+        },
+        "benar": "Posisi Lunges sudah benar!",
+        "salah": "Posisi Lunges salah!",
+        "cases": [
+            # Posisi berdiri tegak selalu dianggap benar (posisi awal/akhir)
+            {"when": "right_knee > 160 and left_knee > 160", "correct": True,
+             "detail": "Posisi awal/akhir lunges"},
+            # Posisi bawah yang sudah cukup dalam, lutut depan tidak boleh melewati ujung kaki
+            {"when": "front_knee < 110 and ankle_x_distance > 0.25 and front_knee_forward > 0.2",
+             "detail": "Lutut depan terlalu maju melewati ujung kaki"},
+            {"when": "front_knee < 110 and ankle_x_distance > 0.25", "correct": True,
+             "detail": "Posisi bawah lunges yang baik"},
+            # Posisi kurang dalam yang tidak bergerak dianggap salah.
+            # Rentang ini sama persis dengan kode lama (>= 140 dan <= 140), jadi hanya
+            # sudut tepat 140 derajat yang cocok; sudut 110-140 jatuh ke "Lanjutkan gerakan".
+            {"when": "140 <= front_knee <= 140 and ankle_x_distance > 0.2",
+             "detail": "Kurang ke bawah, turunkan tubuh dan tekuk lutut lebih dalam"},
+            # Ada langkah kaki tetapi belum jelas posisinya: dianggap sedang turun/naik
+            {"when": "front_knee > 140 and ankle_x_distance > 0.2", "correct": True,
+             "detail": "Mulai turun, teruskan gerakan"},
+            {"when": "ankle_x_distance > 0.2", "correct": True, "detail": "Lanjutkan gerakan"},
+            {"detail": "Belum melakukan gerakan lunges dengan benar"},
+        ],
+    },
+    "leg press": {
+        "features": {
+            "knee": angle(RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+        },
+        "benar": "Posisi Leg Press sudah benar!",
+        "salah": "Posisi Leg Press salah!",
+        "cases": [
+            # Lutut ditekuk (90-120 derajat)
+            {"when": "90 <= knee <= 120", "correct": True},
+            {"when": "knee < 90", "detail": "Terlalu dalam, bisa melukai lutut"},
+            {"detail": "Tekuk lutut lebih dalam"},
+        ],
+    },
+    "squad": {
+        "features": {
+            "right_knee": angle(RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+            "left_knee": angle(LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+            "avg_knee": mean("right_knee", "left_knee"),
+            "right_knee_forward": delta(X, RIGHT_KNEE, RIGHT_ANKLE),
+            "left_knee_forward": delta(X, LEFT_KNEE, LEFT_ANKLE),
+        },
+        "benar": "Posisi Squat sudah benar!",
+        "salah": "Posisi Squat perlu perbaikan",
+        "cases": [
+            # Posisi lutut tidak aman selalu salah
+            {"when": "right_knee_forward > 0.3 and left_knee_forward > 0.3",
+             "detail": "Lutut terlalu jauh ke depan, geser berat badan ke tumit"},
+            {"when": "avg_knee < 60", "detail": "Terlalu dalam, naikan sedikit posisi"},
+            {"when": "60 <= avg_knee < 80", "detail": "Kurang dalam, turunkan tubuh lebih rendah"},
+            # Semua posisi lainnya dianggap benar, dengan detail fase squat
+            {"when": "avg_knee > 170", "correct": True, "detail": "Posisi berdiri tegak"},
+            {"when": "130 <= avg_knee <= 170", "correct": True, "detail": "Posisi persiapan squat"},
+            {"when": "80 <= avg_knee < 130", "correct": True, "detail": "Posisi squat aktif"},
+            {"correct": True},
+        ],
+    },
+    "sumo squad": {
+        "features": {
+            "right_knee": angle(RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE),
+            "left_knee": angle(LEFT_HIP, LEFT_KNEE, LEFT_ANKLE),
+            "ankle_distance": distance(RIGHT_ANKLE, LEFT_ANKLE),
+        },
+        "benar": "Posisi Sumo Squat sudah benar!",
+        "salah": "Posisi Sumo Squat salah!",
+        "cases": [
+            # Lutut ditekuk dan kaki terbuka lebar
+            {"when": "90 <= right_knee <= 110 and 90 <= left_knee <= 110 and ankle_distance > 0.3",
+             "correct": True},
+            {"when": "right_knee < 90 or left_knee < 90", "detail": "Terlalu dalam, naikan posisi tubuh"},
+            {"when": "right_knee > 110 or left_knee > 110", "detail": "Tekuk lutut lebih dalam"},
+            {"when": "ankle_distance <= 0.3", "detail": "Buka kaki lebih lebar untuk posisi sumo yang benar"},
+        ],
+    },
+}
+
+
+_NUMBER = r"-?\d+(?:\.\d+)?"
+_NAME = r"[A-Za-z_]\w*"
+_OP = r"<=|>=|<|>"
+_RANGE = re.compile(rf"^({_NUMBER})\s*({_OP})\s*({_NAME})\s*({_OP})\s*({_NUMBER})$")
+_LEFT = re.compile(rf"^({_NAME})\s*({_OP})\s*({_NUMBER})$")
+_RIGHT = re.compile(rf"^({_NUMBER})\s*({_OP})\s*({_NAME})$")
+_FLIP = {'<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
+def _bound(op, value):
+    # Ubah "fitur op nilai" menjadi rentang inklusif [lo, hi]
+    if op == '<=':
+        return -np.inf, value
+    if op == '<':
+        return -np.inf, np.nextafter(value, -np.inf)
+    if op == '>=':
+        return value, np.inf
+    return np.nextafter(value, np.inf), np.inf
+
+
+def parse_condition(text):
+    """
+    Parse kondisi menjadi daftar grup OR, tiap grup berisi daftar (fitur, lo, hi) yang di-AND
+    """
+    groups = []
+    for group_text in text.split(' or '):
+        atoms = []
+        for atom in group_text.split(' and '):
+            atom = atom.strip()
+            match = _RANGE.match(atom)
+            if match:
+                low, op_low, name, op_high, high = match.groups()
+                lo, _ = _bound(_FLIP[op_low], float(low))
+                _, hi = _bound(op_high, float(high))
+                atoms.append((name, lo, hi))
+                continue
+            match = _LEFT.match(atom)
+            if match:
+                name, op, value = match.groups()
+                atoms.append((name,) + _bound(op, float(value)))
+                continue
+            match = _RIGHT.match(atom)
+            if match:
+                value, op, name = match.groups()
+                atoms.append((name,) + _bound(_FLIP[op], float(value)))
+                continue
+            raise ValueError(f"Kondisi aturan tidak valid: {atom!r}")
+        groups.append(atoms)
+    return groups
+
+
+class CompiledRule:
+    """
+    Aturan satu gerakan yang sudah dikompilasi menjadi tabel indeks dan rentang.
+
+    Satu frame (evaluate_landmarks, evaluate, evaluate_case, explain) dinilai
+    dengan matematika skalar: aturan hanya memakai 2-8 fitur, overhead NumPy
+    lebih mahal daripada hitungannya, dan hanya titik yang dipakai aturan yang
+    dibaca dari landmark MediaPipe. Banyak frame (features, match,
+    evaluate_batch) dihitung sekaligus sebagai operasi array (N, 33, 4).
+    Keduanya memakai float64 dan rumus yang sama.
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.feature_names = list(spec["features"])
+        column = {feature: i for i, feature in enumerate(self.feature_names)}
+
+        angle_cols, triples = [], []
+        delta_cols, delta_spec, delta_abs = [], [], []
+        distance_cols, distance_pairs = [], []
+        self._derived = []
+        # Program skalar: satu langkah per fitur, urut seperti feature_names
+        self._program = []
+        for feature, definition in spec["features"].items():
+            kind, args = definition[0], definition[1:]
+            col = column[feature]
+            if kind in ('mean', 'pick'):
+                self._program.append((kind,) + tuple(column[arg] for arg in args))
+            else:
+                self._program.append((kind,) + tuple(args))
+            if kind == 'angle':
+                angle_cols.append(col)
+                triples.append(args)
+            elif kind in ('delta', 'abs_delta'):
+                delta_cols.append(col)
+                delta_spec.append(args)
+                delta_abs.append(kind == 'abs_delta')
+            elif kind == 'distance':
+                distance_cols.append(col)
+                distance_pairs.append(args)
+            elif kind == 'mean':
+                self._derived.append((col, kind, [column[arg] for arg in args]))
+            elif kind == 'pick':
+                self._derived.append((col, kind, [column[arg] for arg in args]))
+            else:
+                raise ValueError(f"Jenis fitur tidak dikenal: {kind}")
+
+        self._angle_cols = np.array(angle_cols, dtype=np.intp)
+        self._triples = np.array(triples, dtype=np.intp).reshape(-1, 3)
+        delta_spec = np.array(delta_spec, dtype=np.intp).reshape(-1, 3)
+        self._delta_cols = np.array(delta_cols, dtype=np.intp)
+        self._delta_axis, self._delta_a, self._delta_b = delta_spec.T
+        self._delta_abs = np.array(delta_abs, dtype=bool)
+        distance_pairs = np.array(distance_pairs, dtype=np.intp).reshape(-1, 2)
+        self._distance_cols = np.array(distance_cols, dtype=np.intp)
+        self._distance_a, self._distance_b = distance_pairs.T
+        # Titik landmark yang dibaca aturan ini
+        self._landmarks = sorted(set(np.concatenate([
+            self._triples.ravel(), self._delta_a, self._delta_b, self._distance_a, self._distance_b,
+        ]).tolist()))
+
+        # Kondisi: atom (fitur, lo, hi) -> grup AND -> kasus OR
+        atoms, groups, case_groups = [], [], []
+        self.outcomes = []
+        for case in spec["cases"]:
+            parsed = parse_condition(case["when"]) if "when" in case else [[]]
+            case_groups.append([])
+            for group in parsed:
+                members = []
+                for feature, lo, hi in group:
+                    if feature not in column:
+                        raise ValueError(f"Fitur {feature!r} tidak ada di aturan {name!r}")
+                    members.append(len(atoms))
+                    atoms.append((column[feature], lo, hi))
+                case_groups[-1].append(len(groups))
+                groups.append(members)
+
+            is_correct = case.get("correct", False)
+            feedback = {"message": case.get("message", spec["benar"] if is_correct else spec["salah"])}
+            if case.get("detail"):
+                feedback["detail"] = case["detail"]
+            self.outcomes.append((is_correct, feedback))
+        self.fallback = (False, {"message": spec["salah"]})
+        # Kondisi untuk jalur skalar: per kasus, grup OR berisi atom (kolom, lo, hi) yang di-AND
+        self._scalar_cases = [
+            [[(atoms[a][0], float(atoms[a][1]), float(atoms[a][2])) for a in groups[g]] for g in members]
+            for members in case_groups
+        ]
+
+        self._atom_cols = np.array([atom[0] for atom in atoms], dtype=np.intp)
+        self._atom_lo = np.array([atom[1] for atom in atoms], dtype=np.float64)
+        self._atom_hi = np.array([atom[2] for atom in atoms], dtype=np.float64)
+        self._group_atoms = np.zeros((len(groups), len(atoms)), dtype=bool)
+        for g, members in enumerate(groups):
+            self._group_atoms[g, members] = True
+        self._case_groups = np.zeros((len(case_groups), len(groups)), dtype=bool)
+        for c, members in enumerate(case_groups):
+            self._case_groups[c, members] = True
+        self._case_correct = np.array([outcome[0] for outcome in self.outcomes], dtype=bool)
+
+    def features(self, points):
+        """
+        Vektor fitur (..., F) dari array landmark (..., 33, 4)
+        """
+        points = np.asarray(points, dtype=np.float64)
+        values = np.empty(points.shape[:-2] + (len(self.feature_names),), dtype=np.float64)
+        if self._angle_cols.size:
+            values[..., self._angle_cols] = calculate_angles(points, self._triples)
+        if self._delta_cols.size:
+            diff = points[..., self._delta_a, self._delta_axis] - points[..., self._delta_b, self._delta_axis]
+            values[..., self._delta_cols] = np.where(self._delta_abs, np.abs(diff), diff)
+        if self._distance_cols.size:
+            diff = points[..., self._distance_a, :2] - points[..., self._distance_b, :2]
+            values[..., self._distance_cols] = np.hypot(diff[..., 0], diff[..., 1])
+        for col, kind, args in self._derived:
+            if kind == 'mean':
+                values[..., col] = (values[..., args[0]] + values[..., args[1]]) / 2
+            else:
+                values[..., col] = np.where(values[..., args[0]] > 0, values[..., args[1]], values[..., args[2]])
+        return values
+
+    def match(self, values):
+        """
+        Indeks kasus pertama yang terpenuhi untuk tiap frame (-1 jika tidak ada)
+        """
+        atom_values = values[..., self._atom_cols]
+        atom_ok = (atom_values >= self._atom_lo) & (atom_values <= self._atom_hi)
+        group_ok = ~np.any(self._group_atoms & ~atom_ok[..., None, :], axis=-1)
+        case_ok = np.any(self._case_groups & group_ok[..., None, :], axis=-1)
+        return np.where(case_ok.any(axis=-1), case_ok.argmax(axis=-1), -1)
+
+    def _scalar_features(self, rows):
+        # rows[i] -> (x, y, ...) untuk setiap titik yang dipakai aturan
+        values = []
+        for step in self._program:
+            kind = step[0]
+            if kind == 'angle':
+                ax, ay = rows[step[1]][:2]
+                bx, by = rows[step[2]][:2]
+                cx, cy = rows[step[3]][:2]
+                radians = math.atan2(cy - by, cx - bx) - math.atan2(ay - by, ax - bx)
+                value = abs(radians * 180.0 / math.pi)
+                if value > 180.0:
+                    value = 360.0 - value
+            elif kind == 'delta':
+                value = rows[step[2]][step[1]] - rows[step[3]][step[1]]
+            elif kind == 'abs_delta':
+                value = abs(rows[step[2]][step[1]] - rows[step[3]][step[1]])
+            elif kind == 'distance':
+                ax, ay = rows[step[1]][:2]
+                bx, by = rows[step[2]][:2]
+                value = math.hypot(ax - bx, ay - by)
+            elif kind == 'mean':
+                value = (values[step[1]] + values[step[2]]) / 2
+            else:
+                value = values[step[2]] if values[step[1]] > 0 else values[step[3]]
+            values.append(value)
+        return values
+
+    def _scalar_match(self, values):
+        for case, groups in enumerate(self._scalar_cases):
+            for group in groups:
+                for col, lo, hi in group:
+                    if not lo <= values[col] <= hi:
+                        break
+                else:
+                    return case
+        return -1
+
+    def _outcome(self, case):
+        is_correct, feedback = self.outcomes[case] if case >= 0 else self.fallback
+        return is_correct, dict(feedback), case
+
+    def evaluate_landmarks(self, landmarks):
+        """
+        Klasifikasi langsung dari landmark MediaPipe -> (is_correct, feedback, case).
+        Hanya titik yang dipakai aturan yang dibaca (tanpa landmarks_to_array).
+        """
+        rows = {i: (landmarks[i].x, landmarks[i].y) for i in self._landmarks}
+        return self._outcome(self._scalar_match(self._scalar_features(rows)))
+
+    def evaluate(self, points):
+        """
+        Klasifikasi satu frame (33, 4) -> (is_correct, feedback)
+        """
+        is_correct, feedback, _ = self.evaluate_case(points)
+        return is_correct, feedback
+
+    def evaluate_case(self, points):
+        """
+        Seperti evaluate, ditambah indeks kasus yang cocok (kode feedback, -1 jika memakai fallback)
+        """
+        rows = np.asarray(points)[:, :2].tolist()
+        return self._outcome(self._scalar_match(self._scalar_features(rows)))
+
+    def explain(self, points):
+        """
+        Seperti evaluate, ditambah nilai fitur (sudut, jarak) yang dipakai aturan
+        """
+        values = self._scalar_features(np.asarray(points)[:, :2].tolist())
+        is_correct, feedback, _ = self._outcome(self._scalar_match(values))
+        return is_correct, feedback, dict(zip(self.feature_names, values))
+
+    def evaluate_batch(self, points):
+        """
+        Klasifikasi banyak frame (N, 33, 4) -> (array is_correct, array indeks kasus)
+        """
+        cases = self.match(self.features(points))
+        correct = np.where(cases >= 0, self._case_correct[cases], False)
+        return correct, cases
+
+
+def compile_rules(rules=None):
+    """
+    Kompilasi registry aturan menjadi dict nama gerakan -> CompiledRule
+    """
+    rules = EXERCISE_RULES if rules is None else rules
+    return {name: CompiledRule(name, spec) for name, spec in rules.items()}
+
+
+# Dimuat dan dikompilasi sekali saat startup
+COMPILED_RULES = compile_rules()
+
+# app2 sejak awal menerima squat dengan rata-rata lutut 60-80 derajat sebagai benar
+# (cek "kurang dalam" di sana tidak pernah tercapai), jadi kasus itu tidak dipakai
+LENIENT_SQUAT_RULES = compile_rules({
+    **EXERCISE_RULES,
+    "squad": {
+        **EXERCISE_RULES["squad"],
+        "cases": [case for case in EXERCISE_RULES["squad"]["cases"]
+                  if case.get("when") != "60 <= avg_knee < 80"],
+    },
+})
+
+
+def classify_points(points, selected_pose, rules=COMPILED_RULES):
+    rule = rules.get(selected_pose)
+    if rule is None:
+        return False, {"message": f"Gerakan {selected_pose} tidak dikenali"}
+    start = time.perf_counter()
+    result = rule.evaluate(points)
+    CLASSIFY_SECONDS.observe(time.perf_counter() - start)
+    return result
+
+
+def classify_points_case(points, selected_pose, rules=COMPILED_RULES):
+    rule = rules.get(selected_pose)
+    if rule is None:
+        return False, {"message": f"Gerakan {selected_pose} tidak dikenali"}, -1
+    start = time.perf_counter()
+    result = rule.evaluate_case(points)
+    CLASSIFY_SECONDS.observe(time.perf_counter() - start)
+    return result
+
+
+def explain_points(points, selected_pose, rules=COMPILED_RULES):
+    rule = rules.get(selected_pose)
+    if rule is None:
+        return False, {"message": f"Gerakan {selected_pose} tidak dikenali"}, {}
+    return rule.explain(points)
+
+
+# Fungsi untuk mengklasifikasikan gerakan berdasarkan pose tertentu
+def classify_pose(landmarks, selected_pose, rules=COMPILED_RULES):
+    """
+    Cari aturan lewat dict (bukan rantai if/elif), lalu evaluasi langsung dari
+    titik landmark yang dipakai aturan
+    """
+    is_correct, feedback, _ = classify_pose_case(landmarks, selected_pose, rules)
+    return is_correct, feedback
+
+
+def classify_pose_case(landmarks, selected_pose, rules=COMPILED_RULES):
+    """
+    Seperti classify_pose, ditambah indeks kasus yang cocok (-1 jika tidak ada)
+    """
+    rule = rules.get(selected_pose)
+    if rule is None:
+        return False, {"message": f"Gerakan {selected_pose} tidak dikenali"}, -1
+    start = time.perf_counter()
+    result = rule.evaluate_landmarks(landmarks)
+    CLASSIFY_SECONDS.observe(time.perf_counter() - start)
+    return result
@@ -0,0 +1,203 @@
+"""
+Nilai ulang rekaman landmark dengan versi aturan lain, tanpa decode video dan
+tanpa inferensi, lalu laporkan frame yang putusannya berubah.
+
+    # Aturan baru (file .py yang mendefinisikan EXERCISE_RULES) vs pose_rules saat ini
+    python replay.py recordings/ --rules rules_v2.py
+
+    # Dua versi aturan
+    python replay.py recordings/abc-1760000000 analysis/squad.npz \\
+        --baseline rules_v1.py --rules rules_v2.py --json diff.json
+
+Masukan: direktori LandmarkRecorder (recordings/<sesi>) atau hasil
+analyze_videos.py (.npz). Semua frame terdeteksi dinilai sekaligus per
+segmen dengan CompiledRule.evaluate_batch.
+
+Kedua sisi dinilai ulang dari landmark tersimpan yang sama, jadi perbedaan
+yang dilaporkan hanya berasal dari perubahan aturan. --baseline recorded
+membandingkan dengan putusan live yang tercatat; hasilnya ikut memuat selisih
+karena pembulatan penyimpanan (mis. rekaman float16), bukan hanya karena aturan.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import time
+from collections import Counter
+
+import numpy as np
+
+from landmark_recorder import LandmarkRecording
+from pose_rules import COMPILED_RULES, compile_rules
+
+
+def load_rules(path=None):
+    """
+    Aturan terkompilasi dari file .py yang mendefinisikan EXERCISE_RULES
+    (None: aturan pose_rules yang sedang dipakai)
+    """
+    if path is None:
+        return COMPILED_RULES
+    name = "rules_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return compile_rules(module.EXERCISE_RULES)
+
+
+def find_sessions(paths):
+    sessions = []
+    for path in paths:
+        if os.path.isdir(path) and not os.path.exists(os.path.join(path, 'meta.json')):
+            sessions.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                            if os.path.exists(os.path.join(path, name, 'meta.json')) or name.endswith('.npz'))
+        else:
+            sessions.append(path)
+    return sessions
+
+
+def load_session(path):
+    """
+    -> (pose, daftar segmen dict kolom -> array). Rekaman LandmarkRecorder
+    tetap berupa memmap per segmen; .npz dibaca sebagai satu segmen.
+    """
+    if path.endswith('.npz'):
+        data = np.load(path)
+        segment = {name: data[name] for name in ('landmarks', 'correct', 'case')}
+        return str(data['pose']) or None, [segment]
+    recording = LandmarkRecording(path)
+    return recording.pose, list(recording.iter_segments())
+
+
+def score(segments, rule):
+    """
+    Nilai semua segmen dengan satu aturan -> (detected, correct, case).
+    correct: 1/0, -1 untuk frame tanpa pose
+    """
+    detected, correct, case = [], [], []
+    for segment in segments:
+        # Rekaman float16 (lama) dinaikkan ke float32 seperti saat live
+        landmarks = np.asarray(segment['landmarks'], dtype=np.float32)
+        mask = ~np.isnan(landmarks[:, 0, 0])
+        segment_correct = np.full(len(landmarks), -1, dtype=np.int8)
+        segment_case = np.full(len(landmarks), -1, dtype=np.int16)
+        if mask.any():
+            batch_correct, batch_case = rule.evaluate_batch(landmarks[mask])
+            segment_correct[mask] = batch_correct
+            segment_case[mask] = batch_case
+        detected.append(mask)
+        correct.append(segment_correct)
+        case.append(segment_case)
+    if not detected:
+        return np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int16)
+    return np.concatenate(detected), np.concatenate(correct), np.concatenate(case)
+
+
+def recorded_verdicts(segments):
+    correct = np.concatenate([np.asarray(segment['correct']) for segment in segments])
+    case = np.concatenate([np.asarray(segment['case']) for segment in segments])
+    return correct.astype(np.int8), case.astype(np.int16)
+
+
+def case_label(rule, case):
+    if rule is None:
+        return "-"
+    is_correct, feedback = rule.outcomes[case] if case >= 0 else rule.fallback
+    label = feedback.get("detail") or feedback.get("message")
+    return f"{'benar' if is_correct else 'salah'}: {label}"
+
+
+def diff_verdicts(detected, base_correct, base_case, new_correct, new_case, base_rule, new_rule, top=10):
+    """
+    Ringkasan perubahan putusan antara dua penilaian frame yang sama
+    """
+    graded = detected & (base_correct >= 0) & (new_correct >= 0)
+    to_incorrect = graded & (base_correct == 1) & (new_correct == 0)
+    to_correct = graded & (base_correct == 0) & (new_correct == 1)
+    case_changed = graded & (base_case != new_case)
+    transitions = Counter(zip(base_case[case_changed].tolist(), new_case[case_changed].tolist()))
+    return {
+        'frames': int(len(detected)),
+        'detected': int(detected.sum()),
+        'graded': int(graded.sum()),
+        'baseline_accuracy': float(base_correct[graded].mean() * 100) if graded.any() else 0.0,
+        'candidate_accuracy': float(new_correct[graded].mean() * 100) if graded.any() else 0.0,
+        'correct_to_incorrect': int(to_incorrect.sum()),
+        'incorrect_to_correct': int(to_correct.sum()),
+        'feedback_changed': int(case_changed.sum()),
+        'changed_frames': np.flatnonzero(to_incorrect | to_correct)[:top].tolist(),
+        'transitions': [
+            {'from': case_label(base_rule, before), 'to': case_label(new_rule, after), 'frames': count}
+            for (before, after), count in transitions.most_common(top)
+        ],
+    }
+
+
+def replay_session(path, new_rules, base_rules=COMPILED_RULES, pose=None):
+    session_pose, segments = load_session(path)
+    pose = pose or session_pose
+    new_rule = new_rules.get(pose)
+    if new_rule is None:
+        return {'session': path, 'pose': pose, 'error': f"Gerakan {pose} tidak dikenali"}
+
+    start = time.perf_counter()
+    detected, new_correct, new_case = score(segments, new_rule)
+    if base_rules is None:
+        # --baseline recorded: putusan yang tercatat saat sesi direkam
+        base_rule = COMPILED_RULES.get(pose)
+        base_correct, base_case = recorded_verdicts(segments)
+    else:
+        base_rule = base_rules.get(pose)
+        if base_rule is None:
+            return {'session': path, 'pose': pose, 'error': f"Gerakan {pose} tidak ada di aturan pembanding"}
+        _, base_correct, base_case = score(segments, base_rule)
+    elapsed = time.perf_counter() - start
+
+    report = diff_verdicts(detected, base_correct, base_case, new_correct, new_case, base_rule, new_rule)
+    report.update({
+        'session': path,
+        'pose': pose,
+        'frames_per_second': report['frames'] / elapsed if elapsed > 0 else 0.0,
+    })
+    return report
+
+
+def print_report(report):
+    if 'error' in report:
+        print(f"{report['session']}: {report['error']}")
+        return
+    print(f"{report['session']} [{report['pose']}] {report['frames']} frame, {report['graded']} dinilai, "
+          f"{report['frames_per_second']:.0f} frame/detik")
+    print(f"  akurasi {report['baseline_accuracy']:.1f}% -> {report['candidate_accuracy']:.1f}%, "
+          f"benar->salah {report['correct_to_incorrect']}, salah->benar {report['incorrect_to_correct']}, "
+          f"feedback berubah {report['feedback_changed']}")
+    for transition in report['transitions']:
+        print(f"    {transition['frames']:>6}  {transition['from']}  ->  {transition['to']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='+', help='direktori rekaman, direktori berisi rekaman, atau file .npz')
+    parser.add_argument('--rules', required=True, help='aturan yang diuji')
+    parser.add_argument('--baseline', help="aturan pembanding (default: pose_rules saat ini), "
+                                           "atau 'recorded' untuk putusan live yang tercatat")
+    parser.add_argument('--pose', help='paksa nama gerakan untuk semua sesi')
+    parser.add_argument('--json', help='simpan laporan lengkap ke file JSON')
+    args = parser.parse_args()
+
+    new_rules = load_rules(args.rules)
+    base_rules = None if args.baseline == 'recorded' else load_rules(args.baseline)
+
+    reports = []
+    for path in find_sessions(args.inputs):
+        report = replay_session(path, new_rules, base_rules, args.pose)
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
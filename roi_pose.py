@@ -0,0 +1,168 @@
+import cv2
+import numpy as np
+
+
+def landmark_box(landmarks, width, height, min_visibility=0.5):
+    """
+    Box (x1, y1, x2, y2) dalam piksel dari sebaran landmark yang terlihat
+    """
+    points = np.array([(landmark.x, landmark.y, landmark.visibility) for landmark in landmarks])
+    visible = points[points[:, 2] > min_visibility]
+    if len(visible) < 2:
+        visible = points
+    # Landmark boleh diprediksi di luar frame, potong dulu ke tepi frame
+    xs = np.clip(visible[:, 0], 0.0, 1.0) * width
+    ys = np.clip(visible[:, 1], 0.0, 1.0) * height
+    return (xs.min(), ys.min(), xs.max(), ys.max())
+
+
+class RoiPoseEstimator:
+    """
+    Pembungkus mp_pose.Pose yang menjalankan inferensi hanya di area sekitar orang (ROI).
+
+    - area diambil dari hint_box (mis. bounding box YOLO) atau dari sebaran landmark
+      frame sebelumnya, diperlebar dengan margin
+    - hanya crop yang dikonversi ke RGB dan dikirim ke MediaPipe, lalu koordinat
+      landmark dipetakan kembali ke koordinat frame penuh
+    - jika pose tidak ditemukan di crop, inferensi diulang di frame penuh dan ROI dilepas;
+      crop baru dicoba lagi setelah retry_after frame supaya frame berikutnya tidak
+      menjalankan inferensi dua kali
+    - ROI tidak digeser selama orang masih berada di dalamnya, supaya tracking
+      MediaPipe antar frame tetap stabil
+    - tracking MediaPipe menyimpan posisi dalam koordinat gambar yang diterimanya,
+      jadi Pose di-reset setiap kali gambar masukan berganti (frame penuh <-> crop,
+      atau crop diperlebar / dipindah lebih dari rect_tolerance)
+
+    Instance menyimpan state per stream, jadi dibuat lewat EstimatorPool
+    seperti mp_pose.Pose biasa.
+    """
+
+    def __init__(self, pose, margin=0.25, min_size=96, min_visibility=0.5, max_area_ratio=0.8,
+                 retry_after=15, rect_tolerance=0.05):
+        self.pose = pose
+        self.margin = margin  # tambahan lebar/tinggi di tiap sisi, relatif ke ukuran box
+        self.min_size = min_size  # crop lebih kecil dari ini dianggap tidak valid
+        self.min_visibility = min_visibility
+        self.max_area_ratio = max_area_ratio  # crop hampir sebesar frame -> pakai frame penuh
+        self.retry_after = retry_after  # frame penuh setelah crop gagal sebelum crop dicoba lagi
+        self.rect_tolerance = rect_tolerance  # pergeseran tepi relatif ke ukuran gambar sebelumnya
+        self.roi = None  # (x1, y1, x2, y2) dalam piksel frame penuh
+        self._input_rect = None  # area frame yang terakhir dikirim ke Pose
+        self._skip_roi = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.fallbacks = 0
+        self.tracking_resets = 0
+
+    def detect(self, frame, hint_box=None):
+        """
+        Deteksi pose pada frame BGR. Hasil sama dengan pose.process(rgb_frame penuh):
+        landmark ternormalisasi terhadap frame penuh.
+        """
+        height, width = frame.shape[:2]
+        if hint_box is not None and not self._contains(self.roi, hint_box):
+            self.roi = self._expand(hint_box, width, height)
+
+        if self._skip_roi > 0:
+            # Crop baru saja gagal: tetap di frame penuh, ROI tetap diperbarui dari landmark
+            self._skip_roi -= 1
+        elif self.roi is not None:
+            x1, y1, x2, y2 = self.roi
+            self._switch_input(self.roi)
+            rgb_crop = cv2.cvtColor(frame[y1:y2, x1:x2], cv2.COLOR_BGR2RGB)
+            results = self.pose.process(rgb_crop)
+            if results.pose_landmarks:
+                self.roi_frames += 1
+                self._to_full_frame(results.pose_landmarks.landmark, self.roi, width, height)
+                self._follow(results.pose_landmarks.landmark, width, height)
+                return results
+            # Orang keluar dari ROI: ulangi di frame penuh
+            self.fallbacks += 1
+            self.roi = None
+            self._skip_roi = self.retry_after
+
+        self.full_frames += 1
+        self._switch_input((0, 0, width, height))
+        results = self.pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        if results.pose_landmarks:
+            self._follow(results.pose_landmarks.landmark, width, height)
+        return results
+
+    def _switch_input(self, rect):
+        # Reset tracking Pose jika area masukan berbeda dari frame sebelumnya
+        previous, self._input_rect = self._input_rect, rect
+        if previous is None or previous == rect:
+            return
+        tolerance_x = (previous[2] - previous[0]) * self.rect_tolerance
+        tolerance_y = (previous[3] - previous[1]) * self.rect_tolerance
+        if (abs(rect[0] - previous[0]) > tolerance_x or abs(rect[2] - previous[2]) > tolerance_x or
+                abs(rect[1] - previous[1]) > tolerance_y or abs(rect[3] - previous[3]) > tolerance_y):
+            self.tracking_resets += 1
+            self._reset_pose()
+        else:
+            # Perubahan kecil: tetap dianggap gambar yang sama, tracking tidak diputus
+            self._input_rect = previous
+
+    def _expand(self, box, width, height):
+        # Perlebar box dengan margin dan potong di tepi frame. None jika tidak layak dipakai.
+        x1, y1, x2, y2 = box
+        margin_x = (x2 - x1) * self.margin
+        margin_y = (y2 - y1) * self.margin
+        x1 = max(int(x1 - margin_x), 0)
+        y1 = max(int(y1 - margin_y), 0)
+        x2 = min(int(x2 + margin_x), width)
+        y2 = min(int(y2 + margin_y), height)
+        if x2 - x1 < self.min_size or y2 - y1 < self.min_size:
+            return None
+        if (x2 - x1) * (y2 - y1) > self.max_area_ratio * width * height:
+            return None
+        return (x1, y1, x2, y2)
+
+    @staticmethod
+    def _contains(roi, box):
+        if roi is None:
+            return False
+        return roi[0] <= box[0] and roi[1] <= box[1] and box[2] <= roi[2] and box[3] <= roi[3]
+
+    @staticmethod
+    def _to_full_frame(landmarks, roi, width, height):
+        x1, y1, x2, y2 = roi
+        scale_x = (x2 - x1) / width
+        scale_y = (y2 - y1) / height
+        offset_x = x1 / width
+        offset_y = y1 / height
+        for landmark in landmarks:
+            landmark.x = offset_x + landmark.x * scale_x
+            landmark.y = offset_y + landmark.y * scale_y
+            # z memakai skala yang sama dengan x
+            landmark.z = landmark.z * scale_x
+
+    def _follow(self, landmarks, width, height):
+        # Sebaran landmark yang terlihat -> box orang; ROI hanya diganti jika orang keluar dari ROI
+        box = landmark_box(landmarks, width, height, self.min_visibility)
+        if not self._contains(self.roi, box):
+            self.roi = self._expand(box, width, height)
+
+    def _reset_pose(self):
+        reset = getattr(self.pose, 'reset', None)
+        if reset is not None:
+            reset()
+
+    def reset(self):
+        # Dipanggil EstimatorPool saat instance dipakai stream lain
+        self.roi = None
+        self._input_rect = None
+        self._skip_roi = 0
+        self._reset_pose()
+
+    def close(self):
+        self.pose.close()
+
+    def stats(self):
+        return {
+            'roi': self.roi,
+            'roi_frames': self.roi_frames,
+            'full_frames': self.full_frames,
+            'fallbacks': self.fallbacks,
+            'tracking_resets': self.tracking_resets,
+        }
@@ -0,0 +1,143 @@
+import threading
+import time
+
+import numpy as np
+
+
+class RollingWindow:
+    """
+    Jendela N nilai terakhir di array NumPy yang dialokasikan sekali.
+    push() O(1): jumlah dan jumlah kuadrat diperbarui berjalan, tanpa
+    menghitung ulang seluruh jendela. Jumlah dihitung ulang tiap kali
+    jendela berputar penuh supaya galat floating point tidak menumpuk.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._values = np.zeros(size, dtype=np.float64)
+        self._index = 0
+        self.count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+    def push(self, value):
+        value = float(value)
+        if self.count == self.size:
+            old = self._values[self._index]
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self.count += 1
+        self._values[self._index] = value
+        self._sum += value
+        self._sumsq += value * value
+        self._index += 1
+        if self._index == self.size:
+            self._index = 0
+            self._sum = float(self._values.sum())
+            self._sumsq = float(np.dot(self._values, self._values))
+
+    @property
+    def mean(self):
+        return self._sum / self.count if self.count else 0.0
+
+    @property
+    def variance(self):
+        if not self.count:
+            return 0.0
+        mean = self._sum / self.count
+        return max(self._sumsq / self.count - mean * mean, 0.0)
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    def values(self):
+        # Salinan isi jendela, urut dari yang terlama
+        if self.count < self.size:
+            return self._values[:self.count].copy()
+        return np.roll(self._values, -self._index)
+
+    def clear(self):
+        self._index = 0
+        self.count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+
+
+class RollingMetrics:
+    """
+    Metrik akurasi dengan memori tetap.
+
+    update() dipanggil sekali per frame oleh thread render. Setiap update
+    menghasilkan snapshot dict baru yang menggantikan referensi lama
+    sekaligus, jadi pembaca (overlay, /api/accuracy_stats) cukup mengambil
+    snapshot tanpa lock dan tanpa menghitung ulang.
+    """
+
+    def __init__(self, window=100):
+        self.window = window
+        self._lock = threading.Lock()  # hanya untuk penulis
+        self._confidence = RollingWindow(window)
+        self._visibility = RollingWindow(window)
+        self._detected = RollingWindow(window)  # 1/0 per frame
+        self._correct = RollingWindow(window)  # 1/0 per frame yang terdeteksi
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.total_frames = 0
+            self.detected_frames = 0
+            self.correct_poses = 0
+            self.incorrect_poses = 0
+            self.session_start_time = time.time()
+            for window in (self._confidence, self._visibility, self._detected, self._correct):
+                window.clear()
+            self._publish()
+
+    def update(self, is_detected, is_correct, accuracy_data=None):
+        with self._lock:
+            self.total_frames += 1
+            self._detected.push(1.0 if is_detected else 0.0)
+
+            if is_detected:
+                self.detected_frames += 1
+                if is_correct:
+                    self.correct_poses += 1
+                else:
+                    self.incorrect_poses += 1
+                self._correct.push(1.0 if is_correct else 0.0)
+
+                if accuracy_data:
+                    self._confidence.push(accuracy_data['detection_confidence'])
+                    self._visibility.push(accuracy_data['avg_visibility'])
+            self._publish()
+
+    def _publish(self):
+        # Harus dipanggil dengan self._lock terkunci
+        total_frames = self.total_frames
+        detected_frames = self.detected_frames
+        self._snapshot = {
+            'detection_rate': (detected_frames / total_frames * 100) if total_frames > 0 else 0,
+            'accuracy_rate': (self.correct_poses / detected_frames * 100) if detected_frames > 0 else 0,
+            'avg_confidence': self._confidence.mean * 100,
+            'avg_visibility': self._visibility.mean * 100,
+            'confidence_std': self._confidence.std * 100,
+            'visibility_std': self._visibility.std * 100,
+            'window_detection_rate': self._detected.mean * 100,
+            'window_accuracy_rate': self._correct.mean * 100,
+            'total_frames': total_frames,
+            'detected_frames': detected_frames,
+            'correct_poses': self.correct_poses,
+            'incorrect_poses': self.incorrect_poses,
+            'session_start_time': self.session_start_time,
+        }
+
+    def stats(self):
+        """
+        Statistik terakhir (cache), dibaca tanpa lock
+        """
+        snapshot = self._snapshot
+        stats = dict(snapshot)
+        stats['session_duration'] = time.time() - stats.pop('session_start_time')
+        return stats
@@ -0,0 +1,108 @@
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def new_session_id():
+    return uuid.uuid4().hex
+
+
+def valid_session_id(session_id):
+    return bool(session_id) and _SESSION_ID.match(session_id) is not None
+
+
+class SessionRegistry:
+    """
+    Objek per sesi latihan (mis. RollingMetrics) yang dikunci dengan session id.
+
+    - get() membuat sesi baru bila belum ada dan menandai sesi masih aktif
+    - sesi yang tidak dipakai lebih dari idle_timeout detik dihapus otomatis
+    - jumlah sesi dibatasi max_sessions; jika penuh, sesi yang paling lama
+      tidak aktif dibuang, sehingga total memori tetap terbatas
+    """
+
+    def __init__(self, factory, idle_timeout=300.0, max_sessions=500, sweep_interval=10.0):
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # session_id -> (objek, waktu_terakhir), terlama di depan
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep > self.sweep_interval:
+                self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self._make_room()
+                entry = [self.factory(), now]
+                self._sessions[session_id] = entry
+                self.created += 1
+            else:
+                entry[1] = now
+                self._sessions.move_to_end(session_id)
+            return entry[0]
+
+    def peek(self, session_id):
+        """
+        Ambil sesi tanpa membuat baru dan tanpa memperpanjang umurnya
+        """
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None or time.monotonic() - entry[1] > self.idle_timeout:
+                return None
+            return entry[0]
+
+    def remove(self, session_id):
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _make_room(self):
+        # Harus dipanggil dengan self._lock terkunci
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def _expire(self, now):
+        # Harus dipanggil dengan self._lock terkunci. Urutan OrderedDict = urutan aktivitas,
+        # jadi cukup periksa dari depan sampai ketemu sesi yang masih aktif.
+        self._last_sweep = now
+        while self._sessions:
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if now - last_seen <= self.idle_timeout:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def items(self):
+        """
+        Daftar (session_id, objek, detik_sejak_aktif) untuk sesi yang masih hidup
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            return [(session_id, obj, now - last_seen) for session_id, (obj, last_seen) in self._sessions.items()]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted,
+            }
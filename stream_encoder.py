@@ -0,0 +1,200 @@
+import threading
+import time
+
+import cv2
+
+from jpeg_backends import DEFAULT_SUBSAMPLING, SUBSAMPLING, default_backend
+from metrics import ENCODE_SECONDS
+
+# Batas parameter query /video_feed/<pose>?quality=&scale=&fps=&adaptive=&subsampling=
+MIN_QUALITY = 10
+MAX_QUALITY = 95
+MIN_SCALE = 0.1
+MAX_FPS = 60
+
+_PART_HEADER = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+_PART_TRAILER = b'\r\n'
+
+
+def multipart_chunk(jpeg):
+    """
+    Satu bagian multipart/x-mixed-replace (boundary=frame) berisi satu JPEG.
+    jpeg boleh bytes atau buffer hasil cv2.imencode; disalin sekali saja.
+    """
+    return b''.join((_PART_HEADER, jpeg, _PART_TRAILER))
+
+
+class StreamEncoder:
+    """
+    Encoder JPEG untuk satu penonton MJPEG.
+
+    - quality, scale, dan chroma subsampling bisa diatur per penonton
+    - backend: encoder JPEG dari jpeg_backends (default: backend tercepat yang terpasang)
+    - max_fps membatasi frame yang dikirim; frame di antaranya dilewati, tidak diantrekan
+    - adaptive: jika penonton tertinggal (frame untuknya banyak dibuang di kotak suratnya
+      karena pengiriman ke klien belum selesai), resolusi diturunkan bertahap, lalu kualitas
+      JPEG jika resolusi sudah minimum. Jika lancar kembali, dinaikkan lagi sampai
+      nilai yang diminta.
+    """
+
+    def __init__(self, quality=80, scale=1.0, max_fps=None, adaptive=True,
+                 min_scale=0.25, min_quality=40, window=30, step=0.75,
+                 subsampling=DEFAULT_SUBSAMPLING, backend=None):
+        self.backend = backend or default_backend()
+        self.subsampling = subsampling
+        self.quality = quality
+        self.scale = scale
+        self.max_fps = max_fps
+        self.adaptive = adaptive
+        self.min_scale = min(min_scale, scale)
+        self.min_quality = min(min_quality, quality)
+        self.window = window  # jumlah frame per evaluasi adaptif
+        self.step = step
+        self.requested_quality = quality
+        self.requested_scale = scale
+        self._lock = threading.Lock()
+        self._last_sent = 0.0
+        self._last_dropped = 0
+        self._window_sent = 0
+        self._window_missed = 0
+        self.frames_encoded = 0
+        self.frames_shared = 0  # frame yang memakai hasil encode penonton lain
+        self.frames_skipped = 0
+        self.frames_missed = 0
+        self.bytes_encoded = 0
+        self.downgrades = 0
+        self.upgrades = 0
+
+    def encode(self, frame, dropped=0, shared=None):
+        """
+        Frame BGR -> bagian multipart, atau None jika frame dilewati (batas fps).
+        dropped: total frame yang dibuang untuk penonton ini sejauh ini.
+        shared: dict hasil encode frame yang sama untuk penonton lain, dikunci
+        (backend, subsampling, scale, quality). Penonton di tingkat yang sama memakai bytes yang sama.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._track(dropped)
+            if self.max_fps and now - self._last_sent < 1.0 / self.max_fps:
+                self.frames_skipped += 1
+                return None
+            self._last_sent = now
+            scale, quality = self.scale, self.quality
+
+        tier = (self.backend.name, self.subsampling, scale, quality)
+        chunk = shared.get(tier) if shared is not None else None
+        if chunk is not None:
+            with self._lock:
+                self.frames_shared += 1
+            return chunk
+
+        start = time.perf_counter()
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        buffer = self.backend.encode(frame, quality, self.subsampling)
+        if buffer is None:
+            return None
+        ENCODE_SECONDS.observe(time.perf_counter() - start)
+        chunk = multipart_chunk(buffer)
+        if shared is not None:
+            shared[tier] = chunk
+
+        with self._lock:
+            self.frames_encoded += 1
+            self.bytes_encoded += len(buffer)
+        return chunk
+
+    def _track(self, dropped):
+        # Harus dipanggil dengan self._lock terkunci
+        missed = max(dropped - self._last_dropped, 0)
+        self._last_dropped = dropped
+        self.frames_missed += missed
+        self._window_missed += missed
+        self._window_sent += 1
+        if self.adaptive and self._window_sent + self._window_missed >= self.window:
+            self._adapt(self._window_missed / (self._window_sent + self._window_missed))
+            self._window_sent = 0
+            self._window_missed = 0
+
+    def _adapt(self, miss_ratio):
+        if miss_ratio > 0.25:
+            # Tertinggal: turunkan resolusi dulu, baru kualitas
+            if self.scale > self.min_scale:
+                self.scale = max(self.min_scale, round(self.scale * self.step, 3))
+                self.downgrades += 1
+            elif self.quality > self.min_quality:
+                self.quality = max(self.min_quality, self.quality - 10)
+                self.downgrades += 1
+        elif miss_ratio < 0.05:
+            # Lancar: pulihkan kualitas dulu, baru resolusi
+            if self.quality < self.requested_quality:
+                self.quality = min(self.requested_quality, self.quality + 10)
+                self.upgrades += 1
+            elif self.scale < self.requested_scale:
+                self.scale = min(self.requested_scale, round(self.scale / self.step, 3))
+                self.upgrades += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': self.backend.name,
+                'subsampling': self.subsampling,
+                'quality': self.quality,
+                'scale': self.scale,
+                'max_fps': self.max_fps,
+                'adaptive': self.adaptive,
+                'frames_encoded': self.frames_encoded,
+                'frames_shared': self.frames_shared,
+                'frames_skipped': self.frames_skipped,
+                'frames_missed': self.frames_missed,
+                'avg_frame_bytes': self.bytes_encoded // self.frames_encoded if self.frames_encoded else 0,
+                'downgrades': self.downgrades,
+                'upgrades': self.upgrades,
+            }
+
+
+def parse_stream_args(args):
+    """
+    Ambil pengaturan encoder dari query string (request.args).
+    ValueError jika nilainya tidak valid.
+    """
+    options = {}
+    quality = args.get('quality')
+    if quality:
+        try:
+            options['quality'] = int(quality)
+        except ValueError:
+            raise ValueError("quality harus bilangan bulat")
+        if not MIN_QUALITY <= options['quality'] <= MAX_QUALITY:
+            raise ValueError(f"quality harus antara {MIN_QUALITY} dan {MAX_QUALITY}")
+
+    scale = args.get('scale')
+    if scale:
+        try:
+            options['scale'] = float(scale)
+        except ValueError:
+            raise ValueError("scale harus angka")
+        if not MIN_SCALE <= options['scale'] <= 1.0:
+            raise ValueError(f"scale harus antara {MIN_SCALE} dan 1")
+
+    fps = args.get('fps')
+    if fps:
+        try:
+            options['max_fps'] = float(fps)
+        except ValueError:
+            raise ValueError("fps harus angka")
+        if not 0 < options['max_fps'] <= MAX_FPS:
+            raise ValueError(f"fps harus antara 0 dan {MAX_FPS}")
+
+    adaptive = args.get('adaptive')
+    if adaptive:
+        if adaptive.lower() not in ('0', '1', 'true', 'false'):
+            raise ValueError("adaptive harus 0/1 atau true/false")
+        options['adaptive'] = adaptive.lower() in ('1', 'true')
+
+    subsampling = args.get('subsampling')
+    if subsampling:
+        if subsampling not in SUBSAMPLING:
+            raise ValueError(f"subsampling harus salah satu dari {', '.join(SUBSAMPLING)}")
+        options['subsampling'] = subsampling
+    return options
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul app ada di root repo (layout datar)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,180 @@
+import threading
+
+import numpy as np
+
+from capture_hub import CAPTURE_LATEST, CAPTURE_SEQUENTIAL, CaptureHub
+from stream_encoder import StreamEncoder
+
+
+class FakeCapture:
+    """
+    Pengganti cv2.VideoCapture: membaca frame dari generator
+    """
+
+    def __init__(self, frames):
+        self.frames = iter(frames)
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def read(self):
+        try:
+            return True, next(self.frames)
+        except StopIteration:
+            return False, None
+
+    def set(self, prop, value):
+        return True
+
+    def release(self):
+        self.released = True
+
+
+def frames(count, size=32):
+    for i in range(count):
+        yield np.full((size, size, 3), i % 256, dtype=np.uint8)
+
+
+def failing_frames(count, error):
+    yield from frames(count)
+    raise error
+
+
+class Opener:
+    """
+    open_source palsu: setiap pembukaan sumber memakai generator frame berikutnya
+    """
+
+    def __init__(self, *sources):
+        self.sources = iter(sources)
+        self.captures = []
+
+    def __call__(self, source):
+        capture = FakeCapture(next(self.sources))
+        self.captures.append(capture)
+        return capture
+
+
+def passthrough(counter):
+    def process(frame, estimator):
+        counter.append(1)
+        return frame, None
+    return process
+
+
+def consume(generator, received, timeout=10):
+    thread = threading.Thread(target=lambda: received.extend(generator), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+def test_slow_viewer_does_not_block_sequential_broadcast():
+    hub = CaptureHub(open_source=lambda source: FakeCapture(frames(200)))
+    slow_encoder = StreamEncoder(adaptive=False)
+    slow = hub.stream('video.mp4', None, lambda packet: packet.frame, CAPTURE_SEQUENTIAL,
+                      slow_encoder, share_key='squad')
+    next(slow)  # bergabung ke Broadcast, lalu tidak pernah membaca lagi
+    fast = hub.stream('video.mp4', None, lambda packet: packet.frame, CAPTURE_SEQUENTIAL,
+                      StreamEncoder(adaptive=False), share_key='squad')
+
+    received = []
+    assert consume(fast, received), "penonton cepat tertahan oleh penonton lambat"
+    assert received
+    assert slow_encoder.stats()['frames_missed'] > 0
+    slow.close()
+
+
+def test_viewer_that_never_reads_is_downgraded():
+    hub = CaptureHub(open_source=lambda source: FakeCapture(frames(300, size=64)))
+    encoder = StreamEncoder(quality=80, scale=1.0, window=10)
+    stream = hub.stream('video.mp4', None, lambda packet: packet.frame, CAPTURE_SEQUENTIAL,
+                        encoder, share_key='squad')
+    next(stream)  # bergabung, lalu tidak pernah membaca lagi
+    broadcast = hub._broadcasts[('video.mp4', 'squad')]
+    broadcast.join(10)
+    assert not broadcast.is_alive()
+
+    stats = encoder.stats()
+    assert stats['frames_missed'] > 0
+    assert stats['downgrades'] > 0
+    assert stats['scale'] < 1.0 or stats['quality'] < 80
+    stream.close()
+
+
+def test_subscribers_share_one_reader():
+    opener = Opener(frames(50))
+    hub = CaptureHub(open_source=opener)
+    inferred = []
+    first = hub.subscribe('video.mp4', passthrough(inferred))
+    second = hub.subscribe('video.mp4', passthrough(inferred))
+    assert len(hub._readers) == 1
+
+    first_packets, second_packets = [], []
+    threads = [threading.Thread(target=consume, args=(subscription, packets))
+               for subscription, packets in ((first, first_packets), (second, second_packets))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    # Satu kali buka sumber, satu kali decode dan inferensi per frame
+    assert len(opener.captures) == 1
+    assert len(inferred) == 50
+    assert [packet.seq for packet in first_packets] == list(range(50))
+    # Penonton kedua bergabung sedikit lebih lambat, tapi tetap menerima frame yang sama
+    assert second_packets
+    assert [packet.seq for packet in second_packets] == list(range(second_packets[0].seq, 50))
+    assert first.error is None
+    assert not hub._readers
+
+
+def test_closing_last_subscriber_stops_reader():
+    opener = Opener(frames(10 ** 6))
+    hub = CaptureHub(open_source=opener)
+    first = hub.subscribe('camera', capture_mode=CAPTURE_LATEST)
+    second = hub.subscribe('camera', capture_mode=CAPTURE_LATEST)
+    reader = hub._readers['camera']
+    assert first.get(timeout=5) is not None
+
+    first.close()
+    assert second.get(timeout=5) is not None
+    assert reader.is_alive()
+
+    second.close()
+    reader.join(5)
+    assert not reader.is_alive()
+    assert opener.captures[0].released
+    assert 'camera' not in hub._readers
+    assert reader.error is None
+
+
+def test_reader_error_is_reported_and_next_subscriber_restarts():
+    opener = Opener(failing_frames(5, RuntimeError("kamera terputus")), frames(10))
+    hub = CaptureHub(open_source=opener)
+    subscription = hub.subscribe('camera')
+    packets = []
+    assert consume(subscription, packets), "subscriber tidak diselesaikan setelah error"
+    assert len(packets) == 5
+    assert isinstance(subscription.error, RuntimeError)
+    assert opener.captures[0].released
+    assert 'camera' not in hub._readers
+
+    # Pembaca baru dibuka dari awal untuk penonton berikutnya
+    subscription = hub.subscribe('camera')
+    packets = []
+    assert consume(subscription, packets)
+    assert [packet.seq for packet in packets] == list(range(10))
+    assert subscription.error is None
+
+
+def test_inference_error_stops_reader():
+    def broken(frame, estimator):
+        raise ValueError("model gagal")
+
+    hub = CaptureHub(open_source=Opener(frames(10 ** 6)))
+    subscription = hub.subscribe('camera', broken)
+    assert consume(subscription, []), "pembaca tertahan setelah inferensi gagal"
+    assert isinstance(subscription.error, ValueError)
+    assert 'camera' not in hub._readers
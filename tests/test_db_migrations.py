@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from db_migrations import migrate
+from db_pool import ConnectionPool
+from db_sqlite import connect_sqlite
+from pose_rollup import fetch_rollup, update_rollups
+
+INSERT = ("INSERT INTO detected_poses (pose_name, is_correct, feedback, detection_confidence, "
+          "avg_visibility, frame_accuracy, timestamp) VALUES (%s, %s, %s, %s, %s, %s, %s)")
+
+
+def seeded_rows():
+    start = datetime(2026, 3, 1, 22, 0, 0)
+    rows = []
+    for i in range(120):
+        timestamp = start + timedelta(minutes=17 * i)
+        pose = ('squad', 'langus', 'Arm Press')[i % 3]
+        rows.append((pose, i % 4 != 0, "", 0.5 + (i % 5) / 10, 0.9, 70.0 + i % 30,
+                     timestamp.strftime('%Y-%m-%d %H:%M:%S')))
+    return rows
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "migrate.sqlite3")
+    pool = ConnectionPool(lambda: connect_sqlite(path), min_size=0)
+    with pool.get() as conn:
+        with conn.cursor() as cursor:
+            cursor.executemany(INSERT, seeded_rows())
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def raw_rollup(pool, bucket_format):
+    query = (f"SELECT pose_name, strftime('{bucket_format}', timestamp) AS bucket, COUNT(*) AS total, "
+             "SUM(is_correct) AS correct, SUM(detection_confidence) AS sum_confidence, "
+             "SUM(avg_visibility) AS sum_visibility, SUM(frame_accuracy) AS sum_frame_accuracy "
+             "FROM detected_poses GROUP BY pose_name, bucket ORDER BY bucket DESC, pose_name")
+    with pool.get() as conn, conn.cursor() as cursor:
+        cursor.execute(query)
+        return cursor.fetchall()
+
+
+def comparable(rows):
+    return [(row['pose_name'], row['bucket'], row['total'], row['correct'],
+             round(row['sum_confidence'], 6), round(row['sum_visibility'], 6),
+             round(row['sum_frame_accuracy'], 6)) for row in rows]
+
+
+@pytest.mark.parametrize('granularity, bucket_format', [
+    ('hour', '%Y-%m-%d %H:00:00'),
+    ('day', '%Y-%m-%d'),
+])
+def test_migration_backfills_rollups(pool, granularity, bucket_format):
+    with pool.get() as conn:
+        assert migrate(conn) == [1, 2, 3]
+    rollup = fetch_rollup(pool.get, granularity)
+    assert rollup
+    assert comparable(rollup) == comparable(raw_rollup(pool, bucket_format))
+
+
+def test_backfill_runs_once_and_writer_continues(pool):
+    with pool.get() as conn:
+        migrate(conn)
+        assert migrate(conn) == []
+
+    row = ('squad', True, "", 0.8, 0.9, 80.0, '2026-03-01 22:30:00')
+    with pool.get() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(INSERT, row)
+            update_rollups(cursor, [row])
+        conn.commit()
+    assert comparable(fetch_rollup(pool.get, 'hour')) == comparable(raw_rollup(pool, '%Y-%m-%d %H:00:00'))
@@ -0,0 +1,153 @@
+import threading
+import time
+
+import pytest
+
+from db_pool import ConnectionPool, PoolTimeout
+from db_sqlite import connect_sqlite
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "pool.sqlite3")
+
+
+def make_pool(db_path, **kwargs):
+    return ConnectionPool(lambda: connect_sqlite(db_path), **kwargs)
+
+
+def test_prefills_min_size(db_path):
+    pool = make_pool(db_path, min_size=2, max_size=4)
+    assert pool.stats()['idle'] == 2
+    assert pool.stats()['created'] == 2
+    pool.close()
+
+
+def test_prefill_error_does_not_fail_startup():
+    def connect():
+        raise OSError("database belum siap")
+
+    pool = ConnectionPool(connect, min_size=2)
+    assert pool.stats()['live'] == 0
+    with pytest.raises(OSError):
+        pool.get()
+    assert pool.stats()['live'] == 0
+
+
+def test_checkout_and_return_reuses_connection(db_path):
+    pool = make_pool(db_path, min_size=0, max_size=2)
+    conn = pool.get()
+    raw = conn._raw
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO detected_poses (pose_name) VALUES (%s)", ("squad",))
+    conn.commit()
+    conn.close()
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['idle'] == 1
+
+    with pool.get() as conn:
+        assert conn._raw is raw
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pose_name FROM detected_poses")
+            assert cursor.fetchall() == [{'pose_name': 'squad'}]
+    stats = pool.stats()
+    assert stats['created'] == 1
+    assert stats['checkouts'] == 2
+    pool.close()
+
+
+def test_returned_connection_is_unusable(db_path):
+    pool = make_pool(db_path, min_size=0)
+    conn = pool.get()
+    conn.close()
+    with pytest.raises(AttributeError):
+        conn.cursor()
+    # close() kedua tidak mengembalikan koneksi dua kali
+    conn.close()
+    assert pool.stats()['idle'] == 1
+    pool.close()
+
+
+def test_uncommitted_work_is_rolled_back_on_return(db_path):
+    pool = make_pool(db_path, min_size=0)
+    with pool.get() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("INSERT INTO detected_poses (pose_name) VALUES (%s)", ("langus",))
+    with pool.get() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) AS n FROM detected_poses")
+            assert cursor.fetchone()['n'] == 0
+    pool.close()
+
+
+def test_get_blocks_at_max_size_until_returned(db_path):
+    pool = make_pool(db_path, min_size=0, max_size=1)
+    first = pool.get()
+    got = []
+
+    def worker():
+        with pool.get(timeout=5) as conn:
+            got.append(conn._raw)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    time.sleep(0.1)
+    assert not got  # masih menunggu koneksi
+    raw = first._raw
+    first.close()
+    thread.join(5)
+    assert got == [raw]
+    assert pool.stats()['created'] == 1
+    pool.close()
+
+
+def test_get_times_out_at_max_size(db_path):
+    pool = make_pool(db_path, min_size=0, max_size=1)
+    conn = pool.get()
+    with pytest.raises(PoolTimeout):
+        pool.get(timeout=0.05)
+    conn.close()
+    pool.close()
+
+
+def test_broken_idle_connection_is_discarded(db_path):
+    pool = make_pool(db_path, min_size=1, max_size=1)
+    broken, _ = pool._idle[0]
+    broken.close()  # ping() gagal saat diambil
+
+    with pool.get() as conn:
+        assert conn._raw is not broken
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1 AS one")
+    stats = pool.stats()
+    assert stats['discarded'] == 1
+    assert stats['live'] == 1
+    pool.close()
+
+
+def test_broken_connection_on_return_is_discarded(db_path):
+    pool = make_pool(db_path, min_size=0, max_size=1)
+    conn = pool.get()
+    conn._raw.close()  # rollback() gagal saat dikembalikan
+    conn.close()
+    stats = pool.stats()
+    assert stats['discarded'] == 1
+    assert stats['live'] == 0
+    assert stats['in_use'] == 0
+    # Slot yang dibebaskan bisa dipakai lagi
+    with pool.get(timeout=0.5):
+        pass
+    pool.close()
+
+
+def test_idle_connections_above_min_size_are_evicted(db_path):
+    pool = make_pool(db_path, min_size=1, max_size=3, idle_timeout=0.05)
+    conns = [pool.get() for _ in range(3)]
+    for conn in conns[:2]:
+        conn.close()
+    time.sleep(0.1)
+    conns[2].close()  # pengembalian juga menutup koneksi menganggur yang kedaluwarsa
+    stats = pool.stats()
+    assert stats['idle'] == 1
+    assert stats['live'] == 1
+    pool.close()
@@ -0,0 +1,135 @@
+import json
+import os
+
+import pymysql
+import pytest
+
+from db_pool import ConnectionPool
+from db_sqlite import connect_sqlite
+from db_writer import BatchWriter
+
+QUERY = "INSERT INTO detected_poses (pose_name, is_correct) VALUES (%s, %s)"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "writer.sqlite3")
+
+
+def stored_rows(db_path):
+    conn = connect_sqlite(db_path)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT pose_name, is_correct FROM detected_poses ORDER BY id")
+            return [(row['pose_name'], row['is_correct']) for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def make_writer(connect, tmp_path, **kwargs):
+    kwargs.setdefault('flush_interval', 0.05)
+    return BatchWriter(connect, QUERY,
+                       spill_path=str(tmp_path / "spill.jsonl"),
+                       dead_letter_path=str(tmp_path / "dead.jsonl"), **kwargs)
+
+
+def unavailable():
+    raise pymysql.OperationalError(2003, "Can't connect to MySQL server")
+
+
+def test_flush_writes_batches(db_path, tmp_path):
+    pool = ConnectionPool(lambda: connect_sqlite(db_path), min_size=0)
+    writer = make_writer(pool.get, tmp_path, batch_size=2)
+    rows = [("squad", 1), ("squad", 0), ("langus", 1)]
+    for row in rows:
+        writer.submit(row)
+    writer.close()
+
+    assert stored_rows(db_path) == rows
+    stats = writer.stats()
+    assert stats['rows_written'] == 3
+    assert stats['batches_written'] >= 2
+    assert stats['rows_spilled'] == 0
+    pool.close()
+
+
+def test_outage_spills_then_replays(db_path, tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    writer = make_writer(unavailable, tmp_path)
+    writer.submit(("squad", 1))
+    writer.submit(("squad", 0))
+    writer.close()
+
+    assert writer.stats()['rows_spilled'] == 2
+    with open(spill_path, encoding='utf-8') as f:
+        entries = [json.loads(line) for line in f]
+    assert entries == [{'query': QUERY, 'row': ["squad", 1]}, {'query': QUERY, 'row': ["squad", 0]}]
+    assert stored_rows(db_path) == []
+
+    # Database kembali: baris tertunda dikirim dulu, urut dari yang terlama
+    writer = make_writer(lambda: connect_sqlite(db_path), tmp_path)
+    assert writer.stats()['spill_pending'] == 2
+    writer.submit(("langus", 1))
+    writer.close()
+
+    assert stored_rows(db_path) == [("squad", 1), ("squad", 0), ("langus", 1)]
+    assert not os.path.exists(spill_path)
+    assert writer.stats()['spill_pending'] == 0
+
+
+def test_replay_failure_keeps_pending_rows(db_path, tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    writer = make_writer(unavailable, tmp_path)
+    writer.submit(("squad", 1))
+    writer.close()
+
+    # Masih mati: baris lama tetap tersimpan, baris baru ditambahkan tanpa duplikat
+    writer = make_writer(unavailable, tmp_path)
+    writer.submit(("langus", 0))
+    writer.close()
+    with open(spill_path, encoding='utf-8') as f:
+        assert [json.loads(line)['row'] for line in f] == [["squad", 1], ["langus", 0]]
+
+
+def test_spill_keeps_query_of_each_row(db_path, tmp_path):
+    other_query = "INSERT INTO detected_poses (pose_name) VALUES (%s)"
+    spill_path = str(tmp_path / "spill.jsonl")
+    with open(spill_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'query': other_query, 'row': ["plank"]}) + "\n")
+
+    writer = make_writer(lambda: connect_sqlite(db_path), tmp_path)
+    writer.submit(("squad", 1))
+    writer.close()
+
+    assert stored_rows(db_path) == [("plank", None), ("squad", 1)]
+    assert writer.stats()['rows_dead'] == 0
+
+
+def test_bad_rows_go_to_dead_letter(db_path, tmp_path):
+    dead_path = str(tmp_path / "dead.jsonl")
+    writer = make_writer(lambda: connect_sqlite(db_path), tmp_path)
+    writer.submit(("squad", 1))
+    writer.submit(("langus",))  # jumlah kolom salah
+    writer.submit(("plank", 0))
+    writer.close()
+
+    assert stored_rows(db_path) == [("squad", 1), ("plank", 0)]
+    stats = writer.stats()
+    assert stats['rows_dead'] == 1
+    assert stats['rows_spilled'] == 0
+    with open(dead_path, encoding='utf-8') as f:
+        dead = [json.loads(line) for line in f]
+    assert len(dead) == 1
+    assert dead[0]['query'] == QUERY
+    assert dead[0]['row'] == ["langus"]
+    assert dead[0]['error']
+
+
+def test_spill_max_rows_drops_overflow(tmp_path):
+    writer = make_writer(unavailable, tmp_path, spill_max_rows=2)
+    for i in range(3):
+        writer.submit(("squad", i))
+    writer.close()
+    stats = writer.stats()
+    assert stats['rows_spilled'] == 2
+    assert stats['spill_dropped'] == 1
@@ -0,0 +1,93 @@
+import threading
+
+import numpy as np
+
+import landmark_recorder
+from landmark_recorder import LandmarkRecorder, LandmarkRecording, segment_ids
+
+MISSING = {3, 9, 10, 19, 24}  # frame tanpa pose, termasuk di batas segmen
+
+
+def record(directory, count, **kwargs):
+    kwargs.setdefault('segment_frames', 10)
+    kwargs.setdefault('flush_interval', 3600)
+    recorder = LandmarkRecorder(directory, pose='squad', **kwargs)
+    rng = np.random.default_rng(7)
+    expected = np.full((count, 33, 4), np.nan, dtype=np.float32)
+    for i in range(count):
+        points = None if i in MISSING else rng.random((33, 4))
+        if points is not None:
+            expected[i] = points
+        recorder.append(1000.0 + i, points, correct=i % 2, case=i % 5, seq=i)
+    return recorder, expected
+
+
+def test_round_trip_across_segments(tmp_path):
+    directory = str(tmp_path / "session")
+    recorder, expected = record(directory, 25)
+    recorder.close()
+    assert recorder.stats()['frames_written'] == 25
+    assert segment_ids(directory) == ['000000', '000001', '000002']
+
+    recording = LandmarkRecording(directory)
+    assert recording.pose == 'squad'
+    assert len(recording) == 25
+    np.testing.assert_array_equal(recording.column('landmarks'), expected)
+    np.testing.assert_array_equal(recording.column('seq'), np.arange(25))
+    np.testing.assert_array_equal(recording.column('timestamp'), 1000.0 + np.arange(25))
+    np.testing.assert_array_equal(recording.column('correct'), np.arange(25) % 2)
+    np.testing.assert_array_equal(recording.column('case', 7, 22), np.arange(7, 22) % 5)
+    np.testing.assert_array_equal(recording.column('landmarks', 9, 11), expected[9:11])
+    assert len(recording.column('seq', 30, 40)) == 0
+
+    for i in range(25):
+        frame = recording[i]
+        assert frame['seq'] == i
+        assert frame['case'] == i % 5
+        np.testing.assert_array_equal(frame['landmarks'], expected[i])
+        assert np.isnan(frame['landmarks']).all() == (i in MISSING)
+    assert recording[-1]['seq'] == 24
+
+
+def test_flush_writes_partial_segment_and_numbering_continues(tmp_path):
+    directory = str(tmp_path / "session")
+    recorder, _ = record(directory, 4)
+    recorder.flush()
+    assert LandmarkRecording(directory).column('seq').tolist() == [0, 1, 2, 3]
+    recorder.close()
+
+    # Direktori yang sama dibuka lagi: segmen baru melanjutkan penomoran
+    recorder, _ = record(directory, 3)
+    recorder.close()
+    assert segment_ids(directory) == ['000000', '000001']
+    assert LandmarkRecording(directory).column('seq').tolist() == [0, 1, 2, 3, 0, 1, 2]
+
+
+def test_append_does_not_wait_for_disk(tmp_path, monkeypatch):
+    release = threading.Event()
+    save = np.save
+
+    def slow_save(f, array):
+        release.wait(10)
+        save(f, array)
+
+    monkeypatch.setattr(landmark_recorder.np, 'save', slow_save)
+    directory = str(tmp_path / "session")
+    recorder = LandmarkRecorder(directory, segment_frames=10, flush_interval=3600)
+    appended = threading.Event()
+
+    def append_two_segments():
+        for i in range(20):
+            recorder.append(float(i), np.zeros((33, 4)), seq=i)
+        appended.set()
+
+    threading.Thread(target=append_two_segments, daemon=True).start()
+    # Segmen pertama tertahan di disk, tetapi append dan stats tetap jalan
+    assert appended.wait(5)
+    assert recorder.stats()['segments_pending'] == 2
+    assert recorder.stats()['frames_written'] == 0
+
+    release.set()
+    recorder.close()
+    assert recorder.stats()['frames_written'] == 20
+    assert LandmarkRecording(directory).column('seq').tolist() == list(range(20))
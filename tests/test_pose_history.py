@@ -0,0 +1,171 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from db_migrations import migrate
+from db_pool import ConnectionPool
+from db_sqlite import connect_sqlite
+from pose_history import (
+    MAX_PAGE_SIZE, build_history_query, fetch_history_page, parse_history_args, stream_history_json
+)
+
+POSES = ('squad', 'langus', 'plank')
+
+
+def history_rows():
+    # 60 baris, satu per 2 jam mulai 1 Maret 2026 00:00, pose dan status bergantian
+    start = datetime(2026, 3, 1)
+    return [(POSES[i % 3], int(i % 4 != 0), (start + timedelta(hours=2 * i)).strftime('%Y-%m-%d %H:%M:%S'))
+            for i in range(60)]
+
+
+@pytest.fixture
+def history_pool(tmp_path):
+    path = str(tmp_path / "paged.sqlite3")
+    pool = ConnectionPool(lambda: connect_sqlite(path), min_size=0)
+    with pool.get() as conn:
+        migrate(conn)
+        with conn.cursor() as cursor:
+            cursor.executemany("INSERT INTO detected_poses (pose_name, is_correct, timestamp) VALUES (%s, %s, %s)",
+                               history_rows())
+            # Tepat di akhir hari 2 Maret dan awal hari 3 Maret, untuk date_to inklusif
+            cursor.executemany("INSERT INTO detected_poses (pose_name, is_correct, timestamp) VALUES (%s, %s, %s)",
+                               [('squad', 1, '2026-03-02 23:59:59'), ('squad', 1, '2026-03-03 00:00:00')])
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def all_rows(pool):
+    with pool.get() as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT * FROM detected_poses ORDER BY id DESC")
+        return cursor.fetchall()
+
+
+def all_pages(pool, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        rows, cursor = fetch_history_page(pool.get, "*", cursor, limit, **filters)
+        pages.append(rows)
+        if cursor is None:
+            return pages
+
+
+def ids(rows):
+    return [row['id'] for row in rows]
+
+
+def test_build_history_query_filters_and_cursor():
+    query, params = build_history_query("id, pose_name", cursor=40, limit=10, pose_name='squad',
+                                        date_from=datetime(2026, 3, 1), date_to=datetime(2026, 3, 3),
+                                        is_correct=False)
+    assert query == ("SELECT id, pose_name FROM detected_poses WHERE pose_name = %s AND is_correct = %s "
+                     "AND timestamp >= %s AND timestamp < %s AND id < %s ORDER BY id DESC LIMIT %s")
+    assert params == ['squad', 0, datetime(2026, 3, 1), datetime(2026, 3, 3), 40, 10]
+
+    query, params = build_history_query()
+    assert query == "SELECT * FROM detected_poses ORDER BY id DESC LIMIT %s"
+    assert params == [50]
+
+
+@pytest.mark.parametrize('limit', [1, 7, 31, 62, 100])
+def test_pages_do_not_skip_or_repeat_rows(history_pool, limit):
+    pages = all_pages(history_pool, limit)
+    assert all(len(page) <= limit for page in pages)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert [row_id for page in pages for row_id in ids(page)] == ids(all_rows(history_pool))
+
+
+def test_pose_and_correct_filters(history_pool):
+    rows = all_rows(history_pool)
+    for pose in POSES:
+        for is_correct in (True, False):
+            pages = all_pages(history_pool, 4, pose_name=pose, is_correct=is_correct)
+            expected = [row['id'] for row in rows if row['pose_name'] == pose and row['is_correct'] == is_correct]
+            assert [row_id for page in pages for row_id in ids(page)] == expected
+    squad = [row_id for page in all_pages(history_pool, 5, pose_name='squad') for row_id in ids(page)]
+    assert squad == [row['id'] for row in rows if row['pose_name'] == 'squad']
+
+
+def test_date_to_is_inclusive(history_pool):
+    query = parse_history_args({'date_from': '2026-03-02', 'date_to': '2026-03-02', 'limit': '1000'})
+    rows, next_cursor = fetch_history_page(history_pool.get, "*", **query)
+    assert next_cursor is None
+    timestamps = sorted(row['timestamp'] for row in rows)
+    assert timestamps[0] == '2026-03-02 00:00:00'
+    assert timestamps[-1] == '2026-03-02 23:59:59'
+    assert '2026-03-03 00:00:00' not in timestamps
+    # 12 baris tiap 2 jam + baris 23:59:59
+    assert len(rows) == 13
+
+
+def test_date_filter_pages_with_cursor(history_pool):
+    query = parse_history_args({'date_from': '2026-03-02', 'pose': 'squad'})
+    pages = all_pages(history_pool, 3, pose_name=query['pose_name'], date_from=query['date_from'])
+    expected = [row['id'] for row in all_rows(history_pool)
+                if row['pose_name'] == 'squad' and row['timestamp'] >= '2026-03-02']
+    assert [row_id for page in pages for row_id in ids(page)] == expected
+
+
+def test_parse_history_args():
+    assert parse_history_args({}) == {}
+    query = parse_history_args({'cursor': '12', 'limit': '5000', 'pose': 'squad', 'is_correct': 'False',
+                                'date_from': '2026-03-01', 'date_to': '2026-03-02'})
+    assert query == {
+        'cursor': 12,
+        'limit': MAX_PAGE_SIZE,
+        'pose_name': 'squad',
+        'is_correct': False,
+        'date_from': datetime(2026, 3, 1),
+        'date_to': datetime(2026, 3, 3),
+    }
+    assert parse_history_args({'limit': '0'})['limit'] == 1
+    assert parse_history_args({'is_correct': '1'})['is_correct'] is True
+
+
+@pytest.mark.parametrize('args, message', [
+    ({'cursor': 'abc'}, 'cursor'),
+    ({'limit': 'banyak'}, 'limit'),
+    ({'date_from': '01-03-2026'}, 'date_from'),
+    ({'date_to': '2026-13-01'}, 'date_to'),
+    ({'is_correct': 'yes'}, 'is_correct'),
+])
+def test_parse_history_args_errors(args, message):
+    with pytest.raises(ValueError, match=message):
+        parse_history_args(args)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = str(tmp_path / "history.sqlite3")
+    pool = ConnectionPool(lambda: connect_sqlite(path), min_size=0)
+    with pool.get() as conn:
+        with conn.cursor() as cursor:
+            cursor.executemany("INSERT INTO detected_poses (pose_name) VALUES (%s)", [("squad",)] * 30)
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def test_stream_history_json(pool):
+    data = json.loads(''.join(stream_history_json(pool.get, "*", limit=100, chunk_size=10)))
+    assert len(data['poses']) == 30
+    assert data['next_cursor'] is None
+    assert 'error' not in data
+
+
+def test_stream_history_json_closes_on_database_error(pool):
+    calls = []
+
+    def get_connection():
+        calls.append(1)
+        if len(calls) > 2:
+            raise OSError("koneksi putus")
+        return pool.get()
+
+    data = json.loads(''.join(stream_history_json(get_connection, "*", limit=100, chunk_size=10)))
+    assert len(data['poses']) == 20
+    assert data['error'] == "koneksi putus"
+    # Lanjutkan dari baris terakhir yang sudah terkirim
+    assert data['next_cursor'] == data['poses'][-1]['id']
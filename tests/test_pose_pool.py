@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from pose_pool import EstimatorPool, PoolExhausted
+
+
+class FakeEstimator:
+    """
+    Pengganti mp_pose.Pose yang mencatat reset() dan close()
+    """
+
+    def __init__(self, on_close=None):
+        self.resets = 0
+        self.closed = False
+        self.on_close = on_close
+
+    def reset(self):
+        self.resets += 1
+
+    def close(self):
+        if self.on_close is not None:
+            self.on_close()
+        self.closed = True
+
+
+def test_each_lease_gets_its_own_instance():
+    pool = EstimatorPool(FakeEstimator, max_instances=2)
+    first = pool.acquire('a')
+    second = pool.acquire('a')
+    assert first.estimator is not second.estimator
+    assert pool.stats()['leased'] == 2
+
+    with pytest.raises(PoolExhausted):
+        pool.acquire('b', timeout=0.05)
+
+    pool.release(first)
+    third = pool.acquire('b', timeout=0.05)
+    assert third.estimator is first.estimator
+    pool.release(second)
+    pool.release(third)
+    assert pool.stats() == {'live': 2, 'leased': 0, 'idle': 2, 'max_instances': 2}
+
+
+def test_double_release_is_ignored():
+    pool = EstimatorPool(FakeEstimator, max_instances=2)
+    lease = pool.acquire('a')
+    pool.release(lease)
+    pool.release(lease)
+    assert pool.stats()['idle'] == 1
+    assert pool.acquire('a').estimator is not pool.acquire('b').estimator
+
+
+def test_waiting_acquire_gets_released_instance():
+    pool = EstimatorPool(FakeEstimator, max_instances=1)
+    lease = pool.acquire('a')
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire('b', timeout=5)))
+    waiter.start()
+    time.sleep(0.05)
+    pool.release(lease)
+    waiter.join(5)
+    assert acquired[0].estimator is lease.estimator
+
+
+def test_reused_instance_is_reset():
+    pool = EstimatorPool(FakeEstimator, max_instances=1)
+    with pool.lease('a') as estimator:
+        assert estimator.resets == 0
+    with pool.lease('b') as reused:
+        assert reused is estimator
+        assert reused.resets == 1
+
+
+def test_factory_error_frees_slot():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("model gagal dimuat")
+        return FakeEstimator()
+
+    pool = EstimatorPool(factory, max_instances=1)
+    with pytest.raises(RuntimeError):
+        pool.acquire('a')
+    assert pool.stats()['live'] == 0
+    assert pool.acquire('a', timeout=0.05).estimator is not None
+
+
+def test_idle_instances_are_evicted_and_closed():
+    pool = EstimatorPool(FakeEstimator, max_instances=1, idle_timeout=0.05)
+    lease = pool.acquire('a')
+    pool.release(lease)
+    time.sleep(0.1)
+
+    fresh = pool.acquire('b', timeout=1)
+    assert lease.estimator.closed
+    assert fresh.estimator is not lease.estimator
+    assert fresh.estimator.resets == 0
+    assert pool.stats()['live'] == 1
+
+
+def test_close_runs_outside_pool_lock():
+    pool = EstimatorPool(None, max_instances=2, idle_timeout=0.05)
+    blocked = []
+
+    def close_checks_lock():
+        # Thread lain harus tetap bisa memakai pool selama estimator ditutup
+        reader = threading.Thread(target=pool.stats)
+        reader.start()
+        reader.join(1)
+        blocked.append(reader.is_alive())
+
+    pool.factory = lambda: FakeEstimator(on_close=close_checks_lock)
+    pool.release(pool.acquire('a'))
+    time.sleep(0.1)
+    pool.release(pool.acquire('b'))  # instance lama dikeluarkan saat acquire
+    pool.close()
+    assert blocked == [False, False]
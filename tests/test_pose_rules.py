@@ -0,0 +1,285 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pose_math import (
+    NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_ELBOW, RIGHT_ELBOW, LEFT_WRIST, RIGHT_WRIST,
+    LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE, NUM_LANDMARKS,
+)
+from pose_rules import (
+    COMPILED_RULES, EXERCISE_RULES, LENIENT_SQUAT_RULES, classify_points, classify_pose, compile_rules,
+)
+
+# Kerangka berdiri tegak menghadap kamera (koordinat gambar, y ke bawah):
+# semua sendi lengan dan kaki segaris vertikal, jadi sudut siku/lutut/pinggul 180 derajat
+STANDING = {
+    NOSE: (0.5, 0.2),
+    RIGHT_SHOULDER: (0.45, 0.3), LEFT_SHOULDER: (0.55, 0.3),
+    RIGHT_ELBOW: (0.45, 0.45), LEFT_ELBOW: (0.55, 0.45),
+    RIGHT_WRIST: (0.45, 0.6), LEFT_WRIST: (0.55, 0.6),
+    RIGHT_HIP: (0.45, 0.55), LEFT_HIP: (0.55, 0.55),
+    RIGHT_KNEE: (0.45, 0.75), LEFT_KNEE: (0.55, 0.75),
+    RIGHT_ANKLE: (0.45, 0.95), LEFT_ANKLE: (0.55, 0.95),
+}
+
+
+def standing():
+    points = np.zeros((NUM_LANDMARKS, 4))
+    points[:, 3] = 1.0
+    for index, (x, y) in STANDING.items():
+        points[index, :2] = (x, y)
+    return points
+
+
+def bend(points, a, b, c, degrees, turn=1):
+    """
+    Pindahkan titik c (jarak ke b tetap) sehingga sudut a-b-c = degrees.
+    turn=1 memutar searah jarum jam di gambar, -1 sebaliknya.
+    """
+    ax, ay = points[a, :2] - points[b, :2]
+    length = math.hypot(*(points[c, :2] - points[b, :2]))
+    direction = math.atan2(ay, ax) + turn * math.radians(degrees)
+    points[c, :2] = points[b, :2] + length * np.array([math.cos(direction), math.sin(direction)])
+    return points
+
+
+def elbows(right, left):
+    points = standing()
+    bend(points, RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, right, turn=-1)
+    return bend(points, LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST, left)
+
+
+def knees(right, left):
+    points = standing()
+    bend(points, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE, right)
+    return bend(points, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE, left, turn=-1)
+
+
+def raised_right_arm(elbow_angle):
+    # Lengan kanan diangkat lurus ke atas, lalu siku ditekuk
+    points = standing()
+    x, y = STANDING[RIGHT_SHOULDER]
+    points[RIGHT_ELBOW, :2] = (x, y - 0.15)
+    points[RIGHT_WRIST, :2] = (x, y - 0.3)
+    return bend(points, RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, elbow_angle)
+
+
+def elbow_below_hip(side):
+    shoulder, elbow, hip = side
+    points = standing()
+    points[elbow, :2] = (STANDING[hip][0], 0.7)
+    return points
+
+
+def leaning_right_torso(elbow_angle):
+    # Tubuh condong ke depan 80 derajat, lengan kanan menggantung lalu ditekuk
+    points = bend(standing(), RIGHT_KNEE, RIGHT_HIP, RIGHT_SHOULDER, 100)
+    points[RIGHT_ELBOW, :2] = points[RIGHT_SHOULDER, :2] + (0, 0.15)
+    points[RIGHT_WRIST, :2] = points[RIGHT_SHOULDER, :2] + (0, 0.3)
+    return bend(points, RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST, elbow_angle)
+
+
+def lunge(front_knee):
+    # Kaki kanan di depan (lutut lebih rendah), kaki kiri melangkah jauh ke belakang
+    points = standing()
+    points[RIGHT_KNEE, 1] += 0.03
+    bend(points, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE, front_knee, turn=-1)
+    points[LEFT_ANKLE, 0] = points[RIGHT_ANKLE, 0] + 0.4
+    return points
+
+
+def with_point(points, index, dx=0.0, dy=0.0):
+    points[index, :2] += (dx, dy)
+    return points
+
+
+def knees_out(right, left):
+    # Seperti knees, tetapi pergelangan kaki ke luar (kaki terbuka lebar)
+    points = standing()
+    bend(points, RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE, right, turn=-1)
+    return bend(points, LEFT_HIP, LEFT_KNEE, LEFT_ANKLE, left)
+
+
+def landmarks(points):
+    # Bentuk seperti results.pose_landmarks.landmark dari MediaPipe
+    return [SimpleNamespace(x=x, y=y, z=z, visibility=v) for x, y, z, v in points.tolist()]
+
+
+def feedback(message, detail=None):
+    result = {"message": message}
+    if detail:
+        result["detail"] = detail
+    return result
+
+
+@pytest.mark.parametrize('pose', sorted(EXERCISE_RULES))
+def test_scalar_and_batch_paths_agree(pose):
+    rule = COMPILED_RULES[pose]
+    rng = np.random.default_rng(sum(map(ord, pose)))
+    points = rng.random((400, NUM_LANDMARKS, 4))
+    # Sebagian frame dibuat dekat kerangka berdiri agar kasus selain fallback ikut teruji
+    points[:200, :, :2] = standing()[:, :2] + rng.normal(0, 0.08, (200, NUM_LANDMARKS, 2))
+
+    batch_correct, batch_case = rule.evaluate_batch(points)
+    for i, frame in enumerate(points):
+        is_correct, _, case = rule.evaluate_case(frame)
+        assert (is_correct, case) == (bool(batch_correct[i]), int(batch_case[i])), i
+        assert rule.evaluate_landmarks(landmarks(frame))[::2] == (is_correct, case), i
+
+
+# (gerakan, frame, is_correct, feedback) -- beberapa frame pilihan per gerakan
+PINNED_FRAMES = [
+    ("Arm Press", elbows(90, 90), True, feedback("Posisi Arm Press sudah benar!")),
+    ("Arm Press", elbows(60, 90), False,
+     feedback("Posisi Arm Press salah!", "Tekuk siku lebih dalam (sudut terlalu lebar)")),
+    ("Arm Press", standing(), False,
+     feedback("Posisi Arm Press salah!", "Buka siku lebih lebar (sudut terlalu sempit)")),
+
+    ("Push up", elbows(90, 180), True, feedback("Posisi Push Up sudah benar!")),
+    ("Push up", bend(elbows(90, 180), RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE, 120), False,
+     feedback("Posisi tubuh Push Up salah!", "Jaga tubuh tetap lurus, jangan menekuk pinggul")),
+    ("Push up", elbows(50, 180), False,
+     feedback("Posisi siku Push Up salah!", "Terlalu rendah, naikan posisi tubuh")),
+    ("Push up", standing(), False,
+     feedback("Posisi siku Push Up salah!", "Terlalu tinggi, turunkan posisi tubuh")),
+
+    ("plank", standing(), True, feedback("Posisi Plank sudah benar!")),
+    ("plank", bend(standing(), RIGHT_SHOULDER, RIGHT_HIP, RIGHT_ANKLE, 140), False,
+     feedback("Posisi Plank salah!", "Pinggul terlalu rendah, angkat pinggul")),
+
+    ("warrior-pose", knees(180, 90), True, feedback("Posisi Warrior Pose sudah benar!")),
+    ("warrior-pose", knees(90, 180), True, feedback("Posisi Warrior Pose sudah benar!")),
+    ("warrior-pose", standing(), False,
+     feedback("Posisi Warrior Pose salah!", "Pastikan satu kaki ditekuk (~90°) dan kaki lain lurus")),
+
+    ("crunch", bend(standing(), LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE, 90), True,
+     feedback("Posisi Crunch sudah benar!")),
+    ("crunch", standing(), False, feedback("Posisi Crunch salah!", "Tekuk lutut lebih dalam")),
+    ("crunch", with_point(bend(standing(), LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE, 90), NOSE, dx=0.05), False,
+     feedback("Posisi Crunch salah!", "Angkat tubuh atas lebih tinggi")),
+
+    ("bicep curl", elbows(45, 180), True, feedback("Posisi Bicep Curl sudah benar!")),
+    ("bicep curl", standing(), False,
+     feedback("Posisi Bicep Curl salah!", "Tekuk siku lebih dalam saat mengangkat beban")),
+
+    ("pilates", standing(), True, feedback("Posisi Pilates sudah benar!")),
+    ("pilates", knees(180, 120), False, feedback("Posisi Pilates salah!", "Luruskan kaki lebih baik")),
+    ("pilates", bend(standing(), LEFT_KNEE, LEFT_HIP, LEFT_SHOULDER, 120), False,
+     feedback("Posisi Pilates salah!", "Tegakkan punggung, jangan menekuk")),
+
+    ("align", standing(), True, feedback("Posisi Align sudah benar!")),
+    ("align", with_point(standing(), LEFT_SHOULDER, dx=0.2), False,
+     feedback("Posisi Align salah!", "Sejajarkan bahu, pinggul dan pergelangan kaki")),
+
+    ("cabble frontraise", raised_right_arm(180), True, feedback("Posisi Cabble Frontraise sudah benar!")),
+    ("cabble frontraise", raised_right_arm(120), False,
+     feedback("Posisi Cabble Frontraise salah!", "Pertahankan lengan tetap lurus")),
+    ("cabble frontraise", standing(), False,
+     feedback("Posisi Cabble Frontraise salah!", "Angkat lengan lebih tinggi dari bahu")),
+
+    ("cabble row", elbows(90, 180), True, feedback("Posisi Cabble Row sudah benar!")),
+    ("cabble row", elbow_below_hip((RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_HIP)), False,
+     feedback("Posisi Cabble Row salah!", "Condongkan tubuh sedikit ke depan")),
+    ("cabble row", standing(), False, feedback("Posisi Cabble Row salah!", "Tarik siku lebih ke belakang")),
+
+    ("deltoid press", raised_right_arm(180), True, feedback("Posisi Deltoid Press sudah benar!")),
+    ("deltoid press", standing(), False, feedback("Posisi Deltoid Press salah!", "Angkat lengan lebih tinggi")),
+    ("deltoid press", raised_right_arm(130), False,
+     feedback("Posisi Deltoid Press salah!", "Luruskan lengan lebih baik")),
+
+    ("dumble row", elbows(180, 80), True, feedback("Posisi Dumble Row sudah benar!")),
+    ("dumble row", elbow_below_hip((LEFT_SHOULDER, LEFT_ELBOW, LEFT_HIP)), False,
+     feedback("Posisi Dumble Row salah!", "Condongkan tubuh lebih maju")),
+    ("dumble row", standing(), False,
+     feedback("Posisi Dumble Row salah!", "Tekuk siku lebih dalam saat menarik")),
+
+    ("lets pulldown", elbows(90, 90), True, feedback("Posisi Lat Pulldown sudah benar!")),
+    ("lets pulldown", elbows(90, 150), False,
+     feedback("Posisi Lat Pulldown salah!", "Tarik bar ke bawah hingga siku menekuk lebih dalam")),
+
+    ("t-bar row", leaning_right_torso(90), True, feedback("Posisi T-Bar Row sudah benar!")),
+    ("t-bar row", standing(), False, feedback("Posisi T-Bar Row salah!", "Condongkan tubuh lebih ke depan")),
+    ("t-bar row", leaning_right_torso(150), False, feedback("Posisi T-Bar Row salah!", "Tarik beban lebih ke atas")),
+
+    ("hai squad", knees(135, 180), True, feedback("Posisi High Squat sudah benar!")),
+    ("hai squad", knees(100, 180), False,
+     feedback("Posisi High Squat salah!", "Terlalu dalam, angkat sedikit tubuh")),
+    ("hai squad", standing(), False,
+     feedback("Posisi High Squat salah!", "Terlalu tinggi, turunkan tubuh lebih dalam")),
+
+    ("langus", standing(), True, feedback("Posisi Lunges sudah benar!", "Posisi awal/akhir lunges")),
+    ("langus", lunge(90), True, feedback("Posisi Lunges sudah benar!", "Posisi bawah lunges yang baik")),
+    ("langus", with_point(lunge(90), RIGHT_ANKLE, dx=-0.3), False,
+     feedback("Posisi Lunges salah!", "Lutut depan terlalu maju melewati ujung kaki")),
+    # Sudut 110-140 derajat (selain tepat 140) tetap dianggap sedang bergerak, seperti kode lama
+    ("langus", lunge(125), True, feedback("Posisi Lunges sudah benar!", "Lanjutkan gerakan")),
+    ("langus", lunge(150), True, feedback("Posisi Lunges sudah benar!", "Mulai turun, teruskan gerakan")),
+
+    ("leg press", knees(100, 180), True, feedback("Posisi Leg Press sudah benar!")),
+    ("leg press", knees(70, 180), False,
+     feedback("Posisi Leg Press salah!", "Terlalu dalam, bisa melukai lutut")),
+    ("leg press", standing(), False, feedback("Posisi Leg Press salah!", "Tekuk lutut lebih dalam")),
+
+    ("squad", standing(), True, feedback("Posisi Squat sudah benar!", "Posisi berdiri tegak")),
+    ("squad", knees(150, 150), True, feedback("Posisi Squat sudah benar!", "Posisi persiapan squat")),
+    ("squad", knees(100, 100), True, feedback("Posisi Squat sudah benar!", "Posisi squat aktif")),
+    ("squad", knees(70, 70), False,
+     feedback("Posisi Squat perlu perbaikan", "Kurang dalam, turunkan tubuh lebih rendah")),
+    ("squad", knees(50, 50), False, feedback("Posisi Squat perlu perbaikan", "Terlalu dalam, naikan sedikit posisi")),
+    ("squad", with_point(with_point(standing(), RIGHT_ANKLE, dx=-0.35), LEFT_ANKLE, dx=-0.35), False,
+     feedback("Posisi Squat perlu perbaikan", "Lutut terlalu jauh ke depan, geser berat badan ke tumit")),
+
+    ("sumo squad", knees_out(100, 100), True,
+     feedback("Posisi Sumo Squat sudah benar!")),
+    ("sumo squad", knees(70, 100), False,
+     feedback("Posisi Sumo Squat salah!", "Terlalu dalam, naikan posisi tubuh")),
+    ("sumo squad", standing(), False, feedback("Posisi Sumo Squat salah!", "Tekuk lutut lebih dalam")),
+    ("sumo squad", knees(100, 100), False,
+     feedback("Posisi Sumo Squat salah!", "Buka kaki lebih lebar untuk posisi sumo yang benar")),
+]
+
+
+@pytest.mark.parametrize('pose, points, is_correct, expected', PINNED_FRAMES)
+def test_hand_picked_frames(pose, points, is_correct, expected):
+    assert classify_pose(landmarks(points), pose) == (is_correct, expected)
+    assert classify_points(points, pose) == (is_correct, expected)
+
+
+def test_every_exercise_has_pinned_frames():
+    assert {pose for pose, *_ in PINNED_FRAMES} == set(EXERCISE_RULES)
+
+
+def test_langus_kurang_dalam_only_matches_exactly_140():
+    # Kondisi lama ">= 140 and <= 140" dipertahankan apa adanya
+    rule = COMPILED_RULES["langus"]
+    case = next(i for i, spec in enumerate(EXERCISE_RULES["langus"]["cases"])
+                if spec.get("when", "").startswith("140 <= front_knee"))
+
+    def matched(front_knee):
+        values = dict.fromkeys(rule.feature_names, 0.0)
+        values.update(right_knee=front_knee, left_knee=170.0, ankle_x_distance=0.22,
+                      right_knee_lower=0.05, front_knee=front_knee)
+        return int(rule.match(np.array([values[name] for name in rule.feature_names])))
+
+    assert matched(140.0) == case
+    assert matched(139.9) != case
+    assert matched(140.1) != case
+
+
+def test_lenient_squat_accepts_60_to_80_degrees():
+    frame = landmarks(knees(70, 70))
+    assert classify_pose(frame, "squad", LENIENT_SQUAT_RULES) == (True, feedback("Posisi Squat sudah benar!"))
+    assert classify_pose(frame, "squad") == (
+        False, feedback("Posisi Squat perlu perbaikan", "Kurang dalam, turunkan tubuh lebih rendah"))
+    # Gerakan lain tidak berubah
+    for pose in EXERCISE_RULES:
+        if pose != "squad":
+            assert LENIENT_SQUAT_RULES[pose].outcomes == COMPILED_RULES[pose].outcomes
+
+
+def test_compile_rules_rejects_unknown_feature():
+    spec = {"features": {}, "benar": "ok", "salah": "salah", "cases": [{"when": "knee < 90"}]}
+    with pytest.raises(ValueError):
+        compile_rules({"x": spec})
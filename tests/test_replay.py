@@ -0,0 +1,98 @@
+import importlib.util
+import math
+
+import numpy as np
+import pytest
+
+from landmark_recorder import LandmarkRecorder
+from pose_math import LEFT_ANKLE, LEFT_HIP, LEFT_KNEE, NUM_LANDMARKS, RIGHT_ANKLE, RIGHT_HIP, RIGHT_KNEE
+from pose_rules import COMPILED_RULES, classify_points_case
+from replay import load_rules, replay_session
+
+# Sudut lutut per frame (None: pose tidak terdeteksi)
+KNEE_ANGLES = [180, 150, None, 120, 95, 90, 85, 70, None, 50, 175, 100]
+
+# Aturan kandidat: "Kurang dalam" diperluas dari < 80 menjadi < 100 derajat
+STRICTER_SQUAT = '''import copy
+
+from pose_rules import EXERCISE_RULES as CURRENT_RULES
+
+EXERCISE_RULES = copy.deepcopy(CURRENT_RULES)
+for case in EXERCISE_RULES["squad"]["cases"]:
+    if case.get("when") == "60 <= avg_knee < 80":
+        case["when"] = "60 <= avg_knee < 100"
+'''
+
+
+def squat_frame(knee_angle):
+    points = np.zeros((NUM_LANDMARKS, 4))
+    points[:, 3] = 1.0
+    radians = math.radians(knee_angle)
+    for hip, knee, ankle, x, side in ((RIGHT_HIP, RIGHT_KNEE, RIGHT_ANKLE, 0.45, -1),
+                                      (LEFT_HIP, LEFT_KNEE, LEFT_ANKLE, 0.55, 1)):
+        points[hip, :2] = (x, 0.5)
+        points[knee, :2] = (x, 0.7)
+        points[ankle, :2] = (x + side * 0.2 * math.sin(radians), 0.7 - 0.2 * math.cos(radians))
+    return points
+
+
+@pytest.fixture
+def session(tmp_path):
+    directory = str(tmp_path / "squad-session")
+    recorder = LandmarkRecorder(directory, pose='squad', segment_frames=5)
+    for seq, knee_angle in enumerate(KNEE_ANGLES):
+        if knee_angle is None:
+            recorder.append(float(seq), None, seq=seq)
+            continue
+        points = squat_frame(knee_angle).astype(np.float32)
+        is_correct, _, case = classify_points_case(points, 'squad')
+        recorder.append(float(seq), points, int(is_correct), case, seq=seq)
+    recorder.close()
+    return directory
+
+
+def test_same_rules_change_nothing(session):
+    for base_rules in (COMPILED_RULES, None):  # None: putusan live yang tercatat
+        report = replay_session(session, COMPILED_RULES, base_rules)
+        assert report['pose'] == 'squad'
+        assert report['frames'] == len(KNEE_ANGLES)
+        assert report['detected'] == report['graded'] == 10
+        assert report['correct_to_incorrect'] == 0
+        assert report['incorrect_to_correct'] == 0
+        assert report['feedback_changed'] == 0
+        assert report['changed_frames'] == []
+        assert report['baseline_accuracy'] == report['candidate_accuracy'] == 80.0
+
+
+def test_modified_rules_report_changed_frames(session, tmp_path):
+    path = tmp_path / "rules_v2.py"
+    path.write_text(STRICTER_SQUAT)
+    new_rules = load_rules(str(path))
+
+    report = replay_session(session, new_rules)
+    # 95, 90 dan 85 derajat: dulu "squat aktif", sekarang "kurang dalam"
+    assert report['correct_to_incorrect'] == 3
+    assert report['incorrect_to_correct'] == 0
+    assert report['changed_frames'] == [4, 5, 6]
+    assert report['candidate_accuracy'] == 50.0
+    assert report['transitions'] == [{
+        'from': "benar: Posisi squat aktif",
+        'to': "salah: Kurang dalam, turunkan tubuh lebih rendah",
+        'frames': 3,
+    }]
+
+
+def test_load_rules_names_module_after_file(tmp_path, monkeypatch):
+    names = []
+    spec_from_file_location = importlib.util.spec_from_file_location
+
+    def record_name(name, location):
+        names.append(name)
+        return spec_from_file_location(name, location)
+
+    monkeypatch.setattr(importlib.util, 'spec_from_file_location', record_name)
+    path = tmp_path / "rules_v2.py"
+    path.write_text(STRICTER_SQUAT)
+    assert set(load_rules(str(path))) == set(COMPILED_RULES)
+    assert names == ["rules_rules_v2"]
+    assert load_rules() is COMPILED_RULES
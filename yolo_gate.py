@@ -0,0 +1,127 @@
+import numpy as np
+
+from roi_pose import landmark_box
+
+
+class BoxTracker:
+    """
+    Tracker box ringan (filter alpha-beta, kecepatan konstan) untuk meneruskan
+    bounding box di antara dua deteksi YOLO. Tidak memakai piksel sama sekali:
+    koreksi datang dari box landmark MediaPipe yang memang sudah dihitung.
+    """
+
+    def __init__(self, alpha=0.6, beta=0.2):
+        self.alpha = alpha
+        self.beta = beta
+        self.box = None  # (4,) float: x1, y1, x2, y2
+        self.velocity = np.zeros(4)
+
+    def reset(self, box=None):
+        self.box = None if box is None else np.asarray(box, dtype=np.float64)
+        self.velocity = np.zeros(4)
+
+    def predict(self):
+        if self.box is not None:
+            self.box = self.box + self.velocity
+        return self.box
+
+    def correct(self, measured):
+        measured = np.asarray(measured, dtype=np.float64)
+        if self.box is None:
+            self.reset(measured)
+            return self.box
+        residual = measured - self.box
+        self.box = self.box + self.alpha * residual
+        self.velocity = self.velocity + self.beta * residual
+        return self.box
+
+
+class GatedPoseEstimator:
+    """
+    YOLO sebagai gerbang "ada orang?" sebelum MediaPipe, tanpa menjalankan YOLO di setiap frame.
+
+    detector(frame) -> (box, confidence, class_name) atau None dijalankan:
+    - setiap `interval` frame,
+    - saat belum ada box yang dilacak, atau
+    - saat MediaPipe kehilangan pose di frame sebelumnya.
+    Di antaranya box diteruskan oleh BoxTracker dan dikoreksi dari sebaran landmark
+    MediaPipe (dengan selisih tetap terhadap box YOLO terakhir), sehingga pipeline
+    dua model mendekati biaya satu model.
+
+    Hasil process() sama dengan detect_pose lama:
+    (pose_detected, pose_bbox, yolo_confidence, detected_class_name, results)
+    """
+
+    def __init__(self, detector, pose, interval=5):
+        self.detector = detector
+        self.pose = pose  # RoiPoseEstimator
+        self.interval = interval
+        self.tracker = BoxTracker()
+        self._since_detect = 0
+        self._lost = True
+        self._offset = np.zeros(4)  # box YOLO - box landmark pada deteksi terakhir
+        self._confidence = 0.0
+        self._class_name = ""
+        self.detector_calls = 0
+        self.detector_skipped = 0
+        self.forced_calls = 0  # YOLO dipanggil lebih awal karena pose hilang
+
+    def process(self, frame):
+        height, width = frame.shape[:2]
+        run_detector = self._lost or self._since_detect >= self.interval
+        if run_detector:
+            if self._lost and self._since_detect < self.interval and self.tracker.box is not None:
+                self.forced_calls += 1
+            self.detector_calls += 1
+            self._since_detect = 0
+            detection = self.detector(frame)
+            if detection is None:
+                self.tracker.reset()
+                self._lost = True
+                return False, None, 0.0, "", None
+            box, self._confidence, self._class_name = detection
+            self.tracker.reset(box)
+        else:
+            self.detector_skipped += 1
+            self.tracker.predict()
+        self._since_detect += 1
+
+        box = self.tracker.box
+        pose_bbox = [int(max(box[0], 0)), int(max(box[1], 0)),
+                     int(min(box[2], width)), int(min(box[3], height))]
+        results = self.pose.detect(frame, hint_box=pose_bbox)
+
+        if results.pose_landmarks:
+            self._lost = False
+            measured = np.array(landmark_box(results.pose_landmarks.landmark, width, height))
+            if run_detector:
+                # Simpan selisih box YOLO dan box landmark untuk frame-frame berikutnya
+                self._offset = np.asarray(box) - measured
+            else:
+                self.tracker.correct(measured + self._offset)
+        else:
+            # Pose hilang: frame berikutnya YOLO dijalankan lagi
+            self._lost = True
+
+        return True, pose_bbox, self._confidence, self._class_name, results
+
+    def reset(self):
+        # Dipanggil EstimatorPool saat instance dipakai stream lain
+        self.tracker.reset()
+        self._since_detect = 0
+        self._lost = True
+        self.pose.reset()
+
+    def close(self):
+        self.pose.close()
+
+    def stats(self):
+        frames = self.detector_calls + self.detector_skipped
+        stats = self.pose.stats()
+        stats.update({
+            'detector_calls': self.detector_calls,
+            'detector_skipped': self.detector_skipped,
+            'detector_forced': self.forced_calls,
+            'detector_saved_ratio': self.detector_skipped / frames if frames else 0.0,
+        })
+        return stats